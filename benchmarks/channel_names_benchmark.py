@@ -0,0 +1,58 @@
+"""Counts the youtube Data API requests made to resolve channels' names, against a local fake API.
+
+Run from the repository's root:
+    python benchmarks/channel_names_benchmark.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.youtube_watch import ChannelNameCache  # noqa: E402
+
+CHANNELS_COUNT : int = 300
+HOST : str = '127.0.0.1'
+PORT : int = 8766
+
+
+async def main() -> None:
+    requests : list[int] = []
+
+    async def channels_handler(request : web.Request) -> web.Response:
+        ids : list[str] = request.query['id'].split(',')
+        requests.append(len(ids))
+        return web.json_response({"items": [{"id": channel_id, "snippet": {"title": f"Channel {channel_id}"}} for channel_id in ids]})
+
+    app : web.Application = web.Application()
+    app.router.add_get('/youtube/v3/channels', channels_handler)
+    runner : web.AppRunner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+
+    channel_ids : set[str] = {f"UC{i:022d}" for i in range(CHANNELS_COUNT)}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache : ChannelNameCache = ChannelNameCache(f'{directory}/youtube_channels.json', api_url=f'http://{HOST}:{PORT}/youtube/v3')
+            async with aiohttp.ClientSession() as session:
+                names = await cache.resolve(session, channel_ids, "FAKE_KEY")
+                print(f'cold cache: {len(requests)} requests for {CHANNELS_COUNT} channels, {sum(name is not None for name in names.values())} resolved')
+                requests.clear()
+                await cache.resolve(session, channel_ids, "FAKE_KEY")
+                print(f'warm cache: {len(requests)} requests')
+
+            requests.clear()
+            reloaded : ChannelNameCache = ChannelNameCache(f'{directory}/youtube_channels.json', api_url=f'http://{HOST}:{PORT}/youtube/v3')
+            async with aiohttp.ClientSession() as session:
+                await reloaded.resolve(session, channel_ids, "FAKE_KEY")
+            print(f'after restart: {len(requests)} requests')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""Local simulation of the cluster's coordination, without connecting to Discord.
+
+Starts worker processes sharing one coordination database, like the ones of
+src/launch_cluster.py. Each worker heartbeats, publishes the youtube channels
+its guilds watch and competes to lead the youtube polling. The leader relays
+fake uploads that every worker consumes. All workers also increment a shared
+counter file under the storage lock. The first leader is killed halfway to
+check that another worker takes over.
+
+Run from the repository's root:
+    python benchmarks/cluster_simulation.py
+    python benchmarks/cluster_simulation.py --workers 6 --shards 24 --duration 20
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import feedparser  # noqa: E402
+
+from launch_cluster import shard_ranges  # noqa: E402
+from utils.cluster import ClusterCoordinator  # noqa: E402
+
+TICK : float = 0.2
+LEASE : float = 1.0
+INCREMENTS_PER_TICK : int = 5
+
+
+def worker(worker_id : int, shard_ids : list[int], shard_count : int, directory : str, duration : float, increments, consumed, published, last_lead) -> None:
+    """Shared arrays, indexed by worker, keep the counters of workers which get killed."""
+    coordinator : ClusterCoordinator = ClusterCoordinator(worker_id, f'{directory}/cluster.db', lease=LEASE)
+    coordinator.register(shard_count, shard_ids)
+    counter_path : str = f'{directory}/counter.txt'
+    upload : int = 0
+    end : float = time.time() + duration
+    while time.time() < end:
+        coordinator.heartbeat()
+        coordinator.publish_watched({f"UC{worker_id:022d}", "UC-shared"})
+        if coordinator.is_leader("youtube_poller"):
+            last_lead[worker_id] = time.time()
+            upload += 1
+            coordinator.publish_feeds({
+                ytb_channel_id: feedparser.FeedParserDict(entries=[feedparser.FeedParserDict(link=f"https://www.youtube.com/watch?v={worker_id}-{upload}", author="")])
+                for ytb_channel_id in coordinator.watched()
+            })
+        consumed[worker_id] += len(coordinator.consume_feeds())
+        published[worker_id] = coordinator.feeds_published
+
+        for _ in range(INCREMENTS_PER_TICK):
+            with coordinator.locked("counter"):
+                with open(counter_path, 'r', encoding='utf-8') as file:
+                    value : int = int(file.read() or 0)
+                with open(counter_path, 'w', encoding='utf-8') as file:
+                    file.write(str(value + 1))
+                increments[worker_id] += 1
+        time.sleep(TICK)
+    coordinator.leave()
+
+
+def main() -> None:
+    parser : argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=8.0)
+    arguments : argparse.Namespace = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        with open(f'{directory}/counter.txt', 'w', encoding='utf-8') as file:
+            file.write("0")
+        increments, consumed, published = (context.Array('i', arguments.workers) for _ in range(3))
+        last_lead = context.Array('d', arguments.workers)
+        ranges : list[list[int]] = shard_ranges(arguments.shards, arguments.workers)
+        processes : list[multiprocessing.Process] = [
+            context.Process(target=worker, args=(worker_id, ranges[worker_id], arguments.shards, directory, arguments.duration, increments, consumed, published, last_lead))
+            for worker_id in range(arguments.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        observer : ClusterCoordinator = ClusterCoordinator(-1, f'{directory}/cluster.db', lease=LEASE)
+        time.sleep(1.0)
+        owners : dict[int, list[int]] = {}
+        for worker_id, (_, shard_ids) in observer.workers().items():
+            for shard_id in shard_ids:
+                owners.setdefault(shard_id, []).append(worker_id)
+        print(f'shards of the {arguments.workers} live workers: {dict(sorted(owners.items()))}')
+        assert sorted(owners) == list(range(arguments.shards)) and all(len(workers) == 1 for workers in owners.values()), "shards not run by exactly one worker"
+        routes : dict[int | None, int] = {}
+        for guild_id in range(1 << 22, 10001 << 22, 1 << 22):
+            worker_id : int | None = observer.route(guild_id)
+            routes[worker_id] = routes.get(worker_id, 0) + 1
+        print(f'guild routing over {arguments.workers} workers: {dict(sorted(routes.items(), key=lambda item: str(item[0])))}')
+        assert None not in routes, "guilds routed to no worker"
+
+        time.sleep(arguments.duration / 2 - 1.0)
+        leader : int | None = next((worker_id for worker_id in range(arguments.workers) if observer._connection.execute(
+            "SELECT owner FROM locks WHERE name = 'leader:youtube_poller' AND owner = ?", (worker_id,)).fetchone()), None)
+        killed_at : float = time.time()
+        if leader is not None:
+            processes[leader].kill()
+            print(f'killed leader worker {leader}')
+
+        for process in processes:
+            process.join()
+
+        with open(f'{directory}/counter.txt', 'r', encoding='utf-8') as file:
+            counter : int = int(file.read())
+        successors : list[int] = [worker_id for worker_id in range(arguments.workers) if worker_id != leader and last_lead[worker_id] > killed_at]
+
+        print(f'shared counter: {counter}, increments made under the lock: {sum(increments)}')
+        for worker_id in range(arguments.workers):
+            print(f'worker {worker_id} consumed {consumed[worker_id]} relayed feeds')
+        print(f'feeds published by leaders: {sum(published)}')
+        print(f'leader after the kill: {successors or "none"}')
+        # The killed worker may have died between writing the counter and counting its increment.
+        assert 0 <= counter - sum(increments) <= 1, "lost updates under the storage lock"
+        assert len(successors) == 1, "no single worker took over the youtube polling"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark of config.json reads per event, before and after the ConfigStore.
+
+Run from the repository's root:
+    python benchmarks/config_store_benchmark.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.config_store import ConfigStore  # noqa: E402
+from utils.storage import JsonTreeBackend  # noqa: E402
+
+SERVERS_COUNT : int = 200
+EVENTS_COUNT : int = 20000
+
+
+def per_event_json_load(servers_path : str, server_id : int) -> str:
+    """Old behaviour: every event opens config.json, often twice."""
+    with open(f'{servers_path}/{server_id}/config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+    with open(f'{servers_path}/{server_id}/config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+    return config["language"]
+
+
+def config_store_read(store : ConfigStore, server_id : int) -> str:
+    """New behaviour: every event reads the in-memory config."""
+    return store.language(server_id)
+
+
+def run(name : str, handler, argument, events : list[int]) -> float:
+    start : float = time.perf_counter()
+    for server_id in events:
+        handler(argument, server_id)
+    elapsed : float = time.perf_counter() - start
+    events_per_second : float = len(events) / elapsed
+    print(f'{name:<20} {events_per_second:>12,.0f} events/sec')
+    return events_per_second
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as servers_path:
+        store : ConfigStore = ConfigStore(JsonTreeBackend(servers_path))
+        server_ids : list[int] = [100000000000000000 + i for i in range(SERVERS_COUNT)]
+        for server_id in server_ids:
+            store.create(server_id)
+        events : list[int] = [random.choice(server_ids) for _ in range(EVENTS_COUNT)]
+
+        before : float = run('json.load per event', per_event_json_load, servers_path, events)
+        after : float = run('ConfigStore', config_store_read, store, events)
+        print(f'Speedup: x{after / before:,.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Run of the event loop watchdog against deliberately blocking callbacks.
+
+Blocks the loop with a sleep and a CPU bound loop, then prints the stalls
+detected and the top blocking call sites of the report.
+
+Run from the repository's root:
+    python benchmarks/loop_watchdog_demo.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.loop_watchdog import LoopWatchdog  # noqa: E402
+
+
+def blocking_sleep() -> None:
+    time.sleep(0.4)
+
+
+def blocking_computation() -> None:
+    end : float = time.monotonic() + 0.6
+    while time.monotonic() < end:
+        sum(range(1000))
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        watchdog : LoopWatchdog = LoopWatchdog(threshold=0.1, profile=True, report_path=f'{directory}/loop_stalls.json')
+        watchdog.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.2)
+        for blocking_callback in (blocking_sleep, blocking_computation, blocking_sleep):
+            blocking_callback()
+            await asyncio.sleep(0.2)
+        watchdog.stop()
+
+        print(f'watchdog stats: {watchdog.stats()}')
+        with open(watchdog.report_path, 'r', encoding='utf-8') as file:
+            for site in json.load(file)["top_sites"]:
+                print(f'{site["samples"]:>5} samples  {site["site"]}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Benchmark of a check_new_videos tick against a local stub of youtube's RSS feeds.
+
+Compares the old sequential, blocking feedparser.parse(url) loop with the
+concurrent aiohttp download of utils.youtube_watch.fetch_feeds.
+
+Run from the repository's root:
+    python benchmarks/rss_fetch_benchmark.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+import feedparser
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import utils.youtube_watch  # noqa: E402
+
+FEEDS_COUNT : int = 300
+STUB_LATENCY : float = 0.05
+HOST : str = '127.0.0.1'
+PORT : int = 8765
+URL_TEMPLATE : str = f'http://{HOST}:{PORT}/feeds/videos.xml?channel_id={{channel_id}}'
+
+FEED_TEMPLATE : str = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+ <title>{channel_id}</title>
+{entries}
+</feed>"""
+ENTRY_TEMPLATE : str = """ <entry>
+  <yt:videoId>{video_id}</yt:videoId>
+  <title>Video {index}</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  <published>2025-01-01T00:00:00+00:00</published>
+ </entry>"""
+
+
+async def feed_handler(request : web.Request) -> web.Response:
+    channel_id : str = request.query['channel_id']
+    await asyncio.sleep(STUB_LATENCY)
+    entries : str = "\n".join(ENTRY_TEMPLATE.format(video_id=f"{channel_id}-{i}", index=i) for i in range(15))
+    return web.Response(text=FEED_TEMPLATE.format(channel_id=channel_id, entries=entries), content_type='application/atom+xml')
+
+
+def sequential_tick(channel_ids : list[str]) -> int:
+    """Old behaviour: one blocking download and parse per feed."""
+    found : int = 0
+    for channel_id in channel_ids:
+        feed = feedparser.parse(URL_TEMPLATE.format(channel_id=channel_id))
+        found += bool(feed.entries)
+    return found
+
+
+async def concurrent_tick(channel_ids : list[str]) -> int:
+    """New behaviour: concurrent downloads, parsing out of the event loop."""
+    async with aiohttp.ClientSession() as session:
+        feeds = await utils.youtube_watch.fetch_feeds(session, channel_ids, url_template=URL_TEMPLATE)
+    return sum(utils.youtube_watch.latest_video_id(feed) is not None for feed in feeds.values())
+
+
+async def main() -> None:
+    app : web.Application = web.Application()
+    app.router.add_get('/feeds/videos.xml', feed_handler)
+    runner : web.AppRunner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+
+    channel_ids : list[str] = [f"UC{i:022d}" for i in range(FEEDS_COUNT)]
+    try:
+        start : float = time.perf_counter()
+        found : int = await asyncio.to_thread(sequential_tick, channel_ids)
+        sequential : float = time.perf_counter() - start
+        print(f'sequential feedparser.parse  {sequential:8.2f} s  ({found} feeds)')
+
+        start = time.perf_counter()
+        found = await concurrent_tick(channel_ids)
+        concurrent : float = time.perf_counter() - start
+        print(f'concurrent fetch_feeds       {concurrent:8.2f} s  ({found} feeds)')
+        print(f'Speedup: x{sequential / concurrent:,.1f}')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""Local simulation of the bot split across several shards.
+
+Creates guilds with role reacts and youtube subscriptions, then gives every
+simulated shard its own partitioned indexes, as a process running only that
+shard would have. Routes reaction events and youtube uploads like Discord and
+the youtube survey would, and checks that each guild is served by exactly
+one shard.
+
+Run from the repository's root:
+    python benchmarks/shard_simulation.py
+    python benchmarks/shard_simulation.py --shards 8 --guilds 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.config_store import config_store  # noqa: E402
+from utils.role_react_index import RoleReactIndex  # noqa: E402
+from utils.sharding import ShardMap  # noqa: E402
+from utils.storage import JsonTreeBackend  # noqa: E402
+from utils.subscription_index import SubscriptionIndex  # noqa: E402
+
+DISCORD_EPOCH_MS : int = 1420070400000
+EMOJIS : tuple[str, ...] = ("👍", "🎮", "🎨")
+YOUTUBE_CHANNELS_COUNT : int = 300
+SUBSCRIPTIONS_PER_GUILD : int = 2
+EVENTS_COUNT : int = 50000
+
+
+def snowflake() -> int:
+    """Generates a guild ID shaped like Discord's, whose timestamp bits decide its shard."""
+    timestamp : int = random.randrange(0, int(time.time() * 1000) - DISCORD_EPOCH_MS)
+    return (timestamp << 22) | random.randrange(1 << 22)
+
+
+class FakeEventSource:
+    """Stand-in for the bot's dispatch, so the events can be counted per shard like on the gateway."""
+
+    def __init__(self):
+        self.dispatched : int = 0
+        self._connection : FakeEventSource = self
+
+    def dispatch(self, event_name : str, *args) -> None:
+        self.dispatched += 1
+
+
+class FakePayload:
+    def __init__(self, guild_id : int, message_id : int, emoji : str):
+        self.guild_id : int = guild_id
+        self.message_id : int = message_id
+        self.emoji : str = emoji
+
+
+def main() -> None:
+    parser : argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shards', type=int, default=4, help='Number of simulated shards.')
+    parser.add_argument('--guilds', type=int, default=5000, help='Number of simulated guilds.')
+    arguments : argparse.Namespace = parser.parse_args()
+    random.seed(arguments.shards * arguments.guilds)
+
+    with tempfile.TemporaryDirectory() as servers_path:
+        config_store.backend = JsonTreeBackend(servers_path)
+        config_store._configs.clear()
+        config_store._server_ids = None
+
+        ytb_channel_ids : list[str] = [f"UC{i:022d}" for i in range(YOUTUBE_CHANNELS_COUNT)]
+        reactions : list[tuple[int, int, str]] = []
+        subscriptions : int = 0
+        for _ in range(arguments.guilds):
+            guild_id : int = snowflake()
+            config_store.create(guild_id)
+            config : dict[str, any] = config_store.get(guild_id)
+            message_id : int = snowflake()
+            config["role_react"][str(message_id)] = {emoji: str(snowflake()) for emoji in EMOJIS}
+            reactions += [(guild_id, message_id, emoji) for emoji in EMOJIS]
+            config["youtube_survey"]["channel_id"] = str(snowflake())
+            for ytb_channel_id in random.sample(ytb_channel_ids, SUBSCRIPTIONS_PER_GUILD):
+                config["youtube_survey"]["youtube_channels_id"][ytb_channel_id] = None
+                subscriptions += 1
+
+        shards : list[tuple[ShardMap, RoleReactIndex, SubscriptionIndex, FakeEventSource]] = []
+        for shard_id in range(arguments.shards):
+            shard : ShardMap = ShardMap(arguments.shards, [shard_id])
+            role_react_index : RoleReactIndex = RoleReactIndex(shard)
+            subscription_index : SubscriptionIndex = SubscriptionIndex(shard)
+            start : float = time.perf_counter()
+            role_react_index.load_shard(shard_id)
+            subscription_index.load_shard(shard_id)
+            source : FakeEventSource = FakeEventSource()
+            shard.count_events(source)
+            shards.append((shard, role_react_index, subscription_index, source))
+            print(f'shard {shard_id}: indexes loaded in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        # Discord sends each guild's events to the shard owning it only.
+        routing : ShardMap = ShardMap(arguments.shards)
+        served : list[int] = [0] * arguments.shards
+        for _ in range(EVENTS_COUNT):
+            guild_id, message_id, emoji = random.choice(reactions)
+            shard_id : int = routing.shard_of(guild_id)
+            shard, role_react_index, _, source = shards[shard_id]
+            source.dispatch("raw_reaction_add", FakePayload(guild_id, message_id, emoji))
+            if role_react_index.get(guild_id, message_id, emoji) is not None:
+                served[shard_id] += 1
+            assert all(other[1].get(guild_id, message_id, emoji) is None for other in shards if other[0] is not shard), "guild served by a foreign shard"
+
+        print(f'\n{"shard":>5} {"guilds":>7} {"events":>7} {"served":>7} {"watched":>8} {"announcements":>14}')
+        announcements_total : int = 0
+        for shard_id, (shard, _, subscription_index, _) in enumerate(shards):
+            announcements : int = sum(len(subscription_index.subscribers(ytb_channel_id)) for ytb_channel_id in subscription_index.channels())
+            announcements_total += announcements
+            guilds : int = len(shard.local(config_store.server_ids()))
+            print(f'{shard_id:>5} {guilds:>7} {shard.events.get(shard_id, 0):>7} {served[shard_id]:>7} {len(subscription_index.channels()):>8} {announcements:>14}')
+
+        assert sum(served) == EVENTS_COUNT, "some events weren't served"
+        assert announcements_total == subscriptions, "uploads weren't announced exactly once per subscription"
+        print(f'\n{EVENTS_COUNT} events served once each, {announcements_total}/{subscriptions} subscriptions announced once each.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark of the bot's cold start.
+
+Launches fresh interpreters and times each step from the process's launch:
+main imported, extensions loaded and persistent views registered. Also
+lists which heavy libraries were already imported by then, which should
+only be imported once their feature is used. Offline by default; with
+--connect, each run logs in with the token of src/utils/tokens_and_keys.py
+and also times on_ready, then disconnects.
+
+Run from the repository's root:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 5 --connect
+"""
+import time
+
+LAUNCH_MARK : float = time.time()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import platform  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+
+ROOT : str = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_MODULES : tuple[str, ...] = ("PIL", "qrcode", "feedparser", "aiohttp.web")
+MILESTONES : tuple[str, ...] = ("interpreter_started", "main_imported", "extensions_loaded", "on_ready", "views_registered")
+
+
+def child(launched_at : float, connect : bool) -> None:
+    """Runs in the launched process: starts the bot and prints the time of each milestone since the launch."""
+    milestones : dict[str, float] = {"interpreter_started": LAUNCH_MARK - launched_at}
+    sys.path.insert(0, os.path.join(ROOT, 'src'))
+    os.chdir(ROOT)
+
+    import main
+    milestones["main_imported"] = time.time() - launched_at
+    main.load_extensions()
+    milestones["extensions_loaded"] = time.time() - launched_at
+    help_tickets = main.tyrBot.get_cog("HelpTickets")
+
+    if connect:
+        async def on_ready() -> None:
+            milestones["on_ready"] = time.time() - launched_at
+            # The views are registered by the extensions' own on_ready listeners.
+            while help_tickets is not None and not main.tyrBot.persistent_views:
+                await asyncio.sleep(0.001)
+            milestones["views_registered"] = time.time() - launched_at
+            await main.tyrBot.close()
+        main.tyrBot.add_listener(on_ready, "on_ready")
+        main.run()
+    else:
+        async def register_views() -> None:
+            if help_tickets is not None:
+                help_tickets.register_views()
+        asyncio.run(register_views())
+        milestones["views_registered"] = time.time() - launched_at
+
+    print("RESULT " + json.dumps({"milestones": milestones, "imported": [module for module in HEAVY_MODULES if module in sys.modules]}))
+
+
+def launch(connect : bool) -> dict[str, any]:
+    launched_at : float = time.time()
+    arguments : list[str] = [sys.executable, os.path.abspath(__file__), '--child', repr(launched_at)] + (['--connect'] if connect else [])
+    output : subprocess.CompletedProcess = subprocess.run(arguments, cwd=ROOT, capture_output=True, text=True, timeout=120)
+    for line in output.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"The bot didn't start:\n{output.stderr}")
+
+
+def compare(previous_path : str, results : dict[str, float]) -> None:
+    """Prints the change of each milestone since a previous run."""
+    with open(previous_path, 'r', encoding='utf-8') as file:
+        previous : dict[str, float] = json.load(file)["results"]
+    print(f'Compared with {previous_path}:')
+    for milestone, seconds in results.items():
+        if previous.get(milestone):
+            print(f'  {milestone:<20} x{seconds / previous[milestone]:.2f}')
+
+
+def main() -> None:
+    parser : argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Number of launches, the median of each milestone is reported.')
+    parser.add_argument('--connect', action='store_true', help='Logs in to Discord to also time on_ready.')
+    parser.add_argument('--output', default=f'benchmarks/results/startup-{time.strftime("%Y%m%d-%H%M%S")}.json', help='Where to write the results.')
+    parser.add_argument('--compare', help='Results of a previous run to compare with.')
+    parser.add_argument('--child', type=float, help=argparse.SUPPRESS)
+    arguments : argparse.Namespace = parser.parse_args()
+
+    if arguments.child is not None:
+        child(arguments.child, arguments.connect)
+        return
+
+    os.chdir(ROOT)
+    runs : list[dict[str, any]] = []
+    for _ in range(arguments.runs):
+        runs.append(launch(arguments.connect))
+
+    results : dict[str, float] = {}
+    for milestone in MILESTONES:
+        timings : list[float] = [run["milestones"][milestone] for run in runs if milestone in run["milestones"]]
+        if timings:
+            results[milestone] = statistics.median(timings)
+            print(f'{milestone:<20} {results[milestone] * 1000:>9,.1f} ms after launch (median of {len(timings)})')
+    imported : list[str] = sorted({module for run in runs for module in run["imported"]})
+    print(f'heavy libraries imported at startup: {", ".join(imported) or "none"}')
+
+    os.makedirs(os.path.dirname(arguments.output) or '.', exist_ok=True)
+    with open(arguments.output, 'w', encoding='utf-8') as file:
+        json.dump({"python": platform.python_version(), "timestamp": time.time(), "connect": arguments.connect, "imported": imported, "results": results}, file, indent=4)
+    print(f'Results written to {arguments.output}')
+    if arguments.compare:
+        compare(arguments.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""End-to-end run of the WebSub receiver against a local stand-in hub.
+
+The stand-in hub accepts the subscriptions, verifies them with a challenge
+on the receiver's callback, then pushes a signed Atom entry for each channel.
+
+Run from the repository's root:
+    python benchmarks/websub_local_hub.py
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import sys
+import time
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.websub import WebSubReceiver  # noqa: E402
+
+HOST : str = '127.0.0.1'
+HUB_PORT : int = 8767
+RECEIVER_PORT : int = 8768
+SECRET : str = 'local-secret'
+CHANNELS_COUNT : int = 20
+
+ENTRY_TEMPLATE : str = """<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+ <title>YouTube video feed</title>
+ <entry>
+  <yt:videoId>{video_id}</yt:videoId>
+  <yt:channelId>{channel_id}</yt:channelId>
+  <title>New video</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  <author><name>Channel {channel_id}</name></author>
+  <published>{published}</published>
+ </entry>
+</feed>"""
+
+
+async def main() -> None:
+    verified : list[str] = []
+    received : dict[str, str] = {}
+    session : aiohttp.ClientSession = aiohttp.ClientSession()
+
+    async def verify_and_push(callback : str, topic : str, channel_id : str, secret : str) -> None:
+        challenge : str = uuid.uuid4().hex
+        async with session.get(callback, params={"hub.mode": "subscribe", "hub.topic": topic, "hub.challenge": challenge, "hub.lease_seconds": "3600"}) as response:
+            if response.status != 200 or await response.text() != challenge:
+                return
+        verified.append(channel_id)
+        body : bytes = ENTRY_TEMPLATE.format(
+            video_id=f"video-{channel_id}", channel_id=channel_id,
+            published=time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+        ).encode()
+        signature : str = "sha1=" + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+        await session.post(callback, data=body, headers={"Content-Type": "application/atom+xml", "X-Hub-Signature": signature})
+
+    async def subscribe_handler(request : web.Request) -> web.Response:
+        form = await request.post()
+        channel_id : str = form["hub.topic"].split("channel_id=")[-1]
+        asyncio.create_task(verify_and_push(form["hub.callback"], form["hub.topic"], channel_id, form.get("hub.secret", "")))
+        return web.Response(status=202)
+
+    async def on_feeds(_ : aiohttp.ClientSession, feeds : dict) -> None:
+        for channel_id, feed in feeds.items():
+            received[channel_id] = feed.entries[0].link
+
+    hub : web.Application = web.Application()
+    hub.router.add_post('/subscribe', subscribe_handler)
+    hub_runner : web.AppRunner = web.AppRunner(hub)
+    await hub_runner.setup()
+    await web.TCPSite(hub_runner, HOST, HUB_PORT).start()
+
+    receiver : WebSubReceiver = WebSubReceiver(
+        on_feeds, SECRET, callback_url=f'http://{HOST}:{RECEIVER_PORT}/websub',
+        hub_url=f'http://{HOST}:{HUB_PORT}/subscribe'
+    )
+    await receiver.start(HOST, RECEIVER_PORT)
+
+    channel_ids : set[str] = {f"UC{i:022d}" for i in range(CHANNELS_COUNT)}
+    try:
+        start : float = time.perf_counter()
+        await receiver.sync(channel_ids)
+        while len(received) < CHANNELS_COUNT and time.perf_counter() - start < 10:
+            await asyncio.sleep(0.01)
+        elapsed : float = time.perf_counter() - start
+        print(f'{len(verified)}/{CHANNELS_COUNT} subscriptions verified')
+        print(f'{len(received)}/{CHANNELS_COUNT} pushed videos received in {elapsed * 1000:.0f} ms')
+        print(f'receiver stats: {receiver.stats()}')
+    finally:
+        await receiver.stop()
+        await hub_runner.cleanup()
+        await session.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import io
+import json
+import discord
+from discord.ext import commands
+
+import utils.image_utils
+from utils.config_store import config_store
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.role_react_index import role_react_index
+from utils.subscription_index import subscription_index
+from utils.temp_voice_registry import temp_voice_registry
+
+
+async def language_autocomplete(ctx : discord.AutocompleteContext) -> list[str]:
+    """Suggests the available languages, read on every keystroke so hot reloaded packs are listed."""
+    return [language for language in lang_registry.languages() if language.startswith(ctx.value.lower())]
+
+
+class Admin(commands.Cog):
+    """Server-wide settings, configuration export and import, and the bot's stats."""
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+
+    @discord.slash_command(name = "set_language", description = "Changes the bot's language.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="language_prefix", description="The language to be set", autocomplete=language_autocomplete)
+    async def set_language(self, ctx : discord.ApplicationContext, language_prefix : str):
+        """
+        Sets the bot's language.
+
+        Args:
+            language (str): The language to be set.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        # Autocomplete only suggests, any value can still be sent
+        if language_prefix not in lang_registry.languages():
+            await ctx.respond(lang_registry.get(config['language'])["language_not_found"].format_map({"languages": ", ".join(lang_registry.languages())}))
+            return
+        config["language"] = language_prefix
+        config_store.save(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(language_prefix)
+        await ctx.respond(lang["language_defined"])
+
+    @discord.slash_command(name = "set_logs_channel", description = "Defines where the bot will sent important logs.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="channel", description="The channel to be set as the logs channel.")
+    async def set_logs_channel(self, ctx : discord.ApplicationContext, channel : discord.TextChannel):
+        """
+        Sets the logs channel for the server.
+
+        Args:
+            channel (discord.TextChannel): The channel to be set as the logs channel.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        config["logs_channel_id"] = str(channel.id)
+        config_store.save(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        await ctx.respond(lang["logs_channel_defined"])
+
+    @discord.slash_command(name="export_config", description="Exports the server's configuration.")
+    @commands.has_permissions(administrator=True)
+    async def export_config(self, ctx: discord.ApplicationContext):
+        """
+        Exports the server's configuration.
+        """
+        config_file: io.BytesIO = io.BytesIO(config_store.dumps(ctx.guild.id))
+        config: dict[str, any] = config_store.get(ctx.guild.id)
+
+        lang: dict[str, any] = lang_registry.get(config['language'])
+
+        await ctx.respond(file=discord.File(config_file, "config.json"), content=lang["server_config"])
+            
+    @discord.slash_command(name= "import_config", description="Imports a server's configuration.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="file", description="JSON file containing config (Don't import a random file, it could break the bot in your server)")
+    async def import_config(self, ctx : discord.ApplicationContext, conf_file : discord.Attachment):
+        """
+        Imports the server's configuration.
+
+        Args:
+            file (discord.Attachment): The file containing the configuration to be imported.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        if not conf_file.filename.endswith(".json"):
+            await ctx.respond(lang["not_json_file"])
+            return
+        config_store.replace(ctx.guild.id, json.loads(await conf_file.read()))
+        role_react_index.load_server(ctx.guild.id)
+        subscription_index.load_server(ctx.guild.id)
+        temp_voice_registry.load_hubs(ctx.guild.id)
+        utils.image_utils.invalidate_card_template(ctx.guild.id)
+        await ctx.respond(lang["server_config_imported"])
+
+    @discord.slash_command(name = "stats", description = "Displays the latency, errors and REST calls of the bot's handlers.")
+    @commands.has_permissions(administrator=True)
+    async def stats(self, ctx : discord.ApplicationContext):
+        """
+        Displays the latency, errors and REST calls of the bot's slowest handlers, and the counters of its components.
+        """
+        embed : discord.Embed = discord.Embed(title="Stats", color=0x00ff00)
+        handlers : list[tuple[str, any]] = sorted(metrics.handlers.items(), key=lambda item: item[1].latency.sum, reverse=True)
+        for name, handler in handlers[:12]:
+            handler_stats : dict[str, float] = handler.stats()
+            embed.add_field(name=name, value=(
+                f"{handler_stats['calls']} calls, {handler_stats['errors']} errors\n"
+                f"{handler_stats['mean_latency'] * 1000:.1f} ms avg, p95 ≤ {handler_stats['p95_latency'] * 1000:.0f} ms\n"
+                f"{handler_stats['rest_calls_per_call']:.1f} REST calls/call, {handler_stats['rate_limits']} rate limits"
+            ), inline=True)
+        for component, counters in metrics.stats().items():
+            value : str = "\n".join(f"{counter}: {round(number, 3) if isinstance(number, float) else number}" for counter, number in counters.items())
+            embed.add_field(name=component, value=value[:1024] or "-", inline=True)
+        embed.set_footer(text="TyrBot - 📊 Stats")
+        await ctx.respond(embed=embed, ephemeral=True)
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(Admin(bot))
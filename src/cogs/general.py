@@ -0,0 +1,66 @@
+import io
+import discord
+from discord.ext import commands
+
+from utils.config_store import config_store
+from utils.lang_registry import lang_registry
+from utils.outbound import outbound, Priority
+
+
+class General(commands.Cog):
+    """Commands available to every member."""
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+
+    @discord.slash_command(name = "help", description = "Displays help about how to use the bot.")
+    async def help(self, ctx : discord.ApplicationContext) -> None:
+        """
+            Displays the list of available commands.
+        """
+        embed : discord.Embed = discord.Embed(title="Help", color=0x00ff00)    
+        embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/653287777512849419/1325952141512409149/help_thumbnail.png?ex=677da8a9&is=677c5729&hm=51331b77409b6492f7bec07411ef51eb6bc8256c92977c6d02873d0d2c1cab22&")
+        command : discord.commands.SlashCommand = None
+        for command in self.bot.all_commands.values():
+            embed.add_field(name=f"/{command.name}", value=command.description, inline=False)
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        embed.add_field(name="Message's templates cheatsheet", value=lang["message_template_cheat_sheet"], inline=False)
+        
+        embed.set_footer(text="TyrBot - 📖 Help")
+        await ctx.respond(embed=embed)
+
+    @discord.slash_command(name = "ping", description = "Displays the latency between the bot and the discord API.")
+    async def ping(self, ctx : discord.ApplicationContext) -> None:
+        """ 
+        Displays the latency between the bot and the discord API.
+        """
+        await ctx.respond(f"💫 Pong! ({int(self.bot.latency * 1000)} ms)")
+
+    @discord.slash_command(name="qr", description="Generates a QR code from the specified content, sent in DM.")
+    @discord.option(name="content", description="The content to be encoded in the QR code.")
+    async def generate_qr(self, ctx : discord.ApplicationContext, content: str) -> None:
+        """Generates a QR code from the specified content.
+
+        Args:
+            content (str): The content to be encoded in the QR code.
+        """
+        # Imported by the first QR code rather than at startup
+        import qrcode
+
+        qr : qrcode.QRCode = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(content)
+        qr.make(fit=True)
+        qr_image = qr.make_image(fill_color="black", back_color="white")
+        qr_image_bytes : io.BytesIO = io.BytesIO()
+        qr_image.save(qr_image_bytes, format="PNG")
+        qr_image_bytes.seek(0)
+        dm_channel : discord.DMChannel = ctx.author.dm_channel or await ctx.author.create_dm()
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        await outbound.send(dm_channel, Priority.INTERACTIVE, file=discord.File(qr_image_bytes, "qr_code.png"), content=lang["qr_code_message"])
+        await ctx.respond(lang["qr_code_sent"])
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(General(bot))
@@ -0,0 +1,109 @@
+import discord
+from discord.ext import commands
+
+import utils.discord_helpers
+from utils.config_store import config_store
+from utils.help_tickets import help_ticket_index
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.outbound import outbound, Priority
+
+
+class HelpTickets(commands.Cog):
+    """Help channels whose button opens a private ticket channel with the help role."""
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+        metrics.register("help_tickets", help_ticket_index.stats)
+
+    def register_views(self) -> None:
+        """Registers the persistent views, so the buttons of the messages sent before a restart keep working."""
+        self.bot.add_view(utils.discord_helpers.HelpView())
+
+    @commands.Cog.listener()
+    @metrics.track("help_tickets_on_ready")
+    async def on_ready(self) -> None:
+        self.register_views()
+
+    @commands.Cog.listener()
+    @metrics.track("help_tickets_on_shard_loaded")
+    async def on_shard_loaded(self, shard_id : int) -> None:
+        for guild in self.bot.guilds:
+            if guild.shard_id == shard_id and config_store.has(guild.id):
+                help_category_id : str | None = config_store.get(guild.id)["help_system"]["help_category_id"]
+                category : discord.abc.GuildChannel | None = guild.get_channel(int(help_category_id)) if help_category_id else None
+                help_ticket_index.load_guild(guild, category if isinstance(category, discord.CategoryChannel) else None)
+
+    @commands.Cog.listener()
+    @metrics.track()
+    async def on_guild_channel_delete(self, channel : discord.abc.GuildChannel) -> None:
+        help_ticket_index.remove_channel(channel.guild.id, channel.id)
+
+    @discord.slash_command(name="add_help_channel", description="Adds a help ticket system to a text channel.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="channel", description="The text channel to which the help ticket system will be added.")
+    @discord.option(name="help_role", description="The role that manages the help tickets.")
+    @discord.option(name="help_category", description="The category in which the help tickets will be created, actual if never specified.", required=False)
+    async def add_help_channel(self, ctx : discord.ApplicationContext, channel : discord.TextChannel, help_role : discord.Role, help_category : discord.CategoryChannel = None):
+        """
+        Adds a help ticket system to a text channel.
+
+        Args:
+            channel (discord.TextChannel): The text channel to which the help ticket system will be added.
+            help_role (discord.Role): The role that manages the help tickets.
+            help_category (discord.CategoryChannel, optional): The category in which the help tickets will be created.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if str(channel.id) in config["help_system"]["channels_id"].keys():
+            await ctx.respond(lang["help_system_channel_already_defined"])
+            return
+        
+        if help_category.id is not None:
+            config["help_system"]["help_category_id"] = help_category.id
+        elif config["help_system"]["help_category_id"]:
+            help_category : discord.CategoryChannel = ctx.guild.get_channel(int(config["help_system"]["help_category_id"]))
+        else:
+            help_category : discord.CategoryChannel = channel.category
+            config["help_system"]["help_category_id"] = str(help_category.id) 
+            
+        config["help_system"]["channels_id"][str(channel.id)] = str(help_role.id)
+        config_store.save(ctx.guild.id)
+        embed = discord.Embed(title="Help ticket", description=lang["help_ticket_description"], color=discord.Color.green())
+        embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/653287777512849419/1325952141512409149/help_thumbnail.png?ex=677da8a9&is=677c5729&hm=51331b77409b6492f7bec07411ef51eb6bc8256c92977c6d02873d0d2c1cab22&")
+        embed.set_footer(text="TyrBot - 🎫 Help")
+        view = utils.discord_helpers.HelpView()
+        await outbound.send(channel, Priority.INTERACTIVE, embed=embed, view=view)
+        await ctx.respond(lang["help_channel_system_added"])
+        
+    @discord.slash_command(name="remove_help_channel", description="Removes a help ticket system from a text channel.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="channel", description="The text channel from which the help ticket system will be removed.")
+    async def remove_help_channel(self, ctx : discord.ApplicationContext, channel : discord.TextChannel):
+        """
+        Removes a help ticket system from a text channel.
+        
+        Args:
+            channel (discord.TextChannel): The text channel from which the help ticket system will be removed.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if str(channel.id) not in config["help_system"]["channels_id"].keys():
+            await ctx.respond(lang["help_system_channel_not_defined"])
+            return
+            
+        del config["help_system"]["channels_id"][str(channel.id)]
+        config_store.save(ctx.guild.id)
+            
+        try:
+            await channel.delete()
+        except:
+            await ctx.respond(lang["help_system_channel_deletion_error"])
+            
+        await ctx.respond(lang["help_system_channel_removed"])
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(HelpTickets(bot))
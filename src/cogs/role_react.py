@@ -0,0 +1,144 @@
+import discord
+from discord.ext import commands
+
+import utils.server_management
+from utils.config_store import config_store
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.outbound import outbound, Priority
+from utils.role_queue import RoleAssignmentQueue
+from utils.role_react_index import role_react_index
+
+
+class RoleReact(commands.Cog):
+    """Roles given and taken back through reactions to a message."""
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+        self.role_queue : RoleAssignmentQueue = RoleAssignmentQueue(on_error=self.log_role_error)
+        metrics.register("role_queue", self.role_queue.stats)
+
+    async def log_role_error(self, guild : discord.Guild) -> None:
+        """Sends the role add/delete error in the logs channel of a server, if any.
+
+        Args:
+            guild (discord.Guild): The server in which the error occurred.
+        """
+        logs_channel_id : int | None = config_store.logs_channel_id(guild.id)
+        if logs_channel_id is None:
+            return
+        try:
+            logs_channel : discord.abc.MessageableChannel = guild.get_channel(logs_channel_id) or await guild.fetch_channel(logs_channel_id)
+        except (discord.NotFound, discord.Forbidden):
+            # The logs channel was deleted or hidden from the bot
+            return
+        lang : dict[str, any] = lang_registry.get(config_store.language(guild.id))
+        await outbound.send(logs_channel, Priority.BACKGROUND, content=lang["role_add_delete_error_log"])
+
+    async def resolve_reaction_member(self, payload : discord.RawReactionActionEvent) -> discord.Member:
+        """Gets the member of a reaction, from the gateway cache when possible.
+
+        Args:
+            payload (discord.RawReactionActionEvent): The reaction's payload.
+        """
+        guild : discord.Guild = self.bot.get_guild(payload.guild_id) or await self.bot.fetch_guild(payload.guild_id)
+        member : discord.Member = payload.member or guild.get_member(payload.user_id) or await guild.fetch_member(payload.user_id)
+        return member
+
+    @commands.Cog.listener()
+    @metrics.track()
+    async def on_raw_reaction_add(self, payload : discord.RawReactionActionEvent) -> None:
+        if payload.guild_id is None:
+            # Reaction in a DM, no role react there
+            return
+        role_id : int = utils.server_management.get_associated_role_for_emoji(payload.guild_id, payload.message_id, payload.emoji)
+        if role_id is None or payload.user_id == self.bot.user.id:
+            return
+        
+        member : discord.Member = await self.resolve_reaction_member(payload)
+        self.role_queue.enqueue(member, role_id, add=True)
+            
+    @commands.Cog.listener()
+    @metrics.track()
+    async def on_raw_reaction_remove(self, payload : discord.RawReactionActionEvent) -> None:
+        if payload.guild_id is None:
+            # Reaction in a DM, no role react there
+            return
+        role_id : int = utils.server_management.get_associated_role_for_emoji(payload.guild_id, payload.message_id, payload.emoji)
+        if role_id is None or payload.user_id == self.bot.user.id:
+            return
+        
+        member : discord.Member = await self.resolve_reaction_member(payload)
+        self.role_queue.enqueue(member, role_id, add=False)
+
+    @discord.slash_command(name = "add_role_react", description = "Adds a role react to a message.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="emoji", description="The emoji to be used as a role react.")
+    @discord.option(name="role", description="The role to be assigned when the emoji is clicked.")
+    @discord.option(name="message_id", description="The id of the message to which the role react will be added.")
+    @discord.option(name="channel", description="The channel in which the message is located, actual if not specified.", required=False)
+    async def add_role_react(self, ctx : discord.ApplicationContext, emoji: str, role: discord.Role, message_id : str, channel: discord.TextChannel = None):
+        """
+        Adds a role react to a message.
+
+        Args:
+            emoji (str): The emoji to be used as a role react.
+            role (discord.Role): The role to be assigned when the emoji is clicked.
+            message_id (str): The id of the message to which the role react will be added.
+            channel (discord.TextChannel, optional): The channel in which the message is located. If not specified, the actual channel will be used. 
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if str(message_id) in config["role_react"].keys() and emoji in config["role_react"][str(message_id)].keys():
+            await ctx.respond(lang["emoji_already_used"])
+            return
+            
+        config["role_react"].setdefault(str(message_id), {})[emoji] = str(role.id)
+        config_store.save(ctx.guild.id)
+        role_react_index.add(ctx.guild.id, int(message_id), emoji, role.id)
+            
+        if channel is None:
+            channel : discord.abc.MessageableChannel = ctx.channel
+        
+        message : discord.PartialMessage = await channel.fetch_message(message_id)
+        await message.add_reaction(emoji)
+        await ctx.respond(lang["role_react_added"])
+     
+    @discord.slash_command(name = "remove_role_react", description = "Deletes a role react from a message.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="emoji", description="The emoji to be removed.")
+    @discord.option(name="message_id", description="The id of the message from which the role react will be removed.")
+    @discord.option(name="channel", description="The channel in which the message is located, actual if not specified.", required=False)
+    async def remove_role_react(self, ctx : discord.ApplicationContext, emoji: str, message_id : str, channel : discord.TextChannel = None):
+        """
+        Removes a role react from a message.
+        
+        Args:
+            emoji (str): The emoji to be removed.
+            message_id (str): The id of the message from which the role react will be removed.
+            channel (discord.TextChannel, optional): The channel in which the message is located. If not specified, the actual channel will be used.
+        """ 
+        config = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if not emoji in config["role_react"].get(str(message_id), {}).keys():
+            await ctx.respond(lang["emoji_not_used"])
+            return
+        
+        config["role_react"][str(message_id)].pop(emoji)
+        if len(config["role_react"][str(message_id)].keys()) == 0:
+            config["role_react"].pop(str(message_id))
+        config_store.save(ctx.guild.id)
+        role_react_index.remove(ctx.guild.id, int(message_id), emoji)
+            
+        if channel is None:
+            channel : discord.abc.MessageableChannel = ctx.channel
+        
+        message : discord.PartialMessage = await channel.fetch_message(message_id)
+        await message.remove_reaction(emoji, self.bot.user)
+        await ctx.respond(lang["role_react_removed"])
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(RoleReact(bot))
@@ -0,0 +1,128 @@
+import discord
+from discord.ext import commands
+
+from utils.config_store import config_store
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.temp_voice_registry import temp_voice_registry
+from utils.voice_pool import voice_pool
+
+
+class JoinToCreate(commands.Cog):
+    """Private voice channels created when a member joins a hub, and deleted once empty."""
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+        self.reconciled_shards : set[int] = set()
+
+    @commands.Cog.listener()
+    @metrics.track()
+    async def on_shard_loaded(self, shard_id : int) -> None:
+        # Channels are only left over by a restart, not by a reconnection of the shard
+        reconcile : bool = shard_id not in self.reconciled_shards
+        self.reconciled_shards.add(shard_id)
+        for guild in self.bot.guilds:
+            if guild.shard_id == shard_id and config_store.has(guild.id):
+                if reconcile:
+                    await temp_voice_registry.reconcile(guild, keep=voice_pool.spare_ids())
+                for hub_id in config_store.get(guild.id)["join_to_create_channel_system"].get("warm_pool_sizes", {}):
+                    hub : discord.abc.GuildChannel | None = guild.get_channel(int(hub_id))
+                    if isinstance(hub, discord.VoiceChannel):
+                        voice_pool.refill(hub)
+
+    @commands.Cog.listener()
+    @metrics.track()
+    async def on_voice_state_update(self, member : discord.Member, before : discord.VoiceState, after : discord.VoiceState) -> None:
+        if before.channel and len(before.channel.members) == 0 and temp_voice_registry.contains(member.guild.id, before.channel.id):
+            await before.channel.delete()
+            temp_voice_registry.remove(member.guild.id, before.channel.id)
+        
+        if after.channel and temp_voice_registry.is_hub(member.guild.id, after.channel.id):
+            config : dict[str, any] = config_store.get(member.guild.id)
+            name : str = config['join_to_create_channel_system']['channel_name_template'].format_map({"member": member.name})
+            member_overwrite : discord.PermissionOverwrite = discord.PermissionOverwrite(connect=True, mute_members=True, deafen_members=True, move_members=True, manage_channels=True, manage_permissions=True)
+            
+            private_channel : discord.VoiceChannel | None = await voice_pool.take(member, after.channel, name, member_overwrite)
+            if private_channel is None:
+                overwrites : dict = dict(after.channel.category.overwrites) if after.channel.category else {}
+                overwrites[member] = member_overwrite
+                private_channel = await member.guild.create_voice_channel(name=name, category=after.channel.category, overwrites=overwrites)
+                temp_voice_registry.add(member.guild.id, private_channel.id)
+            await member.move_to(private_channel)
+
+    @discord.slash_command(name = "add_join_to_create_channel", description = "Adds a private voice channel creator.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="channel", description="The voice channel to be set as a private voice channel creator.")
+    async def add_join_to_create_channel(self, ctx : discord.ApplicationContext, channel : discord.VoiceChannel):
+        """
+        Adds a private voice channel creator.
+
+        Args:
+            channel (discord.VoiceChannel): The voice channel to be set as a private voice channel creator.
+        """
+        config : dict[str, any] = config_store.get(channel.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if temp_voice_registry.is_hub(channel.guild.id, channel.id):
+            await ctx.respond(lang["is_already_join_to_create_channel"])
+            return
+        
+        config["join_to_create_channel_system"]["join_to_create_channels_id"].append(str(channel.id))
+        config_store.save(channel.guild.id)
+        temp_voice_registry.load_hubs(channel.guild.id)
+        await ctx.respond(lang["join_to_create_channel_added"])
+        
+    @discord.slash_command(name = "remove_join_to_create_channel", description = "Deletes a private voice channel creator.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="channel", description="The voice channel to be removed from the private voice channel creators.")
+    async def remove_join_to_create_channel(self, ctx : discord.ApplicationContext, channel : discord.VoiceChannel):
+        """
+        Removes a private voice channel creator.
+        
+        Args:
+            channel (discord.VoiceChannel): The voice channel to be removed from the private voice channel creators.
+        """
+        config : dict[str, any] = config_store.get(channel.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if not temp_voice_registry.is_hub(channel.guild.id, channel.id):
+            await ctx.respond(lang["is_not_join_to_create_channel"])
+            return
+        
+        config["join_to_create_channel_system"]["join_to_create_channels_id"].remove(str(channel.id))
+        config["join_to_create_channel_system"].get("warm_pool_sizes", {}).pop(str(channel.id), None)
+        config_store.save(channel.guild.id)
+        temp_voice_registry.load_hubs(channel.guild.id)
+        await voice_pool.drain(channel.guild, channel.id)
+        await ctx.respond(lang["join_to_create_channel_removed"])
+
+    @discord.slash_command(name = "set_join_to_create_pool", description = "Defines how many channels are kept ready for a private voice channel creator.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="channel", description="The private voice channel creator.")
+    @discord.option(name="size", description="The number of hidden spare channels to keep ready, 0 to disable.", min_value=0, max_value=10)
+    async def set_join_to_create_pool(self, ctx : discord.ApplicationContext, channel : discord.VoiceChannel, size : int):
+        """
+        Defines the warm pool size of a private voice channel creator, and shows its hits and misses.
+
+        Args:
+            channel (discord.VoiceChannel): The private voice channel creator.
+            size (int): The number of hidden spare channels to keep ready, 0 to disable.
+        """
+        config : dict[str, any] = config_store.get(channel.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        
+        if not temp_voice_registry.is_hub(channel.guild.id, channel.id):
+            await ctx.respond(lang["is_not_join_to_create_channel"])
+            return
+        
+        config["join_to_create_channel_system"].setdefault("warm_pool_sizes", {})[str(channel.id)] = size
+        config_store.save(channel.guild.id)
+        if size > 0:
+            voice_pool.refill(channel)
+        else:
+            await voice_pool.drain(channel.guild, channel.id)
+        await ctx.respond(lang["join_to_create_pool_defined"].format_map({"size": size, **voice_pool.stats(channel.id)}))
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(JoinToCreate(bot))
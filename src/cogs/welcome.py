@@ -0,0 +1,121 @@
+import discord
+from discord.ext import commands
+
+import utils.image_utils
+import utils.settings
+from utils.avatar_cache import avatar_cache
+from utils.config_store import config_store
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.outbound import outbound, Priority
+from utils.render_pool import render_pool
+from utils.storage import get_storage
+from utils.welcome_pipeline import WelcomePipeline
+
+
+class Welcome(commands.Cog):
+    """Welcome cards of the members joining, and their settings."""
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+        self.welcome_pipeline : WelcomePipeline = WelcomePipeline(self.send_welcome_card, self.send_group_welcome_card)
+        metrics.register("welcome_pipeline", self.welcome_pipeline.stats)
+        metrics.register("avatar_cache", avatar_cache.stats)
+        metrics.register("render_pool", render_pool.stats)
+
+    @metrics.track()
+    async def send_welcome_card(self, member : discord.Member) -> None:
+        """Sends the welcome card of a member in the system channel of its server, if it has one.
+
+        Args:
+            member (discord.Member): The member who joined.
+        """
+        if member.guild.system_channel is None:
+            return
+        config : dict[str, any] = config_store.get(member.guild.id)
+        background_image_path : str = (config["welcome_system"]["background_image"] and get_storage().welcome_background_path(member.guild.id)) or "data/assets/new_member_background.jpg"
+          
+        welcome_card = await utils.image_utils.generate_welcome_card(member, background_image_path) 
+        
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        await outbound.send(member.guild.system_channel, Priority.WELCOME, file=discord.File(fp=welcome_card, filename="welcome_card.png"), content=f"{lang['welcome_message']}".format_map({"member": member.mention, "server": member.guild.name}))
+
+    @metrics.track()
+    async def send_group_welcome_card(self, guild : discord.Guild, members : list[discord.Member]) -> None:
+        """Sends one welcome card for several members in the system channel of their server, if it has one.
+
+        Args:
+            guild (discord.Guild): The server the members joined.
+            members (list[discord.Member]): The members who joined.
+        """
+        if guild.system_channel is None:
+            return
+        config : dict[str, any] = config_store.get(guild.id)
+        background_image_path : str = (config["welcome_system"]["background_image"] and get_storage().welcome_background_path(guild.id)) or "data/assets/new_member_background.jpg"
+
+        welcome_card = await utils.image_utils.generate_group_welcome_card(members, background_image_path)
+
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        mentions : str = ", ".join(member.mention for member in members[:utils.settings.GROUP_CARD_MAX_AVATARS])
+        if len(members) > utils.settings.GROUP_CARD_MAX_AVATARS:
+            mentions += f" +{len(members) - utils.settings.GROUP_CARD_MAX_AVATARS}"
+        await outbound.send(guild.system_channel, Priority.WELCOME, file=discord.File(fp=welcome_card, filename="welcome_card.png"), content=f"{lang['welcome_message']}".format_map({"member": mentions, "server": guild.name}))
+
+    @commands.Cog.listener()
+    @metrics.track()
+    async def on_member_join(self, member : discord.Member) -> None:
+        if not config_store.welcome_system(member.guild.id)["active"]:
+            return
+        
+        await self.welcome_pipeline.handle_join(member)
+
+    @discord.slash_command(name = "switch_welcome_system", description = "Enables/disables the welcome system.")
+    @commands.has_permissions(administrator=True)
+    async def switch_welcome_system(self, ctx : discord.ApplicationContext):
+        """
+        Enables/disables the welcome system.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        config["welcome_system"]["active"] = not config["welcome_system"]["active"]
+        config_store.save(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        await ctx.respond(lang["welcome_system_switched"])
+        
+    @discord.slash_command(name = "set_welcome_background", description = "Defines the background image for the welcome card.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="background_image", description="The image to be set as the welcome card background.")
+    async def set_welcome_background(self, ctx : discord.ApplicationContext, background_image : discord.Attachment):
+        """
+        Sets the background image for the welcome card.
+
+        Args:
+            background_image (discord.Attachment): The image to be set as the welcome card background.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        get_storage().save_welcome_background(ctx.guild.id, await background_image.read())
+        config["welcome_system"]["background_image"] = get_storage().welcome_background_path(ctx.guild.id)
+        config_store.save(ctx.guild.id)
+        utils.image_utils.invalidate_card_template(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        await ctx.respond(lang["welcome_background_image_defined"])
+        
+    @discord.slash_command(name = "set_welcome_message_template", description = "Defines the message to be set as the welcome message.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="message_template", description="The message to be set as the welcome message.")
+    async def set_welcome_message_template(self, ctx : discord.ApplicationContext, message_template : str):
+        """
+        Sets the welcome message template.
+
+        Args:
+            message_template (str): The message to be set as the welcome message.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        config["welcome_system"]["welcome_message_template"] = message_template
+        config_store.save(ctx.guild.id)
+        utils.image_utils.invalidate_card_template(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        await ctx.respond(lang["welcome_message_defined"])
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(Welcome(bot))
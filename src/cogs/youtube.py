@@ -0,0 +1,257 @@
+import asyncio
+from typing import TYPE_CHECKING
+import aiohttp
+import discord
+from discord.ext import commands, tasks
+
+import utils.settings
+import utils.tokens_and_keys
+import utils.youtube_watch
+from utils.config_store import config_store
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.outbound import outbound, Priority
+from utils.subscription_index import subscription_index
+
+if TYPE_CHECKING:
+    import feedparser
+    from utils.cluster import ClusterCoordinator
+    from utils.websub import WebSubReceiver
+
+
+class Youtube(commands.Cog):
+    """Announcements of the new videos of the watched youtube channels.
+
+    The feeds are polled by the feed scheduler, pushed through WebSub if enabled,
+    or relayed by the cluster's leader in cluster mode.
+    """
+
+    def __init__(self, bot : discord.Bot):
+        self.bot : discord.Bot = bot
+        self.feed_scheduler : utils.youtube_watch.FeedScheduler = utils.youtube_watch.FeedScheduler()
+        self.channel_names : utils.youtube_watch.ChannelNameCache = utils.youtube_watch.ChannelNameCache()
+        self.announcements_lock : asyncio.Lock = asyncio.Lock()
+        metrics.register("feed_scheduler", self.feed_scheduler.stats)
+        metrics.register("channel_names", lambda: {"api_requests": self.channel_names.api_requests})
+
+        # WebSub and the cluster's coordination are only imported when enabled
+        self.websub_receiver : "WebSubReceiver | None" = None
+        if utils.settings.WEBSUB_ENABLED and not utils.tokens_and_keys.WEBSUB_SECRET:
+            print("WebSub is disabled: WEBSUB_SECRET is empty, so the pushed notifications couldn't be authenticated. The youtube channels are polled instead.")
+        elif utils.settings.WEBSUB_ENABLED:
+            from utils import websub
+            self.websub_receiver = websub.WebSubReceiver(self.check_new_videos, secret=utils.tokens_and_keys.WEBSUB_SECRET)
+            metrics.register("websub", self.websub_receiver.stats)
+
+        self.coordinator : "ClusterCoordinator | None" = None
+        if utils.settings.CLUSTER_WORKER_ID is not None:
+            from utils import cluster
+            self.coordinator = cluster.ClusterCoordinator(utils.settings.CLUSTER_WORKER_ID)
+            metrics.register("cluster", self.coordinator.stats)
+            self.channel_names.lock = lambda: self.coordinator.alocked("youtube_channels")
+            # The workers share the storage, which has a single writer
+            config_store.lock = lambda: self.coordinator.alocked("storage")
+        # Youtube channels watched by every worker, polled by the leader
+        self.cluster_watched : set[str] = set()
+
+    def cog_unload(self) -> None:
+        self.feed_scheduler.stop()
+        self.sync_websub_subscriptions.cancel()
+        self.cluster_tick.cancel()
+        if self.coordinator is not None:
+            self.coordinator.leave()
+
+    @commands.Cog.listener()
+    @metrics.track("youtube_on_ready")
+    async def on_ready(self) -> None:
+        if self.websub_receiver is not None and not self.sync_websub_subscriptions.is_running():
+            await self.websub_receiver.start()
+            self.sync_websub_subscriptions.start()
+        if self.coordinator is None:
+            self.feed_scheduler.start(self.polled_ytb_channels, self.check_new_videos)
+        elif not self.cluster_tick.is_running():
+            await asyncio.to_thread(self.coordinator.register, self.bot.shard_count, self.bot.shard_ids)
+            self.cluster_tick.start()
+
+    def watched_ytb_channels(self) -> set[str]:
+        """
+        Gets the IDs of every youtube channel watched by a server.
+        """
+        return subscription_index.channels()
+
+    def polled_ytb_channels(self) -> set[str]:
+        """
+        Gets the IDs of the watched youtube channels not pushed through WebSub, which must be polled.
+        """
+        if self.websub_receiver is None:
+            return self.watched_ytb_channels()
+        return {ytb_channel_id for ytb_channel_id in self.watched_ytb_channels() if not self.websub_receiver.is_active(ytb_channel_id)}
+
+    @metrics.track()
+    async def check_new_videos(self, session : aiohttp.ClientSession, feeds : "dict[str, feedparser.FeedParserDict]") -> None:
+        """
+        Verifies if new videos have been uploaded on the youtube channels being watched.
+        Called by the feed scheduler with the feeds that changed since their last poll,
+        and by the WebSub receiver with the pushed feeds.
+        """
+        if self.websub_receiver is not None:
+            # So that the pushed edits of the videos polled before are recognized
+            self.websub_receiver.observe(feeds)
+        async with self.announcements_lock:
+            await self.announce_new_videos(session, feeds)
+
+    async def announce_new_videos(self, session : aiohttp.ClientSession, feeds : "dict[str, feedparser.FeedParserDict]") -> None:
+        """
+        Announces the latest video of each feed in the servers which haven't seen it yet.
+        """
+        for ytb_channel_id, feed in feeds.items():
+            if feed.entries and feed.entries[0].get("author"):
+                self.channel_names.remember(ytb_channel_id, feed.entries[0].author)
+
+        announcements : list[tuple[int, discord.TextChannel, str, str]] = []
+        for ytb_channel_id, feed in feeds.items():
+            video_id : str | None = utils.youtube_watch.latest_video_id(feed)
+            if video_id is None:
+                continue
+
+            for server_id, discord_channel_id, last_video_id in subscription_index.subscribers(ytb_channel_id):
+                if video_id == last_video_id or discord_channel_id is None:
+                    continue
+                guild : discord.Guild | None = self.bot.get_guild(server_id)
+                channel : discord.TextChannel | None = guild.get_channel(discord_channel_id) if guild is not None else None
+                if channel is not None:
+                    announcements.append((server_id, channel, ytb_channel_id, video_id))
+
+        if not announcements:
+            return
+        ytb_channel_names : dict[str, str | None] = await self.channel_names.resolve(session, {announcement[2] for announcement in announcements}, utils.tokens_and_keys.YOUTUBE_API_KEY)
+
+        # Queued all at once, the dispatcher spreads them over the channels' rate limits.
+        results : list[discord.Message | BaseException] = await asyncio.gather(*(
+            outbound.send(channel, Priority.BACKGROUND, content=config_store.get(server_id)["youtube_survey"]["new_video_message_template"].format_map({
+                "youtube_channel": ytb_channel_names.get(ytb_channel_id) or str(ytb_channel_id),
+                "youtube_video": f"https://www.youtube.com/watch?v={video_id}"
+            }))
+            for server_id, channel, ytb_channel_id, video_id in announcements
+        ), return_exceptions=True)
+
+        updated_servers : set[int] = set()
+        for (server_id, channel, ytb_channel_id, video_id), result in zip(announcements, results):
+            if isinstance(result, discord.HTTPException):
+                print(f"Failed to announce {video_id} on {channel.guild.name} ({server_id}): {result}")
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            # The server may have been removed, or stopped watching the channel, while the announcements were sent
+            if not config_store.has(server_id):
+                continue
+            watched_channels : dict[str, str | None] = config_store.get(server_id)["youtube_survey"]["youtube_channels_id"]
+            if str(ytb_channel_id) not in watched_channels:
+                continue
+            watched_channels[str(ytb_channel_id)] = video_id
+            updated_servers.add(server_id)
+
+        for server_id in updated_servers:
+            config_store.save(server_id)
+
+    @tasks.loop(minutes=10)
+    @metrics.track()
+    async def sync_websub_subscriptions(self):
+        """
+        Subscribes the watched youtube channels to the WebSub hub and renews the leases about to lapse.
+        """
+        await self.websub_receiver.sync(self.watched_ytb_channels())
+
+    @tasks.loop(seconds=utils.settings.CLUSTER_TICK)
+    @metrics.track()
+    async def cluster_tick(self):
+        """
+        Heartbeat of a cluster worker: shares the youtube channels its guilds watch,
+        polls them all if it leads the youtube survey, and announces the videos relayed by the leader.
+        """
+        # The database may be locked by another worker, it is never waited for on the event loop
+        await asyncio.to_thread(self.coordinator.heartbeat)
+        await asyncio.to_thread(self.coordinator.publish_watched, self.watched_ytb_channels())
+        if await asyncio.to_thread(self.coordinator.is_leader, "youtube_poller"):
+            self.cluster_watched = await asyncio.to_thread(self.coordinator.watched)
+            self.feed_scheduler.start(lambda: self.cluster_watched, self.relay_feeds)
+        else:
+            self.feed_scheduler.stop()
+
+        feeds : "dict[str, feedparser.FeedParserDict]" = await asyncio.to_thread(self.coordinator.consume_feeds)
+        if feeds:
+            async with aiohttp.ClientSession() as session:
+                await self.check_new_videos(session, feeds)
+
+    async def relay_feeds(self, _ : aiohttp.ClientSession, feeds : "dict[str, feedparser.FeedParserDict]") -> None:
+        """
+        Relays the feeds polled by the cluster's leader to every worker, itself included.
+        """
+        await asyncio.to_thread(self.coordinator.publish_feeds, feeds)
+
+    @discord.slash_command(name = "add_ytb", description = "Adds a youtube channel to be watched.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="ytb_channel_id", description="The id of the youtube channel to watched channels.")
+    @discord.option(name="dc_channel", description="The discord channel in which the new videos will be posted, actual if never specified.", required=False)
+    async def add_ytb(self, ctx : discord.ApplicationContext, ytb_channel_id : str, dc_channel : discord.TextChannel = None):
+        """
+        Adds a youtube channel to be watched
+
+        Args:
+            ytb_channel_id (str): The id of the youtube channel to be watched.
+            dc_channel (discord.TextChannel, optional): The discord channel in which the new videos will be posted. If not specified, the actual channel will be used.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+            
+        if dc_channel is not None:
+            config["youtube_survey"]["channel_id"] = str(dc_channel.id)
+            config_store.save(ctx.guild.id)
+        else:
+            dc_channel : discord.TextChannel = await ctx.guild.fetch_channel(int(config["youtube_survey"]["channel_id"])) if config["youtube_survey"]["channel_id"] else ctx.channel
+            if not config["youtube_survey"]["channel_id"]:
+                config["youtube_survey"]["channel_id"] = str(dc_channel.id)
+                config_store.save(ctx.guild.id)
+        
+        if ytb_channel_id in config["youtube_survey"]["youtube_channels_id"].keys():
+            await ctx.respond(lang["youtube_channel_already_watched"])
+            return
+        
+        config["youtube_survey"]["youtube_channels_id"][str(ytb_channel_id)] = None
+        config_store.save(ctx.guild.id)
+        subscription_index.add(ctx.guild.id, str(ytb_channel_id))
+        
+        async with aiohttp.ClientSession() as session:
+            feed : "feedparser.FeedParserDict | None" = (await utils.youtube_watch.fetch_feeds(session, [ytb_channel_id]))[ytb_channel_id]
+            
+        if feed is None or feed.bozo:
+            await ctx.respond(lang["youtube_channel_fetch_error"])
+            return
+        
+        await ctx.respond(lang["youtube_channel_added"].format_map({"dc_channel_id": dc_channel.id}))
+        
+    @discord.slash_command(name = "remove_ytb", description = "Removes a youtube channel from the watched channels.")
+    @commands.has_permissions(administrator=True)
+    @discord.option(name="ytb_channel_id", description="The id of the youtube channel to be removed.")
+    async def remove_ytb(self, ctx : discord.ApplicationContext, ytb_channel_id : str):
+        """
+        Removes a youtube channel from the watched channels.
+
+        Args:
+            ytb_channel_id (str): The id of the youtube channel to be removed.
+        """
+        config : dict[str, any] = config_store.get(ctx.guild.id)
+        lang : dict[str, any] = lang_registry.get(config['language'])
+        
+        if not ytb_channel_id in config["youtube_survey"]["youtube_channels_id"].keys():
+            await ctx.respond(lang["youtube_channel_not_watched"])
+            return
+        
+        config["youtube_survey"]["youtube_channels_id"].pop(ytb_channel_id)
+        config_store.save(ctx.guild.id)
+        subscription_index.remove(ctx.guild.id, ytb_channel_id)
+        await ctx.respond(lang["youtube_channel_removed"])
+
+
+def setup(bot : discord.Bot) -> None:
+    bot.add_cog(Youtube(bot))
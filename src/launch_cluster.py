@@ -0,0 +1,96 @@
+"""Runs the bot as a cluster of worker processes, each owning a contiguous range of shards.
+
+Workers coordinate through a local SQLite database (CLUSTER_DB_PATH): the shards each
+runs, locks on the storage they share and the election of the single youtube poller.
+Crashed workers are restarted after CLUSTER_RESTART_DELAY seconds.
+
+Run from the repository's root, e.g. 16 shards over 4 processes:
+    python src/launch_cluster.py 4 16
+The shard count defaults to SHARD_COUNT, or one shard per worker.
+"""
+import multiprocessing
+import signal
+import sys
+import time
+
+from utils import settings
+
+
+def shard_ranges(shard_count : int, workers : int) -> list[list[int]]:
+    """Splits the shards in contiguous ranges, as even as possible."""
+    size, remainder = divmod(shard_count, workers)
+    ranges : list[list[int]] = []
+    start : int = 0
+    for worker_id in range(workers):
+        end : int = start + size + (1 if worker_id < remainder else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def run_worker(worker_id : int, shard_ids : list[int], shard_count : int) -> None:
+    """Entry point of a worker process: runs the bot on its shards only."""
+    settings.CLUSTER_WORKER_ID = worker_id
+    settings.SHARD_COUNT = shard_count
+    settings.SHARD_IDS = shard_ids
+    settings.METRICS_PORT += worker_id
+    settings.LOOP_REPORT_PATH = settings.LOOP_REPORT_PATH.replace(".json", f"-{worker_id}.json")
+    # Every worker would bind the same port, and the leader already polls every channel.
+    settings.WEBSUB_ENABLED = False
+    # Identifications are spread so the shards of all workers don't identify at once.
+    time.sleep(shard_ids[0] * settings.CLUSTER_IDENTIFY_INTERVAL if shard_ids else 0)
+
+    import main
+    main.run()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or not all(argument.isdigit() for argument in sys.argv[1:]):
+        print("Usage: python src/launch_cluster.py <workers> [shard count]")
+        sys.exit(1)
+    workers_count : int = int(sys.argv[1])
+    shard_count : int = int(sys.argv[2]) if len(sys.argv) == 3 else settings.SHARD_COUNT or workers_count
+    if shard_count < workers_count:
+        print(f"Can't run {shard_count} shards over {workers_count} workers.")
+        sys.exit(1)
+    if settings.WEBSUB_ENABLED:
+        print("WebSub is disabled in cluster mode, the youtube channels are polled by the leader.")
+
+    context = multiprocessing.get_context("spawn")
+    ranges : list[list[int]] = shard_ranges(shard_count, workers_count)
+    processes : dict[int, multiprocessing.Process] = {}
+    stopping : bool = False
+
+    def start(worker_id : int) -> None:
+        process : multiprocessing.Process = context.Process(target=run_worker, args=(worker_id, ranges[worker_id], shard_count), name=f"worker-{worker_id}")
+        process.start()
+        processes[worker_id] = process
+        print(f"Worker {worker_id} (pid {process.pid}) runs shards {ranges[worker_id][0]}-{ranges[worker_id][-1]} of {shard_count}")
+
+    def stop(*_) -> None:
+        global stopping
+        stopping = True
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for worker_id in range(workers_count):
+        start(worker_id)
+
+    died_at : dict[int, float] = {}
+    while not stopping:
+        time.sleep(1)
+        for worker_id, process in list(processes.items()):
+            if stopping or process.is_alive():
+                continue
+            if worker_id not in died_at:
+                died_at[worker_id] = time.monotonic()
+                print(f"Worker {worker_id} exited with code {process.exitcode}, restarting it in {settings.CLUSTER_RESTART_DELAY} s")
+            elif time.monotonic() - died_at[worker_id] >= settings.CLUSTER_RESTART_DELAY:
+                del died_at[worker_id]
+                start(worker_id)
+
+    for process in processes.values():
+        process.join()
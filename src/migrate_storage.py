@@ -0,0 +1,19 @@
+"""One-shot migration of every server from a storage backend to another.
+
+Run from the repository's root, e.g. from the data/servers tree to SQLite:
+    python src/migrate_storage.py json sqlite
+then set STORAGE_BACKEND = "sqlite" in src/utils/settings.py.
+"""
+import sys
+
+from utils.storage import create_backend, migrate, StorageBackend
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] == sys.argv[2]:
+        print("Usage: python src/migrate_storage.py <json|sqlite> <json|sqlite>")
+        sys.exit(1)
+    source : StorageBackend = create_backend(sys.argv[1])
+    destination : StorageBackend = create_backend(sys.argv[2])
+    print(f"Migrated {migrate(source, destination)} servers from {sys.argv[1]} to {sys.argv[2]}.")
+    source.close()
+    destination.close()
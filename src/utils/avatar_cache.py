@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+
+import discord
+
+from utils import settings
+
+CDN_SIZES : tuple[int, ...] = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+def cdn_size_for(pixels : int) -> int:
+    """Gets the smallest size served by Discord's CDN covering a rendered size.
+
+    Args:
+        pixels (int): Rendered size, in pixels.
+    """
+    return next((size for size in CDN_SIZES if size >= pixels), CDN_SIZES[-1])
+
+
+class AvatarCache:
+    """LRU cache of downloaded avatars, bounded in bytes and with a TTL.
+
+    Avatars are keyed by their hash, so a member changing their avatar
+    naturally misses the cache.
+    """
+
+    def __init__(self, max_bytes : int = settings.AVATAR_CACHE_MAX_BYTES, ttl : float = settings.AVATAR_CACHE_TTL):
+        self.max_bytes : int = max_bytes
+        self.ttl : float = ttl
+        self.size : int = 0
+        self.hits : int = 0
+        self.misses : int = 0
+        self._avatars : OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    def get(self, key : str) -> bytes | None:
+        entry : tuple[bytes, float] | None = self._avatars.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._avatars.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key : str, data : bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        if key in self._avatars:
+            self._remove(key)
+        self._avatars[key] = (data, time.monotonic() + self.ttl)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._avatars)))
+
+    def _remove(self, key : str) -> None:
+        data, _ = self._avatars.pop(key)
+        self.size -= len(data)
+
+    async def fetch(self, member : discord.Member, pixels : int) -> bytes:
+        """Gets the avatar of a member, downloading it at the smallest size covering the rendered one.
+
+        Members without a custom avatar get their default one.
+
+        Args:
+            member (discord.Member): The member.
+            pixels (int): Rendered size of the avatar, in pixels.
+
+        Returns:
+            bytes: The PNG encoded avatar.
+        """
+        size : int = cdn_size_for(pixels)
+        avatar : discord.Asset = member.display_avatar
+        key : str = f"{avatar.key}:{size}"
+        data : bytes | None = self.get(key)
+        if data is None:
+            data = await avatar.with_format('png').with_size(size).read()
+            self.put(key, data)
+        return data
+
+    def stats(self) -> dict[str, int]:
+        """Gets the cache's hits, misses and size."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._avatars), "bytes": self.size}
+
+
+avatar_cache : AvatarCache = AvatarCache()
@@ -0,0 +1,221 @@
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+
+import feedparser
+
+from utils import settings
+from utils.sharding import ShardMap
+
+
+class ClusterCoordinator:
+    """Coordinates the worker processes of a cluster through a local SQLite database.
+
+    Each worker registers its shard range and heartbeats, so any worker can
+    tell which live one owns a guild. Named locks with a lease serve both to lock
+    the storage shared by the workers and to elect the single youtube poller:
+    the leader polls the feeds watched by every worker and relays them through
+    the database, each worker announcing them in its own guilds.
+
+    Every method blocks on the database, which may be locked by another
+    worker: from the event loop, call them with asyncio.to_thread().
+    """
+
+    def __init__(self, worker_id : int, path : str = settings.CLUSTER_DB_PATH, lease : float = settings.CLUSTER_LEASE_SECONDS):
+        self.worker_id : int = worker_id
+        self.lease : float = lease
+        self._connection : sqlite3.Connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # The connection is shared by the threads of asyncio.to_thread()
+        self._lock : threading.Lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id INTEGER PRIMARY KEY, pid INTEGER, shard_count INTEGER, shard_ids TEXT, heartbeat REAL
+            );
+            CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner INTEGER, expires REAL);
+            CREATE TABLE IF NOT EXISTS watched_channels (
+                worker_id INTEGER, ytb_channel_id TEXT, PRIMARY KEY (worker_id, ytb_channel_id)
+            );
+            CREATE TABLE IF NOT EXISTS feed_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, ytb_channel_id TEXT, link TEXT, author TEXT, published REAL
+            );
+        """)
+        # Only the feeds relayed from now on are for this worker.
+        self.last_feed_event : int = self._connection.execute("SELECT COALESCE(MAX(seq), 0) FROM feed_events").fetchone()[0]
+        self.feeds_published : int = 0
+        self.feeds_consumed : int = 0
+        self.leader_changes : int = 0
+        self._leader : bool = False
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _execute(self, query : str, parameters : tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def register(self, shard_count : int, shard_ids : list[int]) -> None:
+        """Announces the shards run by this worker."""
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, pid, shard_count, shard_ids, heartbeat) VALUES (?, ?, ?, ?, ?)",
+                (self.worker_id, os.getpid(), shard_count, json.dumps(shard_ids), time.time())
+            )
+
+    def heartbeat(self) -> None:
+        self._execute("UPDATE workers SET heartbeat = ? WHERE worker_id = ?", (time.time(), self.worker_id))
+
+    def workers(self) -> dict[int, tuple[int, list[int]]]:
+        """Gets the shard count and shards of every live worker."""
+        rows : list[tuple[int, int, str]] = self._execute(
+            "SELECT worker_id, shard_count, shard_ids FROM workers WHERE heartbeat >= ?", (time.time() - self.lease,)
+        )
+        return {worker_id: (shard_count, json.loads(shard_ids)) for worker_id, shard_count, shard_ids in rows}
+
+    def route(self, guild_id : int) -> int | None:
+        """Gets the live worker owning a guild, None if its shard isn't run by any."""
+        for worker_id, (shard_count, shard_ids) in self.workers().items():
+            if ShardMap(shard_count).shard_of(guild_id) in shard_ids:
+                return worker_id
+        return None
+
+    def acquire(self, name : str) -> bool:
+        """Takes or renews a named lock for a lease, unless another live worker holds it.
+
+        Args:
+            name (str): Lock's name.
+
+        Returns:
+            bool: Whether this worker holds the lock.
+        """
+        now : float = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO locks (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE locks.owner = excluded.owner OR locks.expires < ?",
+                (name, self.worker_id, now + self.lease, now)
+            )
+            owner : int = connection.execute("SELECT owner FROM locks WHERE name = ?", (name,)).fetchone()[0]
+        return owner == self.worker_id
+
+    def release(self, name : str) -> None:
+        self._execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, self.worker_id))
+
+    @contextlib.contextmanager
+    def locked(self, name : str, timeout : float = settings.CLUSTER_LOCK_TIMEOUT) -> Iterator[None]:
+        """Holds a named lock, e.g. around a write to a file shared by the workers. Blocks while waiting, see alocked().
+
+        Raises:
+            TimeoutError: The lock couldn't be taken within the timeout.
+        """
+        deadline : float = time.monotonic() + timeout
+        while not self.acquire(name):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Cluster lock {name} is held by another worker")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    @contextlib.asynccontextmanager
+    async def alocked(self, name : str, timeout : float = settings.CLUSTER_LOCK_TIMEOUT) -> AsyncIterator[None]:
+        """Holds a named lock from the event loop, which keeps running while the lock is awaited.
+
+        Raises:
+            TimeoutError: The lock couldn't be taken within the timeout.
+        """
+        deadline : float = time.monotonic() + timeout
+        while not await asyncio.to_thread(self.acquire, name):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Cluster lock {name} is held by another worker")
+            await asyncio.sleep(0.01)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(self.release, name)
+
+    def is_leader(self, role : str) -> bool:
+        """Checks whether this worker leads a role, taking the lead if it is vacant. Must be called within every lease."""
+        leader : bool = self.acquire(f"leader:{role}")
+        if leader != self._leader:
+            self._leader = leader
+            self.leader_changes += 1
+            print(f"Worker {self.worker_id} {'is now' if leader else 'is no longer'} the {role} leader")
+        return leader
+
+    def publish_watched(self, ytb_channel_ids : set[str]) -> None:
+        """Shares the youtube channels watched by this worker's guilds with the leader."""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM watched_channels WHERE worker_id = ?", (self.worker_id,))
+            connection.executemany(
+                "INSERT INTO watched_channels (worker_id, ytb_channel_id) VALUES (?, ?)",
+                ((self.worker_id, ytb_channel_id) for ytb_channel_id in ytb_channel_ids)
+            )
+
+    def watched(self) -> set[str]:
+        """Gets the youtube channels watched by the guilds of every live worker."""
+        rows : list[tuple[str]] = self._execute(
+            "SELECT DISTINCT ytb_channel_id FROM watched_channels JOIN workers USING (worker_id) WHERE heartbeat >= ?",
+            (time.time() - self.lease,)
+        )
+        return {row[0] for row in rows}
+
+    def publish_feeds(self, feeds : dict[str, feedparser.FeedParserDict]) -> None:
+        """Relays the latest entry of polled feeds to every worker."""
+        now : float = time.time()
+        rows : list[tuple[str, str, str, float]] = [
+            (ytb_channel_id, feed.entries[0].link, feed.entries[0].get("author", ""), now)
+            for ytb_channel_id, feed in feeds.items() if feed.entries
+        ]
+        with self._transaction() as connection:
+            connection.executemany("INSERT INTO feed_events (ytb_channel_id, link, author, published) VALUES (?, ?, ?, ?)", rows)
+            connection.execute("DELETE FROM feed_events WHERE published < ?", (now - settings.CLUSTER_FEED_RETENTION,))
+        self.feeds_published += len(rows)
+
+    def consume_feeds(self) -> dict[str, feedparser.FeedParserDict]:
+        """Gets the feeds relayed since the last call, shaped like the polled ones."""
+        rows : list[tuple[int, str, str, str]] = self._execute(
+            "SELECT seq, ytb_channel_id, link, author FROM feed_events WHERE seq > ? ORDER BY seq", (self.last_feed_event,)
+        )
+        feeds : dict[str, feedparser.FeedParserDict] = {}
+        for seq, ytb_channel_id, link, author in rows:
+            self.last_feed_event = seq
+            feeds[ytb_channel_id] = feedparser.FeedParserDict(
+                feed=feedparser.FeedParserDict(), entries=[feedparser.FeedParserDict(link=link, author=author)]
+            )
+        self.feeds_consumed += len(rows)
+        return feeds
+
+    def leave(self) -> None:
+        """Gives up this worker's locks and registration, e.g. on shutdown."""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM locks WHERE owner = ?", (self.worker_id,))
+            connection.execute("DELETE FROM watched_channels WHERE worker_id = ?", (self.worker_id,))
+            connection.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+        self._connection.close()
+
+    def stats(self) -> dict[str, int]:
+        """Gets the live workers, whether this worker leads the youtube polling and the feeds relayed."""
+        return {
+            "worker_id": self.worker_id,
+            "live_workers": len(self.workers()),
+            "youtube_leader": int(self._leader),
+            "leader_changes": self.leader_changes,
+            "feeds_published": self.feeds_published,
+            "feeds_consumed": self.feeds_consumed,
+        }
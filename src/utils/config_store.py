@@ -0,0 +1,260 @@
+import asyncio
+import contextlib
+import copy
+import json
+import time
+from collections.abc import Callable
+
+from utils import settings
+from utils.storage import StorageBackend, get_storage
+
+
+class ConfigStore:
+    """In-memory store of every server's config.
+
+    Each server's config is read from the storage backend once, then served
+    from memory. Mutations are done on the returned dict and persisted with save().
+    Saves are written behind: the server is marked dirty and every dirty
+    config is written once the debounce window is over, or by flush().
+
+    The write-behind runs in a thread so the event loop never waits on the
+    storage, e.g. on a SQLite database locked by another cluster worker.
+    The storage assumes a single writer: several processes sharing it hold
+    the lock meanwhile, a cluster worker sets it to the cluster's storage lock.
+    """
+
+    def __init__(self, backend : StorageBackend | None = None, template_path : str = settings.CONFIG_TEMPLATE_PATH, debounce : float = settings.CONFIG_WRITE_DEBOUNCE):
+        self._backend : StorageBackend | None = backend
+        self.template_path : str = template_path
+        self.debounce : float = debounce
+        self._configs : dict[int, dict[str, any]] = {}
+        self._server_ids : set[int] | None = None
+        self._dirty : set[int] = set()
+        # Taken by a write-behind running in a thread, dirty until written
+        self._in_flight : set[int] = set()
+        self._flush_handle : asyncio.TimerHandle | None = None
+        self._flush_task : asyncio.Task | None = None
+        # Held while writing behind, when the storage is shared by several processes.
+        self.lock : Callable[[], contextlib.AbstractAsyncContextManager] = contextlib.nullcontext
+        self.saves_requested : int = 0
+        self.writes : int = 0
+        self.write_errors : int = 0
+        self.last_flush_latency : float = 0.0
+        self.max_flush_latency : float = 0.0
+
+    @property
+    def backend(self) -> StorageBackend:
+        """Storage backend, the bot's one unless another was given."""
+        if self._backend is None:
+            self._backend = get_storage()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend : StorageBackend) -> None:
+        self._backend = backend
+
+    def get(self, server_id : int) -> dict[str, any]:
+        """Gets the config of a server, loading it from the storage on first access.
+
+        Args:
+            server_id (int): Server's ID.
+
+        Returns:
+            dict[str, any]: The server's config. Call save() after mutating it.
+        """
+        server_id = int(server_id)
+        config = self._configs.get(server_id)
+        if config is None:
+            config = self.backend.load_config(server_id)
+            self._configs[server_id] = config
+        return config
+
+    def save(self, server_id : int) -> None:
+        """Schedules the persistence of the in-memory config of a server.
+
+        Outside of an event loop, the config is written right away.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        self._dirty.add(int(server_id))
+        self.saves_requested += 1
+        try:
+            loop : asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.debounce, self._write_behind)
+
+    def flush(self) -> None:
+        """Writes every dirty config now, from the calling thread. Must be called before shutting down."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        start : float = time.perf_counter()
+        dirty : set[int] = self._dirty | self._in_flight
+        self._dirty.clear()
+        self._in_flight.clear()
+        self._dirty.update(self._write(self.backend, {server_id: self._configs[server_id] for server_id in dirty if server_id in self._configs}))
+        if dirty:
+            self._record_latency(start)
+        self._schedule_retry()
+
+    async def aflush(self) -> None:
+        """Writes every dirty config from a thread, holding the storage lock."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        backend : StorageBackend = self.backend
+        start : float = time.perf_counter()
+        # The configs are copied as the event loop keeps mutating them during the write
+        configs : dict[int, dict[str, any]] = {
+            server_id: copy.deepcopy(self._configs[server_id]) for server_id in self._dirty if server_id in self._configs
+        }
+        self._in_flight |= self._dirty
+        self._dirty.clear()
+        try:
+            async with self.lock():
+                failed : list[int] = await asyncio.to_thread(self._write, backend, configs)
+        except TimeoutError as error:
+            # The storage lock couldn't be taken, everything is written by the next flush
+            print(f"Couldn't write the configs of the servers {sorted(configs)}: {error!r}")
+            failed = list(self._in_flight)
+        self._dirty.update(failed)
+        self._in_flight.clear()
+        if configs:
+            self._record_latency(start)
+        self._schedule_retry()
+
+    def _write_behind(self) -> None:
+        self._flush_handle = None
+        # A write-behind still running reschedules itself once done
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self.aflush())
+
+    def _write(self, backend : StorageBackend, configs : dict[int, dict[str, any]]) -> list[int]:
+        """Writes configs to the storage, gets the servers whose write failed."""
+        failed : list[int] = []
+        for server_id, config in configs.items():
+            try:
+                backend.save_config(server_id, config)
+            except Exception as error:
+                # Stays dirty so that the next flush writes it, the other servers are still written
+                self.write_errors += 1
+                print(f"Couldn't write the config of the server {server_id}: {error!r}")
+                failed.append(server_id)
+                continue
+            self.writes += 1
+        return failed
+
+    def _record_latency(self, start : float) -> None:
+        self.last_flush_latency = time.perf_counter() - start
+        self.max_flush_latency = max(self.max_flush_latency, self.last_flush_latency)
+
+    def _schedule_retry(self) -> None:
+        # Writes what failed or was saved meanwhile after another debounce window
+        if self._dirty and self._flush_handle is None:
+            try:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.debounce, self._write_behind)
+            except RuntimeError:
+                pass
+
+    def stats(self) -> dict[str, float]:
+        """Gets the write-behind counters: saves requested, writes done, failed and saved, flush latencies in seconds."""
+        return {
+            "dirty": len(self._dirty | self._in_flight),
+            "saves_requested": self.saves_requested,
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+            "writes_saved": self.saves_requested - self.writes - len(self._dirty | self._in_flight),
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+        }
+
+    def replace(self, server_id : int, config : dict[str, any]) -> None:
+        """Replaces the whole config of a server and persists it.
+
+        Args:
+            server_id (int): Server's ID.
+            config (dict[str, any]): The new config.
+        """
+        self._configs[int(server_id)] = config
+        self.save(server_id)
+
+    def dumps(self, server_id : int) -> bytes:
+        """Serializes the config of a server, as exported to users.
+
+        Args:
+            server_id (int): Server's ID.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON config.
+        """
+        return json.dumps(self.get(server_id), indent=4).encode('utf-8')
+
+    def has(self, server_id : int) -> bool:
+        """Checks whether a server has a config.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        return int(server_id) in self._known_server_ids()
+
+    def create(self, server_id : int) -> None:
+        """Creates the default config of a server.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        with open(self.template_path, 'r', encoding='utf-8') as file:
+            config : dict[str, any] = json.load(file)
+        self.backend.create_server(int(server_id), config)
+        self._configs[int(server_id)] = config
+        self._known_server_ids().add(int(server_id))
+
+    def delete(self, server_id : int) -> None:
+        """Deletes everything stored about a server and forgets its config.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        self._configs.pop(int(server_id), None)
+        self._dirty.discard(int(server_id))
+        self._in_flight.discard(int(server_id))
+        self._known_server_ids().discard(int(server_id))
+        self.backend.delete_server(int(server_id))
+
+    def _known_server_ids(self) -> set[int]:
+        if self._server_ids is None:
+            self._server_ids = set(self.backend.server_ids())
+        return self._server_ids
+
+    def server_ids(self) -> list[int]:
+        """Lists the IDs of every known server.
+
+        Returns:
+            list[int]: Servers' IDs.
+        """
+        return list(self._known_server_ids())
+
+    def load_all(self) -> None:
+        """Loads the config of every known server into memory."""
+        for server_id in self.server_ids():
+            self.get(server_id)
+
+    def language(self, server_id : int) -> str:
+        """Gets the language prefix of a server."""
+        return self.get(server_id)["language"]
+
+    def logs_channel_id(self, server_id : int) -> int | None:
+        """Gets the logs channel's ID of a server, None if not defined."""
+        logs_channel_id = self.get(server_id)["logs_channel_id"]
+        return int(logs_channel_id) if logs_channel_id else None
+
+    def welcome_system(self, server_id : int) -> dict[str, any]:
+        """Gets the welcome system's section of a server's config."""
+        return self.get(server_id)["welcome_system"]
+
+
+config_store : ConfigStore = ConfigStore()
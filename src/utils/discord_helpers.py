@@ -1,47 +1,85 @@
-import json
+import asyncio
 import discord
 
-class HelpModal(discord.ui.Modal):    
-    async def callback(self, interaction):
-        pass
+from utils.config_store import config_store
+from utils.help_tickets import help_ticket_index
+from utils.lang_registry import lang_registry
+from utils.metrics import metrics
+from utils.outbound import outbound, Priority
+
+class HelpModal(discord.ui.Modal):
+    async def callback(self, interaction : discord.Interaction):
+        await open_help_ticket(interaction, self.children[0].value)
+
+
+@metrics.track()
+async def open_help_ticket(interaction : discord.Interaction, help_reason : str) -> None:
+    """Opens the help ticket of the member who submitted the help modal, or gives back the one already open.
+
+    The interaction is deferred first, as creating the channel may outlast Discord's three
+    seconds to answer. The channel is created with the help role in its overwrites and its
+    member in its topic, then the reply and the ticket's single message are sent at once.
+
+    Args:
+        interaction (discord.Interaction): The modal's submission.
+        help_reason (str): Reason of the ticket given by the member.
+    """
+    await interaction.response.defer(ephemeral=True)
+    guild : discord.Guild = interaction.guild
+    config : dict[str, any] = config_store.get(guild.id)
+    lang : dict[str, any] = lang_registry.get(config["language"])
+    help_category_id : str | None = config["help_system"]["help_category_id"]
+    help_role_id : str | None = config["help_system"]["channels_id"].get(str(interaction.channel_id))
+    help_role : discord.Role | None = guild.get_role(int(help_role_id)) if help_role_id else None
+
+    async def create() -> discord.TextChannel:
+        category : discord.abc.GuildChannel | None = guild.get_channel(int(help_category_id)) if help_category_id else None
+        overwrites : dict = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True),
+            interaction.user: discord.PermissionOverwrite(read_messages=True)
+        }
+        if help_role is not None:
+            overwrites[help_role] = discord.PermissionOverwrite(read_messages=True)
+        return await guild.create_text_channel(
+            name=config["help_system"]['help_channel_name_template'].format_map({"member": interaction.user.name}),
+            category=category if isinstance(category, discord.CategoryChannel) else None,
+            overwrites=overwrites,
+            topic=lang["help_ticket_topic"].format_map({"member": interaction.user.mention})
+        )
+
+    channel, created = await help_ticket_index.open(guild, interaction.user, create)
+    if not created:
+        await interaction.followup.send(lang["help_ticket_already_open"].format_map({"channel": channel.mention}), ephemeral=True)
+        return
+
+    message : str = lang["help_ticket_message"].format_map({"member": interaction.user.mention, "help_reason": help_reason})
+    await asyncio.gather(
+        interaction.followup.send(lang["help_ticket_opened"].format_map({"channel": channel.mention}), ephemeral=True),
+        outbound.send(channel, Priority.INTERACTIVE, content=f"{help_role.mention}\n{message}" if help_role is not None else message)
+    )
 
 
 async def help_button_callback(self, interaction : discord.Interaction):
-    with open(f'data/servers/{interaction.guild_id}/config.json', 'r') as file:
-        config = json.load(file)
-    with open(f'data/templates/{config["language"]}_lang.json', 'r') as file:
-        lang = json.load(file)
-        
+    config = config_store.get(interaction.guild_id)
+    lang = lang_registry.get(config["language"])
+
+    ticket : discord.TextChannel | None = help_ticket_index.get(interaction.guild, interaction.user.id)
+    if ticket is not None:
+        help_ticket_index.reused += 1
+        await interaction.response.send_message(lang["help_ticket_already_open"].format_map({"channel": ticket.mention}), ephemeral=True)
+        return
+
     help_reason = discord.ui.InputText(
         style=discord.InputTextStyle.long,
         label=lang["help_ticket_label"],
         placeholder=lang["help_ticket_placeholder"],
         required=True
     )
-    
+
     modal = HelpModal(help_reason, title=lang["help_ticket_title"])
     await interaction.response.send_modal(modal)
-    await modal.wait()
-    
-    if help_reason.value is not None:
-        help_category_id = config["help_system"]["help_category_id"]
-        help_role_id = config["help_system"]["channels_id"][str(interaction.channel_id)]
-        
-        category = discord.utils.get(interaction.guild.categories, id=int(help_category_id))
-        overwrites = {
-            interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            interaction.user: discord.PermissionOverwrite(read_messages=True)
-        }
-        
-        channel = await interaction.guild.create_text_channel(
-            name=config["help_system"]['help_channel_name_template'].format_map({"member": interaction.user.name}),
-            category=category,
-            overwrites=overwrites
-        )
-        
-        await channel.send(f"{discord.utils.get(interaction.guild.roles, id=int(help_role_id)).mention}")
-        await channel.send(lang["help_ticket_message"].format_map({"member": interaction.user.mention, "help_reason": help_reason.value}))
-        
+
 
 class HelpButton(discord.ui.Button):
     callback = help_button_callback
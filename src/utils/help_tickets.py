@@ -0,0 +1,124 @@
+import asyncio
+import re
+import time
+from collections.abc import Awaitable, Callable
+
+import discord
+
+# Mention of the member in a ticket's topic, e.g. "Help ticket of <@1234>"
+TOPIC_MEMBER : re.Pattern = re.compile(r"<@!?(\d+)>")
+
+
+class HelpTicketIndex:
+    """In-memory index of the open help tickets of each server, by member.
+
+    A member opening a ticket while one is open, or still being created by
+    an earlier click, gets that ticket back instead of a duplicate. The
+    index is rebuilt from the tickets' topics, which mention their member,
+    so open tickets survive a restart.
+    """
+
+    def __init__(self):
+        self._tickets : dict[int, dict[int, int]] = {}
+        self._pending : dict[tuple[int, int], asyncio.Future] = {}
+        self.opened : int = 0
+        self.reused : int = 0
+        self._total_latency : float = 0.0
+        self.max_latency : float = 0.0
+
+    def load_guild(self, guild : discord.Guild, category : discord.CategoryChannel | None) -> None:
+        """(Re)builds the open tickets of a server from the topics of its help category's channels.
+
+        Args:
+            guild (discord.Guild): The server.
+            category (discord.CategoryChannel | None): Category in which the server's tickets are created.
+        """
+        tickets : dict[int, int] = {}
+        for channel in (category.text_channels if category is not None else ()):
+            match : re.Match | None = TOPIC_MEMBER.search(channel.topic or "")
+            if match is not None:
+                tickets[int(match.group(1))] = channel.id
+        self._tickets[guild.id] = tickets
+
+    def get(self, guild : discord.Guild, member_id : int) -> discord.TextChannel | None:
+        """Gets the open ticket of a member, None if the member has none.
+
+        Args:
+            guild (discord.Guild): The server.
+            member_id (int): Member's ID.
+        """
+        tickets : dict[int, int] = self._tickets.get(guild.id, {})
+        channel_id : int | None = tickets.get(member_id)
+        if channel_id is None:
+            return None
+        channel : discord.abc.GuildChannel | None = guild.get_channel(channel_id)
+        if channel is None:
+            # Deleted while the bot didn't see it
+            del tickets[member_id]
+        return channel
+
+    async def open(self, guild : discord.Guild, member : discord.Member, create : Callable[[], Awaitable[discord.TextChannel]]) -> tuple[discord.TextChannel, bool]:
+        """Gets the open ticket of a member, creating it if there is none.
+
+        Args:
+            guild (discord.Guild): The server.
+            member (discord.Member): The member opening the ticket.
+            create (Callable[[], Awaitable[discord.TextChannel]]): Creates the ticket's channel.
+
+        Returns:
+            tuple[discord.TextChannel, bool]: The ticket, and whether it was created by this call.
+        """
+        channel : discord.TextChannel | None = self.get(guild, member.id)
+        if channel is not None:
+            self.reused += 1
+            return channel, False
+        key : tuple[int, int] = (guild.id, member.id)
+        pending : asyncio.Future | None = self._pending.get(key)
+        if pending is not None:
+            self.reused += 1
+            return await asyncio.shield(pending), False
+
+        future : asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        start : float = time.monotonic()
+        try:
+            channel = await create()
+        except BaseException as error:
+            future.set_exception(error)
+            # Marks the error as retrieved, the caller gets it anyway
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+        self._tickets.setdefault(guild.id, {})[member.id] = channel.id
+        future.set_result(channel)
+
+        latency : float = time.monotonic() - start
+        self.opened += 1
+        self._total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        return channel, True
+
+    def remove_channel(self, guild_id : int, channel_id : int) -> None:
+        """Forgets a ticket after its channel was deleted."""
+        tickets : dict[int, int] = self._tickets.get(guild_id, {})
+        for member_id, ticket_id in list(tickets.items()):
+            if ticket_id == channel_id:
+                del tickets[member_id]
+
+    def forget(self, guild_id : int) -> None:
+        """Forgets every ticket of a server, e.g. when the bot leaves it."""
+        self._tickets.pop(guild_id, None)
+
+    def stats(self) -> dict[str, float]:
+        """Gets the open tickets, the tickets opened and reused, and the creation latency in seconds."""
+        return {
+            "open": sum(len(tickets) for tickets in self._tickets.values()),
+            "opened": self.opened,
+            "reused": self.reused,
+            "average_open_latency": self._total_latency / self.opened if self.opened else 0.0,
+            "max_open_latency": self.max_latency,
+        }
+
+
+help_ticket_index : HelpTicketIndex = HelpTicketIndex()
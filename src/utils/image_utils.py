@@ -1,66 +1,213 @@
+import asyncio
 import io
-import json
+import threading
+from collections import OrderedDict
 import discord
-from PIL import Image, ImageDraw, ImageFont, ImageOps
 
-async def generate_welcome_card(member : discord.Member, background_image : Image.Image) -> io.BytesIO:
-    """Generates a welcome card for a member.
+from utils import settings
+from utils.avatar_cache import avatar_cache
+from utils.config_store import config_store
+from utils.render_pool import render_pool
+
+AVATAR_SIZE : tuple[int, int] = (250, 250)
+BORDER_COLOR : tuple[int, int, int, int] = (255, 255, 255, 200)
+BORDER_WIDTH : int = 15
+FONT_PATH : str = 'data/assets/Geologica-Regular.ttf'
+GROUP_AVATAR_SIZE : tuple[int, int] = (96, 96)
+GROUP_CELL_SIZE : tuple[int, int] = (140, 140)
+GROUP_COLUMNS : int = 6
+
+class CardTemplate:
+    """Everything of a server's welcome card that doesn't depend on the member.
+
+    Holds the decoded background with the avatar's border already drawn,
+    the font, the avatar's mask and the message template.
+    """
+
+    def __init__(self, generation : int, background_image_path : str, text_template : str):
+        # PIL is only imported by the first render, in the process doing it, rather than at startup.
+        from PIL import Image, ImageDraw, ImageFont
+
+        self.generation : int = generation
+        self.text_template : str = text_template
+        self.font : ImageFont.FreeTypeFont = ImageFont.truetype(FONT_PATH, 30)
+
+        self.mask : Image.Image = Image.new('L', AVATAR_SIZE, 0)
+        ImageDraw.Draw(self.mask).ellipse([(0, 0), AVATAR_SIZE], fill=255)
+
+        background_image : Image.Image = Image.open(background_image_path)
+        self.background : Image.Image = Image.new("RGBA", background_image.size)
+        self.background.paste(background_image, (0, 0))
+
+        self.avatar_position : tuple[int, int] = (
+            int((self.background.width - AVATAR_SIZE[0]) / 2),
+            int((self.background.height - AVATAR_SIZE[1]) / 3)
+        )
+        overlay_rect : tuple[int, int, int, int] = (
+            (self.avatar_position[0] - BORDER_WIDTH, self.avatar_position[1] - BORDER_WIDTH),
+            (self.avatar_position[0] + AVATAR_SIZE[0] + BORDER_WIDTH, self.avatar_position[1] + AVATAR_SIZE[1] + BORDER_WIDTH)
+        )
+        ImageDraw.Draw(self.background).pieslice(overlay_rect, 0, 360, fill=BORDER_COLOR)
+        self.text_y : int = int((self.background.height - AVATAR_SIZE[1]) / 2) + AVATAR_SIZE[1] + 10
+
+# Templates live in the process doing the rendering, i.e. in each worker of a process pool.
+_card_templates : OrderedDict[int, CardTemplate] = OrderedDict()
+# Generation of each server's template, bumped in the bot's process to invalidate the workers' copies.
+_template_generations : dict[int, int] = {}
+_card_templates_lock : threading.Lock = threading.Lock()
+
+def get_card_template(server_id : int, generation : int, background_image_path : str, text_template : str) -> CardTemplate:
+    """Gets the cached welcome card template of a server, building it if missing or outdated.
 
     Args:
-        member (discord.Member): The member to generate the welcome card for.
-        avatar_image (PIL.Image): The avatar image of the member.
+        server_id (int): Server's ID.
+        generation (int): Current generation of the server's template.
+        background_image_path (str): Path of the card's background image.
+        text_template (str): Template of the text written under the avatar.
     """
-    if not background_image or not member:
-        return
-    
-    avatar_url = member.avatar.with_format('png').with_size(1024)
-    avatar_data = await avatar_url.read()
-    avatar_image = Image.open(io.BytesIO(avatar_data))
-    avatar_image = avatar_image.resize((250, 250), Image.Resampling.BILINEAR)
-    
-    mask = Image.new('L', avatar_image.size, 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse([(0, 0), avatar_image.size], fill=255)
-    
-    avatar_image = ImageOps.fit(avatar_image, mask.size)
-    avatar_image.putalpha(mask)
-
-    new_image : Image.Image = Image.new("RGBA", background_image.size)
-    new_image.paste(background_image, (0, 0))
-    draw = ImageDraw.Draw(new_image)
+    with _card_templates_lock:
+        template : CardTemplate | None = _card_templates.get(server_id)
+        if template is not None and template.generation == generation:
+            _card_templates.move_to_end(server_id)
+            return template
 
-    border_color : tuple[int, int, int, int] = (255, 255, 255, 200)
-    border_width : int = 15
-    overlay_rect : tuple[int, int, int, int] = (
-        (int((background_image.width - avatar_image.width) / 2) - border_width,
-         int((background_image.height - avatar_image.height) / 3) - border_width),
-        (int((background_image.width + avatar_image.width) / 2) + border_width,
-         int((background_image.height - avatar_image.height) / 3 + avatar_image.height) + border_width)
-    )
-    draw.pieslice(overlay_rect, 0, 360, fill=border_color)
+    template = CardTemplate(generation, background_image_path, text_template)
+    with _card_templates_lock:
+        _card_templates[server_id] = template
+        _card_templates.move_to_end(server_id)
+        while len(_card_templates) > settings.CARD_TEMPLATE_CACHE_SIZE:
+            _card_templates.popitem(last=False)
+    return template
+
+def invalidate_card_template(server_id : int) -> None:
+    """Invalidates the welcome card template of a server after its background or message changed.
+
+    Args:
+        server_id (int): Server's ID.
+    """
+    _template_generations[server_id] = _template_generations.get(server_id, 0) + 1
+
+def render_welcome_card(server_id : int, generation : int, background_image_path : str, text_template : str, avatar_data : bytes, member_name : str, server_name : str) -> bytes:
+    """Renders a welcome card. CPU bound, meant to run in the render pool.
 
-    new_image.paste(avatar_image, (int((background_image.width - avatar_image.width) / 2), int((background_image.height - avatar_image.height) / 3)), mask)
+    Args:
+        server_id (int): Server's ID.
+        generation (int): Current generation of the server's template.
+        background_image_path (str): Path of the card's background image.
+        text_template (str): Template of the text written under the avatar.
+        avatar_data (bytes): Encoded avatar image of the member.
+        member_name (str): Name of the member.
+        server_name (str): Name of the server.
 
-    font : ImageFont.FreeTypeFont = ImageFont.truetype('data/assets/Geologica-Regular.ttf', 30)
-    
-    with open(f"data/servers/{member.guild.id}/config.json", "r") as file:
-        config = json.load(file)
-        text : str = config["welcome_system"]["welcome_message_template"]
-    text = text.format_map({"member": member.name, "server": member.guild})
+    Returns:
+        bytes: The PNG encoded welcome card.
+    """
+    from PIL import Image, ImageDraw, ImageOps
 
-    text_bbox : tuple[float, float, float, float] = draw.textbbox((0, 0), text, font=font)
+    template : CardTemplate = get_card_template(server_id, generation, background_image_path, text_template)
+
+    avatar_image : Image.Image = Image.open(io.BytesIO(avatar_data)).convert("RGBA")
+    avatar_image = ImageOps.fit(avatar_image, AVATAR_SIZE, Image.Resampling.BILINEAR)
+
+    new_image : Image.Image = template.background.copy()
+    new_image.paste(avatar_image, template.avatar_position, template.mask)
+
+    text : str = template.text_template.format_map({"member": member_name, "server": server_name})
+    draw = ImageDraw.Draw(new_image)
+    text_bbox : tuple[float, float, float, float] = draw.textbbox((0, 0), text, font=template.font)
     text_width : float = text_bbox[2] - text_bbox[0]
 
     draw.text(
-        (int((background_image.width - text_width) / 2), int((background_image.height - avatar_image.height) / 2) + avatar_image.height + 10),
+        (int((new_image.width - text_width) / 2), template.text_y),
         text,
-        font=font,
+        font=template.font,
         fill=(255, 255, 255)
     )
-    
+
     img_byte_arr : io.BytesIO = io.BytesIO()
     new_image.save(img_byte_arr, format='PNG')
-    img_byte_arr.seek(0) 
-    
-    return img_byte_arr
-    
\ No newline at end of file
+    return img_byte_arr.getvalue()
+
+async def generate_welcome_card(member : discord.Member, background_image_path : str) -> io.BytesIO:
+    """Generates a welcome card for a member.
+
+    The avatar is downloaded here, the rendering itself runs in the render pool.
+
+    Args:
+        member (discord.Member): The member to generate the welcome card for.
+        background_image_path (str): Path of the card's background image.
+    """
+    if not background_image_path or not member:
+        return
+
+    avatar_data : bytes = await avatar_cache.fetch(member, AVATAR_SIZE[0])
+
+    server_id : int = member.guild.id
+    text_template : str = config_store.welcome_system(server_id)["welcome_message_template"]
+
+    return io.BytesIO(await render_pool.run(
+        render_welcome_card, server_id, _template_generations.get(server_id, 0), background_image_path,
+        text_template, avatar_data, member.name, member.guild.name
+    ))
+
+def render_group_welcome_card(background_image_path : str, avatars_data : list[bytes], names : list[str], hidden_count : int) -> bytes:
+    """Renders one welcome card for a group of members. CPU bound, meant to run in the render pool.
+
+    Args:
+        background_image_path (str): Path of the card's background image.
+        avatars_data (list[bytes]): Encoded avatar images of the members.
+        names (list[str]): Names of the members, in the same order.
+        hidden_count (int): Number of members who joined but aren't drawn.
+
+    Returns:
+        bytes: The PNG encoded welcome card.
+    """
+    from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+    columns : int = min(len(avatars_data), GROUP_COLUMNS)
+    rows : int = -(-len(avatars_data) // GROUP_COLUMNS) + (1 if hidden_count else 0)
+    size : tuple[int, int] = (columns * GROUP_CELL_SIZE[0] + 40, rows * GROUP_CELL_SIZE[1] + 40)
+
+    new_image : Image.Image = ImageOps.fit(Image.open(background_image_path).convert("RGBA"), size)
+    draw = ImageDraw.Draw(new_image)
+    font : ImageFont.FreeTypeFont = ImageFont.truetype(FONT_PATH, 16)
+
+    mask : Image.Image = Image.new('L', GROUP_AVATAR_SIZE, 0)
+    ImageDraw.Draw(mask).ellipse([(0, 0), GROUP_AVATAR_SIZE], fill=255)
+
+    for index, (avatar_data, name) in enumerate(zip(avatars_data, names)):
+        cell_x : int = 20 + (index % GROUP_COLUMNS) * GROUP_CELL_SIZE[0]
+        cell_y : int = 20 + (index // GROUP_COLUMNS) * GROUP_CELL_SIZE[1]
+        avatar_image : Image.Image = ImageOps.fit(Image.open(io.BytesIO(avatar_data)).convert("RGBA"), GROUP_AVATAR_SIZE, Image.Resampling.BILINEAR)
+        new_image.paste(avatar_image, (cell_x + int((GROUP_CELL_SIZE[0] - GROUP_AVATAR_SIZE[0]) / 2), cell_y), mask)
+
+        text_width : float = draw.textlength(name, font=font)
+        if text_width > GROUP_CELL_SIZE[0] - 8:
+            while name and draw.textlength(f"{name}…", font=font) > GROUP_CELL_SIZE[0] - 8:
+                name = name[:-1]
+            name = f"{name}…"
+            text_width = draw.textlength(name, font=font)
+        draw.text((cell_x + int((GROUP_CELL_SIZE[0] - text_width) / 2), cell_y + GROUP_AVATAR_SIZE[1] + 8), name, font=font, fill=(255, 255, 255))
+
+    if hidden_count:
+        text : str = f"+{hidden_count}"
+        draw.text((int((size[0] - draw.textlength(text, font=font)) / 2), size[1] - GROUP_CELL_SIZE[1] + 40), text, font=font, fill=(255, 255, 255))
+
+    img_byte_arr : io.BytesIO = io.BytesIO()
+    new_image.save(img_byte_arr, format='PNG')
+    return img_byte_arr.getvalue()
+
+async def generate_group_welcome_card(members : list[discord.Member], background_image_path : str) -> io.BytesIO:
+    """Generates one welcome card for a group of members who joined during a raid.
+
+    Args:
+        members (list[discord.Member]): The members to welcome.
+        background_image_path (str): Path of the card's background image.
+    """
+    shown : list[discord.Member] = members[:settings.GROUP_CARD_MAX_AVATARS]
+    avatars_data : list[bytes] = await asyncio.gather(*(avatar_cache.fetch(member, GROUP_AVATAR_SIZE[0]) for member in shown))
+
+    return io.BytesIO(await render_pool.run(
+        render_group_welcome_card, background_image_path, list(avatars_data),
+        [member.name for member in shown], len(members) - len(shown)
+    ))
@@ -0,0 +1,74 @@
+import glob
+import json
+import os
+from types import MappingProxyType
+
+TEMPLATES_PATH : str = 'data/templates'
+DEFAULT_LANGUAGE : str = 'en'
+
+
+class LangRegistry:
+    """Registry of every language pack found in data/templates/*_lang.json.
+
+    Packs are parsed once and kept as read-only mappings. reload() only
+    re-parses the files whose modification time changed.
+    """
+
+    def __init__(self, templates_path : str = TEMPLATES_PATH):
+        self.templates_path : str = templates_path
+        self._packs : dict[str, MappingProxyType] = {}
+        self._mtimes : dict[str, float] = {}
+        self.reload()
+
+    def reload(self) -> list[str]:
+        """Parses new or modified language packs and forgets deleted ones.
+
+        Returns:
+            list[str]: Prefixes of the reloaded languages.
+        """
+        reloaded : list[str] = []
+        packs : dict[str, MappingProxyType] = dict(self._packs)
+        found : set[str] = set()
+        for path in glob.glob(f'{self.templates_path}/*_lang.json'):
+            language : str = os.path.basename(path)[:-len('_lang.json')]
+            found.add(language)
+            mtime : float = os.stat(path).st_mtime
+            if self._mtimes.get(language) == mtime:
+                continue
+            with open(path, 'r', encoding='utf-8') as file:
+                packs[language] = MappingProxyType(json.load(file))
+            self._mtimes[language] = mtime
+            reloaded.append(language)
+        for language in set(packs) - found:
+            del packs[language]
+            del self._mtimes[language]
+        self._packs = packs
+        return reloaded
+
+    def languages(self) -> list[str]:
+        """Lists the prefixes of the available languages."""
+        return sorted(self._packs)
+
+    def get(self, language : str) -> MappingProxyType:
+        """Gets a language pack, the default one if the language is unknown.
+
+        Args:
+            language (str): Language's prefix.
+
+        Returns:
+            MappingProxyType: The language pack.
+        """
+        pack = self._packs.get(language)
+        return pack if pack is not None else self._packs[DEFAULT_LANGUAGE]
+
+    def string(self, language : str, key : str) -> str:
+        """Gets a single string of a language pack.
+
+        Args:
+            language (str): Language's prefix.
+            key (str): Key of the string.
+        """
+        return self.get(language)[key]
+
+
+lang_registry : LangRegistry = LangRegistry()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+import selectors
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from types import FrameType
+
+from utils import settings
+
+SOURCE_ROOT : str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopWatchdog:
+    """Detects the callbacks blocking the event loop.
+
+    A heartbeat task measures the loop's lag. A watchdog thread checks the
+    heartbeat and, once the loop has been blocked for longer than `threshold`,
+    logs the stack of the loop's thread, i.e. of the blocking callback.
+    With `profile`, the stack keeps being sampled for as long as the stall
+    lasts, so the blocking call sites are weighted by how long they block.
+    The top call sites are written to `report_path` every `report_interval`.
+    """
+
+    def __init__(
+        self,
+        threshold : float = settings.LOOP_STALL_THRESHOLD,
+        interval : float = settings.LOOP_WATCHDOG_INTERVAL,
+        profile : bool = settings.LOOP_PROFILE_STALLS,
+        sample_interval : float = settings.LOOP_PROFILE_SAMPLE_INTERVAL,
+        report_interval : float = settings.LOOP_REPORT_INTERVAL,
+        report_path : str = settings.LOOP_REPORT_PATH
+    ):
+        self.threshold : float = threshold
+        self.interval : float = interval
+        self.profile : bool = profile
+        self.sample_interval : float = sample_interval
+        self.report_interval : float = report_interval
+        self.report_path : str = report_path
+        self.stalls : int = 0
+        self.last_lag : float = 0.0
+        self.max_lag : float = 0.0
+        self.longest_stall : float = 0.0
+        self._sites : Counter[str] = Counter()
+        self._sites_lock : threading.Lock = threading.Lock()
+        self._last_beat : float = 0.0
+        self._loop : asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id : int | None = None
+        self._heartbeat : asyncio.Task | None = None
+        self._thread : threading.Thread | None = None
+        self._stopping : threading.Event = threading.Event()
+
+    def start(self, loop : asyncio.AbstractEventLoop) -> None:
+        """Starts watching a loop. Must be called from the loop's thread."""
+        if self._thread is not None:
+            return
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat = loop.create_task(self._beat())
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops watching and writes a last report."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        if self._heartbeat is not None and not self._loop.is_closed():
+            self._heartbeat.cancel()
+        self.write_report()
+
+    async def _beat(self) -> None:
+        while True:
+            expected : float = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now : float = time.monotonic()
+            self.last_lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            self._last_beat = now
+
+    def _watch(self) -> None:
+        stalled_since : float | None = None
+        next_report : float = time.monotonic() + self.report_interval
+        while not self._stopping.wait(self.sample_interval if stalled_since is not None and self.profile else self.interval):
+            now : float = time.monotonic()
+            beat : float = self._last_beat
+            if self._loop.is_closed() or not self._loop.is_running():
+                stalled_since = None
+                continue
+
+            blocked : float = now - beat
+            frame : FrameType | None = sys._current_frames().get(self._loop_thread_id) if blocked > self.threshold else None
+            # Back to waiting for I/O: the stall just ended, the heartbeat is about to run.
+            if frame is not None and frame.f_code.co_filename == selectors.__file__:
+                frame = None
+            if frame is not None:
+                if stalled_since != beat:
+                    stalled_since = beat
+                    self.stalls += 1
+                    self._record(frame)
+                    stack : str = "".join(traceback.format_stack(frame))
+                    print(f"Event loop blocked for more than {blocked * 1000:.0f} ms, in:\n{stack}", end="")
+                elif self.profile:
+                    self._record(frame)
+                self.longest_stall = max(self.longest_stall, blocked)
+            else:
+                stalled_since = None
+
+            if now >= next_report:
+                next_report = now + self.report_interval
+                self.write_report()
+
+    def _record(self, frame : FrameType) -> None:
+        with self._sites_lock:
+            self._sites[self.call_site(frame)] += 1
+
+    @staticmethod
+    def call_site(frame : FrameType) -> str:
+        """Describes where a stack is blocked: the bot's own frame making the call, and the frame actually running."""
+        site : str = LoopWatchdog._describe(frame)
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(SOURCE_ROOT):
+                own : str = LoopWatchdog._describe(frame)
+                return site if own == site else f"{own} -> {site}"
+            frame = frame.f_back
+        return site
+
+    @staticmethod
+    def _describe(frame : FrameType) -> str:
+        filename : str = frame.f_code.co_filename
+        if filename.startswith(SOURCE_ROOT):
+            filename = os.path.relpath(filename, SOURCE_ROOT)
+        return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+    def top_sites(self, count : int = 20) -> list[tuple[str, int]]:
+        """Gets the call sites which blocked the loop the most, with their number of samples."""
+        with self._sites_lock:
+            return self._sites.most_common(count)
+
+    def write_report(self) -> None:
+        """Writes the stall counters and the top blocking call sites to the report file."""
+        report : dict[str, any] = {"generated_at": time.time(), **self.stats(), "top_sites": [
+            {"site": site, "samples": samples} for site, samples in self.top_sites()
+        ]}
+        temp_path : str = f"{self.report_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+        os.replace(temp_path, self.report_path)
+
+    def stats(self) -> dict[str, float]:
+        """Gets the loop's lag and the number and longest of its stalls, in seconds."""
+        return {
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "stalls": self.stalls,
+            "longest_stall": self.longest_stall,
+        }
+
+
+loop_watchdog : LoopWatchdog = LoopWatchdog()
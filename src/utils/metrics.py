@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import functools
+import logging
+import sys
+import time
+import traceback
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+import discord
+
+from utils import settings
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+LATENCY_BUCKETS : tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    """Cumulative latency histogram, with Prometheus' bucket semantics."""
+
+    def __init__(self, buckets : tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets : tuple[float, ...] = buckets
+        self.counts : list[int] = [0] * len(buckets)
+        self.count : int = 0
+        self.sum : float = 0.0
+
+    def observe(self, value : float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q : float) -> float:
+        """Gets the upper bound of the bucket holding the q-quantile."""
+        rank : float = q * self.count
+        seen : int = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return 0.0
+
+
+class Invocation:
+    """REST calls and rate limits of one run of a handler."""
+
+    def __init__(self, name : str):
+        self.name : str = name
+        self.start : float = time.perf_counter()
+        self.rest_calls : int = 0
+        self.rate_limits : int = 0
+
+
+class HandlerMetrics:
+    """Latency, errors and REST calls of an event handler, command or task."""
+
+    def __init__(self):
+        self.latency : Histogram = Histogram()
+        self.errors : int = 0
+        self.rest_calls : int = 0
+        self.max_rest_calls : int = 0
+        self.rate_limits : int = 0
+
+    def observe(self, invocation : Invocation) -> None:
+        self.latency.observe(time.perf_counter() - invocation.start)
+        self.rest_calls += invocation.rest_calls
+        self.max_rest_calls = max(self.max_rest_calls, invocation.rest_calls)
+        self.rate_limits += invocation.rate_limits
+
+    def stats(self) -> dict[str, float]:
+        calls : int = self.latency.count
+        return {
+            "calls": calls,
+            "errors": self.errors,
+            "mean_latency": self.latency.sum / calls if calls else 0.0,
+            "p95_latency": self.latency.quantile(0.95),
+            "rest_calls_per_call": self.rest_calls / calls if calls else 0.0,
+            "max_rest_calls": self.max_rest_calls,
+            "rate_limits": self.rate_limits,
+        }
+
+
+class _RateLimitLogHandler(logging.Handler):
+    """Counts the rate limits py-cord's HTTP client logs while it waits them out."""
+
+    def __init__(self, metrics : "Metrics"):
+        super().__init__(logging.WARNING)
+        self.metrics : Metrics = metrics
+
+    def emit(self, record : logging.LogRecord) -> None:
+        if "rate limit" in record.getMessage().lower():
+            self.metrics.record_rate_limit()
+
+
+class Metrics:
+    """Instrumentation of the bot's event handlers, slash commands and background tasks.
+
+    Handlers are timed with the track() decorator, slash commands through the
+    bot's invoke hooks. The REST calls made while a handler runs, including
+    by the tasks it starts, are counted against it through a context variable.
+    The stats() of the bot's components can be registered to be reported along.
+    """
+
+    def __init__(self):
+        self.handlers : dict[str, HandlerMetrics] = {}
+        self.components : dict[str, Callable[[], dict[str, float]]] = {}
+        self.rest_calls : int = 0
+        self.rate_limits : int = 0
+        self._invocation : ContextVar[Invocation | None] = ContextVar("invocation", default=None)
+        self._runner : web.AppRunner | None = None
+
+    def handler(self, name : str) -> HandlerMetrics:
+        metrics : HandlerMetrics | None = self.handlers.get(name)
+        if metrics is None:
+            metrics = self.handlers[name] = HandlerMetrics()
+        return metrics
+
+    def track(self, name : str | None = None) -> Callable:
+        """Decorates a coroutine function to record its latency, errors and REST calls.
+
+        The function keeps its name, so it can still be registered with @tyrBot.event.
+
+        Args:
+            name (str, optional): Name reported, the function's name if not specified.
+        """
+        def decorator(function : Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+            handler_name : str = name or function.__name__
+
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                invocation : Invocation = Invocation(handler_name)
+                token = self._invocation.set(invocation)
+                try:
+                    return await function(*args, **kwargs)
+                except Exception:
+                    self.handler(handler_name).errors += 1
+                    raise
+                finally:
+                    self.handler(handler_name).observe(invocation)
+                    self._invocation.reset(token)
+            return wrapper
+        return decorator
+
+    async def before_command(self, ctx : discord.ApplicationContext) -> None:
+        """Bot's before_invoke hook, starts timing a slash command."""
+        self._invocation.set(Invocation(f"/{ctx.command.qualified_name}"))
+
+    async def after_command(self, ctx : discord.ApplicationContext) -> None:
+        """Bot's after_invoke hook, records a slash command, whether it succeeded or not."""
+        invocation : Invocation | None = self._invocation.get()
+        if invocation is not None:
+            self.handler(invocation.name).observe(invocation)
+            self._invocation.set(None)
+
+    async def on_command_error(self, ctx : discord.ApplicationContext, error : discord.DiscordException) -> None:
+        """Listener of on_application_command_error, counts the failed slash commands.
+
+        Having a listener mutes py-cord's default error report, so the error is printed here.
+        """
+        if ctx.command is not None:
+            self.handler(f"/{ctx.command.qualified_name}").errors += 1
+        print(f"Ignoring exception in command {ctx.command}:", file=sys.stderr)
+        traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+
+    def record_rate_limit(self) -> None:
+        self.rate_limits += 1
+        invocation : Invocation | None = self._invocation.get()
+        if invocation is not None:
+            invocation.rate_limits += 1
+
+    def instrument(self, bot : discord.Bot) -> None:
+        """Hooks the slash commands, REST calls and rate limits of a bot.
+
+        Args:
+            bot (discord.Bot): The bot, with its HTTP client created.
+        """
+        bot.before_invoke(self.before_command)
+        bot.after_invoke(self.after_command)
+        bot.add_listener(self.on_command_error, "on_application_command_error")
+
+        request : Callable[..., Awaitable] = bot.http.request
+
+        @functools.wraps(request)
+        async def counted_request(*args, **kwargs):
+            self.rest_calls += 1
+            invocation : Invocation | None = self._invocation.get()
+            if invocation is not None:
+                invocation.rest_calls += 1
+            return await request(*args, **kwargs)
+        bot.http.request = counted_request
+        logging.getLogger("discord.http").addHandler(_RateLimitLogHandler(self))
+
+    def register(self, name : str, stats : Callable[[], dict[str, float]]) -> None:
+        """Reports the stats() of a component along with the handlers'.
+
+        Args:
+            name (str): Name of the component.
+            stats (Callable[[], dict[str, float]]): Gets the component's counters.
+        """
+        self.components[name] = stats
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Gets the counters of every handler and component."""
+        stats : dict[str, dict[str, float]] = {
+            "rest": {"calls": self.rest_calls, "rate_limits": self.rate_limits},
+        }
+        for name, get_stats in self.components.items():
+            stats[name] = get_stats()
+        return stats
+
+    def prometheus(self) -> str:
+        """Renders every metric in Prometheus' text exposition format."""
+        lines : list[str] = [
+            "# TYPE fulgobot_handler_latency_seconds histogram",
+        ]
+        for name, handler in self.handlers.items():
+            cumulative : int = 0
+            for bound, count in zip(handler.latency.buckets, handler.latency.counts):
+                cumulative += count
+                le : str = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'fulgobot_handler_latency_seconds_bucket{{handler="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'fulgobot_handler_latency_seconds_sum{{handler="{name}"}} {handler.latency.sum}')
+            lines.append(f'fulgobot_handler_latency_seconds_count{{handler="{name}"}} {handler.latency.count}')
+        for metric, attribute in (("errors", "errors"), ("rest_calls", "rest_calls"), ("rate_limits", "rate_limits")):
+            lines.append(f"# TYPE fulgobot_handler_{metric}_total counter")
+            for name, handler in self.handlers.items():
+                lines.append(f'fulgobot_handler_{metric}_total{{handler="{name}"}} {getattr(handler, attribute)}')
+        for component, counters in self.stats().items():
+            for counter, value in counters.items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"fulgobot_{component}_{counter} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+    async def handle_metrics(self, _ : web.Request) -> web.Response:
+        from aiohttp import web
+        return web.Response(text=self.prometheus(), content_type="text/plain", charset="utf-8", headers={"Cache-Control": "no-store"})
+
+    async def start_endpoint(self, host : str = settings.METRICS_HOST, port : int = settings.METRICS_PORT) -> None:
+        """Starts the Prometheus endpoint, at /metrics."""
+        if self._runner is not None:
+            return
+        # aiohttp's server side is only imported when the endpoint is enabled
+        from aiohttp import web
+        app : web.Application = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop_endpoint(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+metrics : Metrics = Metrics()
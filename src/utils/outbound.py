@@ -0,0 +1,208 @@
+import asyncio
+import enum
+import heapq
+import itertools
+import time
+from collections import deque
+
+import discord
+
+from utils import settings
+
+
+class Priority(enum.IntEnum):
+    """Classes of outbound messages, the lowest value is sent first."""
+
+    INTERACTIVE = 0
+    WELCOME = 1
+    BACKGROUND = 2  # Youtube announcements and logs
+
+
+class ChannelBucket:
+    """Token bucket following Discord's per-channel message rate limit."""
+
+    def __init__(self, burst : int, period : float):
+        self.burst : int = burst
+        self.rate : float = burst / period
+        self.tokens : float = float(burst)
+        self.updated_at : float = time.monotonic()
+
+    def _refill(self, now : float) -> None:
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def ready_at(self, now : float) -> float:
+        self._refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+
+    def take(self, now : float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class OutboundMessage:
+    def __init__(self, channel : discord.abc.Messageable, priority : Priority, kwargs : dict[str, any]):
+        self.channel : discord.abc.Messageable = channel
+        self.priority : Priority = priority
+        self.kwargs : dict[str, any] = kwargs
+        self.future : asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at : float = time.monotonic()
+
+
+class OutboundDispatcher:
+    """Central queue of the messages sent by the bot.
+
+    Messages are sent by priority class, interactive ones first, then welcome
+    cards, then announcements and logs. Each channel has a bucket following
+    Discord's per-channel rate limit, so a channel over its limit doesn't
+    hold back the others. At most `concurrency` messages are sent at once,
+    and each class has its own cap, so a burst of announcements always
+    leaves room for interactive messages.
+    """
+
+    def __init__(
+        self,
+        concurrency : int = settings.OUTBOUND_CONCURRENCY,
+        class_concurrency : tuple[int, ...] = settings.OUTBOUND_CLASS_CONCURRENCY,
+        channel_burst : int = settings.OUTBOUND_CHANNEL_BURST,
+        channel_period : float = settings.OUTBOUND_CHANNEL_PERIOD
+    ):
+        self.concurrency : int = concurrency
+        self.class_concurrency : tuple[int, ...] = class_concurrency
+        self.channel_burst : int = channel_burst
+        self.channel_period : float = channel_period
+        self._pending : list[dict[int, deque[OutboundMessage]]] = [{} for _ in Priority]
+        self._ready : list[list[tuple[float, int, int]]] = [[] for _ in Priority]
+        self._buckets : dict[int, ChannelBucket] = {}
+        self._in_flight : list[int] = [0 for _ in Priority]
+        self._sequence : itertools.count = itertools.count()
+        self._wakeup : asyncio.Event = asyncio.Event()
+        self._task : asyncio.Task | None = None
+        self._sends : set[asyncio.Task] = set()
+        self.sent : list[int] = [0 for _ in Priority]
+        self.failed : list[int] = [0 for _ in Priority]
+        self._total_latency : list[float] = [0.0 for _ in Priority]
+        self.max_latency : list[float] = [0.0 for _ in Priority]
+
+    async def send(self, channel : discord.abc.Messageable, priority : Priority, **kwargs) -> discord.Message:
+        """Queues a message and waits until it is sent.
+
+        Args:
+            channel (discord.abc.Messageable): Where to send the message.
+            priority (Priority): Class of the message.
+            **kwargs: Arguments of channel.send().
+
+        Raises:
+            ValueError: The channel is None, e.g. a server without system channel.
+            discord.HTTPException: Sending the message failed.
+
+        Returns:
+            discord.Message: The message sent.
+        """
+        if channel is None:
+            raise ValueError("Can't queue a message without a channel")
+        message : OutboundMessage = OutboundMessage(channel, priority, kwargs)
+        channel_id : int = channel.id
+        queue : deque[OutboundMessage] | None = self._pending[priority].get(channel_id)
+        if queue is None:
+            queue = self._pending[priority][channel_id] = deque()
+            bucket : ChannelBucket = self._bucket(channel_id)
+            heapq.heappush(self._ready[priority], (bucket.ready_at(time.monotonic()), next(self._sequence), channel_id))
+        queue.append(message)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return await message.future
+
+    def _bucket(self, channel_id : int) -> ChannelBucket:
+        bucket : ChannelBucket | None = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = ChannelBucket(self.channel_burst, self.channel_period)
+        return bucket
+
+    def _next(self, now : float) -> OutboundMessage | None:
+        if sum(self._in_flight) >= self.concurrency:
+            return None
+        for priority in Priority:
+            if self._in_flight[priority] >= self.class_concurrency[priority]:
+                continue
+            ready : list[tuple[float, int, int]] = self._ready[priority]
+            while ready and ready[0][0] <= now:
+                _, _, channel_id = heapq.heappop(ready)
+                bucket : ChannelBucket = self._buckets[channel_id]
+                # Another class may have used the channel's tokens since it was queued.
+                ready_at : float = bucket.ready_at(now)
+                if ready_at > now:
+                    heapq.heappush(ready, (ready_at, next(self._sequence), channel_id))
+                    continue
+                queue : deque[OutboundMessage] = self._pending[priority][channel_id]
+                message : OutboundMessage = queue.popleft()
+                bucket.take(now)
+                if queue:
+                    heapq.heappush(ready, (bucket.ready_at(now), next(self._sequence), channel_id))
+                else:
+                    del self._pending[priority][channel_id]
+                if message.future.cancelled():
+                    continue
+                return message
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            now : float = time.monotonic()
+            message : OutboundMessage | None = self._next(now)
+            if message is not None:
+                self._in_flight[message.priority] += 1
+                task : asyncio.Task = asyncio.create_task(self._send(message))
+                self._sends.add(task)
+                task.add_done_callback(self._sends.discard)
+                continue
+
+            # Waits for a channel of a class with free slots to get ready, or for a send to end or a message to come.
+            ready_at : list[float] = [
+                ready[0][0] for priority, ready in zip(Priority, self._ready)
+                if ready and self._in_flight[priority] < self.class_concurrency[priority]
+            ]
+            timeout : float | None = max(0.0, min(ready_at) - now) if ready_at and sum(self._in_flight) < self.concurrency else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, message : OutboundMessage) -> None:
+        priority : Priority = message.priority
+        try:
+            result : discord.Message = await message.channel.send(**message.kwargs)
+        except Exception as error:
+            self.failed[priority] += 1
+            if not message.future.done():
+                message.future.set_exception(error)
+        else:
+            self.sent[priority] += 1
+            if not message.future.done():
+                message.future.set_result(result)
+        finally:
+            latency : float = time.monotonic() - message.enqueued_at
+            self._total_latency[priority] += latency
+            self.max_latency[priority] = max(self.max_latency[priority], latency)
+            self._in_flight[priority] -= 1
+            self._wakeup.set()
+
+    def stats(self) -> dict[str, float]:
+        """Gets the queue depth, messages in flight, sent and failed, and latencies in seconds, of each class."""
+        stats : dict[str, float] = {}
+        for priority in Priority:
+            name : str = priority.name.lower()
+            done : int = self.sent[priority] + self.failed[priority]
+            stats[f"{name}_depth"] = sum(len(queue) for queue in self._pending[priority].values())
+            stats[f"{name}_in_flight"] = self._in_flight[priority]
+            stats[f"{name}_sent"] = self.sent[priority]
+            stats[f"{name}_failed"] = self.failed[priority]
+            stats[f"{name}_average_latency"] = self._total_latency[priority] / done if done else 0.0
+            stats[f"{name}_max_latency"] = self.max_latency[priority]
+        return stats
+
+
+outbound : OutboundDispatcher = OutboundDispatcher()
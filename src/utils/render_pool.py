@@ -0,0 +1,64 @@
+import asyncio
+import concurrent.futures
+from collections.abc import Callable
+
+from utils import settings
+
+
+class RenderPool:
+    """Worker pool running CPU bound rendering out of the event loop.
+
+    At most max_pending jobs are queued or running at once. Coroutines
+    submitting a job while the pool is full wait for a free slot, which
+    keeps a join raid from piling up unbounded work.
+    """
+
+    def __init__(self, kind : str = settings.RENDER_POOL_KIND, max_workers : int = settings.RENDER_POOL_WORKERS, max_pending : int = settings.RENDER_POOL_MAX_PENDING):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown render pool kind: {kind}")
+        self.kind : str = kind
+        self.max_workers : int = max_workers
+        self.max_pending : int = max_pending
+        self._executor : concurrent.futures.Executor | None = None
+        self._slots : asyncio.Semaphore | None = None
+        self.pending : int = 0
+        self.waiting : int = 0
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="render")
+        return self._executor
+
+    async def run(self, function : Callable, *args) -> any:
+        """Runs a function in the pool and waits for its result.
+
+        Args:
+            function (Callable): Function to run, picklable for a process pool.
+            *args: Arguments of the function, picklable for a process pool.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        self.waiting += 1
+        async with self._slots:
+            self.waiting -= 1
+            self.pending += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+            finally:
+                self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Stops the workers once their current jobs are done."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, int]:
+        """Gets the number of running and waiting jobs."""
+        return {"pending": self.pending, "waiting": self.waiting, "max_pending": self.max_pending}
+
+
+render_pool : RenderPool = RenderPool()
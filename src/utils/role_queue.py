@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+import discord
+
+COALESCE_DELAY : float = 1.5
+
+
+class PendingRoleEdit:
+    """Role changes waiting to be applied to a member."""
+
+    def __init__(self, member : discord.Member):
+        self.member : discord.Member = member
+        self.changes : dict[int, bool] = {}
+        self.enqueued_at : float = time.monotonic()
+
+
+class RoleAssignmentQueue:
+    """Per-member queue between the role react handlers and the Discord API.
+
+    Changes of a member are held for a short delay, then applied as one
+    request. The last change of a role wins, so an add followed by a remove
+    cancels out and costs no request at all.
+    """
+
+    def __init__(self, on_error : Callable[[discord.Guild], Awaitable[None]] = None, coalesce_delay : float = COALESCE_DELAY):
+        self.on_error : Callable[[discord.Guild], Awaitable[None]] = on_error
+        self.coalesce_delay : float = coalesce_delay
+        self._pending : dict[tuple[int, int], PendingRoleEdit] = {}
+        self._tasks : set[asyncio.Task] = set()
+        self.requests_sent : int = 0
+        self.changes_received : int = 0
+        self.edits_cancelled : int = 0
+        self.errors : int = 0
+        self.last_latency : float = 0.0
+        self.max_latency : float = 0.0
+        self._total_latency : float = 0.0
+        self._flushed : int = 0
+
+    def enqueue(self, member : discord.Member, role_id : int, add : bool) -> None:
+        """Queues a role change for a member.
+
+        Args:
+            member (discord.Member): Member whose roles change.
+            role_id (int): Role's ID.
+            add (bool): True to add the role, False to remove it.
+        """
+        key : tuple[int, int] = (member.guild.id, member.id)
+        pending : PendingRoleEdit | None = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = PendingRoleEdit(member)
+            task : asyncio.Task = asyncio.create_task(self._flush_later(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        pending.member = member
+        pending.changes[role_id] = add
+        self.changes_received += 1
+
+    async def _flush_later(self, key : tuple[int, int]) -> None:
+        await asyncio.sleep(self.coalesce_delay)
+        pending : PendingRoleEdit = self._pending.pop(key)
+        try:
+            await self._apply(pending)
+        except discord.HTTPException:
+            self.errors += 1
+            if self.on_error is not None:
+                await self.on_error(pending.member.guild)
+        latency : float = time.monotonic() - pending.enqueued_at
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._total_latency += latency
+        self._flushed += 1
+
+    async def _apply(self, pending : PendingRoleEdit) -> None:
+        """Applies the pending changes of a member in a single request.
+
+        Several changes replace the member's whole role list, computed from the
+        gateway's copy of the member at apply time rather than the reaction's,
+        which may be a coalescing delay old. A role given by someone else
+        between that copy and the request is still lost; the gateway keeps the
+        window to about one round trip.
+        """
+        member : discord.Member = pending.member.guild.get_member(pending.member.id) or pending.member
+        current : set[int] = {role.id for role in member.roles if not role.is_default()}
+        to_add : set[int] = {role_id for role_id, add in pending.changes.items() if add} - current
+        to_remove : set[int] = {role_id for role_id, add in pending.changes.items() if not add} & current
+
+        if not to_add and not to_remove:
+            self.edits_cancelled += 1
+            return
+        self.requests_sent += 1
+        if not to_remove and len(to_add) == 1:
+            await member.add_roles(discord.Object(id=next(iter(to_add))))
+        elif not to_add and len(to_remove) == 1:
+            await member.remove_roles(discord.Object(id=next(iter(to_remove))))
+        else:
+            await member.edit(roles=[discord.Object(id=role_id) for role_id in (current | to_add) - to_remove])
+
+    def stats(self) -> dict[str, float]:
+        """Gets the queue's backlog and latency counters.
+
+        Returns:
+            dict[str, float]: Pending members and changes, requests sent, latencies in seconds...
+        """
+        return {
+            "pending_members": len(self._pending),
+            "pending_changes": sum(len(pending.changes) for pending in self._pending.values()),
+            "oldest_pending": max((time.monotonic() - pending.enqueued_at for pending in self._pending.values()), default=0.0),
+            "changes_received": self.changes_received,
+            "requests_sent": self.requests_sent,
+            "edits_cancelled": self.edits_cancelled,
+            "errors": self.errors,
+            "last_latency": self.last_latency,
+            "average_latency": self._total_latency / self._flushed if self._flushed else 0.0,
+            "max_latency": self.max_latency,
+        }
@@ -0,0 +1,85 @@
+from utils.config_store import config_store
+from utils.sharding import ShardMap, shard_map
+
+
+class RoleReactIndex:
+    """Global index of every role react, keyed by (server, message, emoji).
+
+    Lets the reaction handlers drop reactions on unmapped messages in O(1),
+    without reading any config or calling the Discord API.
+    The index is partitioned by shard, only the local shards are loaded.
+    """
+
+    def __init__(self, shards : ShardMap = shard_map):
+        self.shards : ShardMap = shards
+        self._roles : dict[int, dict[tuple[int, int, str], int]] = {}
+        self._emojis : dict[int, dict[tuple[int, int], set[str]]] = {}
+
+    def build(self) -> None:
+        """Rebuilds the index from the config of every server of the local shards."""
+        self._roles.clear()
+        self._emojis.clear()
+        for server_id in self.shards.local(config_store.server_ids()):
+            self.load_server(server_id)
+
+    def load_shard(self, shard_id : int) -> None:
+        """(Re)loads the role reacts of every server of a shard, e.g. when it gets ready.
+
+        Args:
+            shard_id (int): Shard's ID.
+        """
+        self.remove_shard(shard_id)
+        for server_id in self.shards.partition(config_store.server_ids()).get(shard_id, []):
+            self.load_server(server_id)
+
+    def remove_shard(self, shard_id : int) -> None:
+        self._roles.pop(shard_id, None)
+        self._emojis.pop(shard_id, None)
+
+    def load_server(self, server_id : int) -> None:
+        """Indexes every role react of a server's config.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        self.remove_server(server_id)
+        for message_id, emojis in config_store.get(server_id)["role_react"].items():
+            for emoji, role_id in emojis.items():
+                self.add(server_id, int(message_id), emoji, int(role_id))
+
+    def get(self, server_id : int, message_id : int, emoji : str) -> int | None:
+        """Gets the role associated with an emoji of a message.
+
+        Returns:
+            int | None: Role's ID, None if the reaction isn't a role react.
+        """
+        roles : dict[tuple[int, int, str], int] | None = self._roles.get(self.shards.shard_of(server_id))
+        return roles.get((server_id, message_id, emoji)) if roles is not None else None
+
+    def add(self, server_id : int, message_id : int, emoji : str, role_id : int) -> None:
+        shard_id : int = self.shards.shard_of(server_id)
+        self._roles.setdefault(shard_id, {})[(server_id, message_id, emoji)] = role_id
+        self._emojis.setdefault(shard_id, {}).setdefault((server_id, message_id), set()).add(emoji)
+
+    def remove(self, server_id : int, message_id : int, emoji : str) -> None:
+        shard_id : int = self.shards.shard_of(server_id)
+        self._roles.get(shard_id, {}).pop((server_id, message_id, emoji), None)
+        shard_emojis : dict[tuple[int, int], set[str]] = self._emojis.get(shard_id, {})
+        emojis : set[str] | None = shard_emojis.get((server_id, message_id))
+        if emojis is not None:
+            emojis.discard(emoji)
+            if not emojis:
+                del shard_emojis[(server_id, message_id)]
+
+    def remove_message(self, server_id : int, message_id : int) -> None:
+        shard_id : int = self.shards.shard_of(server_id)
+        roles : dict[tuple[int, int, str], int] = self._roles.get(shard_id, {})
+        for emoji in self._emojis.get(shard_id, {}).pop((server_id, message_id), set()):
+            roles.pop((server_id, message_id, emoji), None)
+
+    def remove_server(self, server_id : int) -> None:
+        for key in [key for key in self._emojis.get(self.shards.shard_of(server_id), {}) if key[0] == server_id]:
+            self.remove_message(*key)
+
+
+role_react_index : RoleReactIndex = RoleReactIndex()
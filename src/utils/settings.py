@@ -0,0 +1,111 @@
+"""File to store the tunable settings of the bot"""
+
+# Welcome card rendering
+RENDER_POOL_KIND = "thread"  # "thread" or "process"
+RENDER_POOL_WORKERS = 2
+RENDER_POOL_MAX_PENDING = 32
+CARD_TEMPLATE_CACHE_SIZE = 64
+
+# Avatars
+AVATAR_CACHE_MAX_BYTES = 16 * 1024 * 1024
+AVATAR_CACHE_TTL = 60 * 60
+
+# Welcome pipeline: above WELCOME_RAID_THRESHOLD joins in WELCOME_RAID_WINDOW seconds,
+# joining members are welcomed with one group card every WELCOME_BATCH_WINDOW seconds.
+WELCOME_RAID_THRESHOLD = 10
+WELCOME_RAID_WINDOW = 30
+WELCOME_BATCH_WINDOW = 15
+GROUP_CARD_MAX_AVATARS = 24
+
+# YouTube watch
+RSS_URL_TEMPLATE = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+RSS_FETCH_CONCURRENCY = 20
+RSS_FETCH_TIMEOUT = 10
+FEED_MIN_INTERVAL = 5 * 60
+FEED_MAX_INTERVAL = 3 * 60 * 60
+FEED_REQUESTS_PER_MINUTE = 120
+FEED_JITTER = 0.1
+FEED_SCHEDULER_TICK = 15
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+CHANNEL_NAMES_PATH = "data/youtube_channels.json"
+CHANNEL_NAME_TTL = 7 * 24 * 60 * 60
+
+# WebSub push notifications, an alternative to RSS polling for the youtube survey.
+# WEBSUB_CALLBACK_URL must be the public URL of the receiver, e.g. "https://bot.example.com/websub".
+# WEBSUB_SECRET of src/utils/tokens_and_keys.py must be set, WebSub stays disabled without it.
+WEBSUB_ENABLED = False
+WEBSUB_CALLBACK_URL = ""
+WEBSUB_HOST = "0.0.0.0"
+WEBSUB_PORT = 8080
+WEBSUB_HUB_URL = "https://pubsubhubbub.appspot.com/subscribe"
+WEBSUB_TOPIC_TEMPLATE = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+WEBSUB_LEASE_SECONDS = 5 * 24 * 60 * 60
+WEBSUB_RENEW_MARGIN = 60 * 60
+WEBSUB_MAX_ENTRY_AGE = 24 * 60 * 60
+
+# Temporary voice channels' journal is compacted once it has this many more lines than live channels
+TEMP_VOICE_JOURNAL_SLACK = 100
+
+# Name of the hidden spare channels pre-created for join-to-create hubs
+VOICE_POOL_SPARE_NAME = "🔒"
+
+# Storage: "json" keeps one data/servers/<id>/ folder per server, "sqlite" one database for all of them.
+# Migrate between both with `python src/migrate_storage.py json sqlite`.
+STORAGE_BACKEND = "json"
+SERVERS_PATH = "data/servers"
+SQLITE_PATH = "data/fulgobot.db"
+STORAGE_CACHE_PATH = "data/cache"
+CONFIG_TEMPLATE_PATH = "data/templates/server_config.json"
+# Configs are written at most once per CONFIG_WRITE_DEBOUNCE seconds
+CONFIG_WRITE_DEBOUNCE = 2.0
+
+# Prometheus-format metrics endpoint, served at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = False
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+
+# Event loop watchdog: logs the stack of any callback blocking the loop for more than LOOP_STALL_THRESHOLD seconds.
+# LOOP_PROFILE_STALLS keeps sampling the stack while a stall lasts, to weight the call sites by blocking time.
+LOOP_WATCHDOG_ENABLED = True
+LOOP_STALL_THRESHOLD = 0.25
+LOOP_WATCHDOG_INTERVAL = 0.05
+LOOP_PROFILE_STALLS = False
+LOOP_PROFILE_SAMPLE_INTERVAL = 0.01
+LOOP_REPORT_INTERVAL = 60 * 60
+LOOP_REPORT_PATH = "data/loop_stalls.json"
+
+# Sharding: SHARD_COUNT None lets Discord recommend it, SHARD_IDS None runs every shard in this process.
+# SHARD_IDS requires SHARD_COUNT.
+SHARD_COUNT = None
+SHARD_IDS = None
+# Window over which the events per minute of each shard are measured, in seconds
+SHARD_EVENT_RATE_WINDOW = 60
+
+# Cluster mode, see src/launch_cluster.py. CLUSTER_WORKER_ID is set by the launcher in each worker.
+CLUSTER_WORKER_ID = None
+CLUSTER_DB_PATH = "data/cluster.db"
+CLUSTER_TICK = 5
+CLUSTER_LEASE_SECONDS = 30
+CLUSTER_LOCK_TIMEOUT = 10
+CLUSTER_FEED_RETENTION = 60 * 60
+CLUSTER_RESTART_DELAY = 10
+# Discord lets a bot identify one shard every 5 seconds, workers are started accordingly
+CLUSTER_IDENTIFY_INTERVAL = 5
+
+# Outbound messages: total sends at once, per priority class (interactive, welcome, announcements and logs),
+# and Discord's per-channel rate limit (OUTBOUND_CHANNEL_BURST messages every OUTBOUND_CHANNEL_PERIOD seconds)
+OUTBOUND_CONCURRENCY = 8
+OUTBOUND_CLASS_CONCURRENCY = (8, 6, 4)
+OUTBOUND_CHANNEL_BURST = 5
+OUTBOUND_CHANNEL_PERIOD = 5.0
+
+# Extensions loaded by the bot, one per feature (see src/cogs). Removing one disables its feature.
+EXTENSIONS = (
+    "cogs.general",
+    "cogs.admin",
+    "cogs.welcome",
+    "cogs.role_react",
+    "cogs.voice",
+    "cogs.youtube",
+    "cogs.help_tickets",
+)
@@ -0,0 +1,103 @@
+import functools
+import time
+from collections.abc import Callable, Iterable
+
+from utils import settings
+
+
+class ShardMap:
+    """Which shards this process runs, and the guilds they own.
+
+    Per-guild state is partitioned by shard so that a process only loads
+    and serves the guilds of its own shards, and a shard's state can be
+    (re)loaded on its own when it connects. Also counts the gateway events
+    dispatched for each shard.
+    """
+
+    def __init__(self, shard_count : int = 1, shard_ids : list[int] | None = None):
+        self.shard_count : int = 1
+        self.shard_ids : list[int] = [0]
+        self.configure(shard_count, shard_ids)
+        self.events : dict[int, int] = {}
+        self._window_start : float = time.monotonic()
+        self._window_events : dict[int, int] = {}
+        self._events_per_minute : dict[int, float] = {}
+
+    def configure(self, shard_count : int, shard_ids : list[int] | None = None) -> None:
+        """Sets the total number of shards and the ones run by this process, all of them if not specified."""
+        self.shard_count = max(1, int(shard_count))
+        self.shard_ids = sorted(shard_ids) if shard_ids is not None else list(range(self.shard_count))
+        self._local : frozenset[int] = frozenset(self.shard_ids)
+
+    def shard_of(self, guild_id : int) -> int:
+        """Gets the shard Discord routes a guild's events to."""
+        return (int(guild_id) >> 22) % self.shard_count
+
+    def is_local(self, guild_id : int) -> bool:
+        """Checks whether a guild belongs to a shard run by this process."""
+        return (int(guild_id) >> 22) % self.shard_count in self._local
+
+    def local(self, guild_ids : Iterable[int]) -> list[int]:
+        """Filters the guilds belonging to the shards run by this process."""
+        return [guild_id for guild_id in guild_ids if self.is_local(guild_id)]
+
+    def partition(self, guild_ids : Iterable[int]) -> dict[int, list[int]]:
+        """Groups the local guilds by shard."""
+        shards : dict[int, list[int]] = {shard_id: [] for shard_id in self.shard_ids}
+        for guild_id in guild_ids:
+            shard : list[int] | None = shards.get(self.shard_of(guild_id))
+            if shard is not None:
+                shard.append(int(guild_id))
+        return shards
+
+    def record_event(self, guild_id : int) -> None:
+        shard_id : int = self.shard_of(guild_id)
+        self.events[shard_id] = self.events.get(shard_id, 0) + 1
+        self._window_events[shard_id] = self._window_events.get(shard_id, 0) + 1
+        now : float = time.monotonic()
+        if now - self._window_start >= settings.SHARD_EVENT_RATE_WINDOW:
+            self._events_per_minute = {shard: count * 60 / (now - self._window_start) for shard, count in self._window_events.items()}
+            self._window_events = {}
+            self._window_start = now
+
+    def count_events(self, bot) -> None:
+        """Counts every event the bot dispatches for a guild, against the guild's shard.
+
+        Must be called before the bot connects, the gateway's events being dispatched
+        through the connection state's reference to the bot's dispatch.
+
+        Args:
+            bot (discord.Client): The bot.
+        """
+        dispatch : Callable[..., None] = bot.dispatch
+
+        @functools.wraps(dispatch)
+        def counted_dispatch(event_name : str, *args, **kwargs) -> None:
+            if args:
+                guild_id : int | None = getattr(args[0], "guild_id", None)
+                if guild_id is None:
+                    guild = args[0] if hasattr(args[0], "shard_id") else getattr(args[0], "guild", None)
+                    guild_id = getattr(guild, "id", None)
+                if guild_id is not None:
+                    self.record_event(guild_id)
+            dispatch(event_name, *args, **kwargs)
+        bot.dispatch = counted_dispatch
+        bot._connection.dispatch = counted_dispatch
+
+    def stats(self, latencies : list[tuple[int, float]] = ()) -> dict[str, float]:
+        """Gets the latency, events and events per minute of each local shard.
+
+        Args:
+            latencies (list[tuple[int, float]]): Shards' latencies, as given by the bot's latencies.
+        """
+        latency_of : dict[int, float] = dict(latencies)
+        stats : dict[str, float] = {"shard_count": self.shard_count, "local_shards": len(self.shard_ids)}
+        for shard_id in self.shard_ids:
+            if shard_id in latency_of:
+                stats[f"shard_{shard_id}_latency_ms"] = latency_of[shard_id] * 1000
+            stats[f"shard_{shard_id}_events"] = self.events.get(shard_id, 0)
+            stats[f"shard_{shard_id}_events_per_minute"] = self._events_per_minute.get(shard_id, 0.0)
+        return stats
+
+
+shard_map : ShardMap = ShardMap(settings.SHARD_COUNT or 1, settings.SHARD_IDS)
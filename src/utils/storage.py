@@ -0,0 +1,396 @@
+import abc
+import json
+import os
+import shutil
+import sqlite3
+import threading
+
+from utils import settings
+
+
+class StorageBackend(abc.ABC):
+    """Persistent storage of the servers' state: config, temporary voice channels and welcome background.
+
+    Backends implement every abstract method, close() is optional.
+    """
+
+    @abc.abstractmethod
+    def server_ids(self) -> list[int]:
+        """Lists the IDs of every stored server."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def has_server(self, server_id : int) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def create_server(self, server_id : int, config : dict[str, any]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete_server(self, server_id : int) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def load_config(self, server_id : int) -> dict[str, any]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_config(self, server_id : int, config : dict[str, any]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def load_temp_channels(self, server_id : int) -> set[int]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add_temp_channel(self, server_id : int, channel_id : int) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def remove_temp_channel(self, server_id : int, channel_id : int) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def replace_temp_channels(self, server_id : int, channel_ids : set[int]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_welcome_background(self, server_id : int, data : bytes) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def load_welcome_background(self, server_id : int) -> bytes | None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def welcome_background_path(self, server_id : int) -> str | None:
+        """Gets a file path of a server's welcome background, for PIL and the render workers.
+
+        Returns:
+            str | None: The path, None if the server has no custom background.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonTreeBackend(StorageBackend):
+    """The historical layout: one data/servers/<id>/ folder per server.
+
+    Each folder holds config.json, temp_voice_channels.txt (an append-only
+    journal of "+<id>"/"-<id>" lines, compacted once it grows
+    TEMP_VOICE_JOURNAL_SLACK lines longer than the live set) and welcome_background.jpg.
+    """
+
+    def __init__(self, servers_path : str = settings.SERVERS_PATH):
+        self.servers_path : str = servers_path
+        self._journal_lines : dict[int, int] = {}
+        self._live_channels : dict[int, set[int]] = {}
+        os.makedirs(servers_path, exist_ok=True)
+
+    def _folder(self, server_id : int) -> str:
+        return f'{self.servers_path}/{server_id}'
+
+    def server_ids(self) -> list[int]:
+        return [int(server_id) for server_id in os.listdir(self.servers_path) if server_id.isdigit()]
+
+    def has_server(self, server_id : int) -> bool:
+        return os.path.exists(f'{self._folder(server_id)}/config.json')
+
+    def create_server(self, server_id : int, config : dict[str, any]) -> None:
+        os.makedirs(self._folder(server_id), exist_ok=True)
+        self.save_config(server_id, config)
+        with open(f'{self._folder(server_id)}/temp_voice_channels.txt', 'w', encoding='utf-8') as file:
+            file.write('')
+
+    def delete_server(self, server_id : int) -> None:
+        self._journal_lines.pop(server_id, None)
+        self._live_channels.pop(server_id, None)
+        shutil.rmtree(self._folder(server_id), ignore_errors=True)
+
+    def load_config(self, server_id : int) -> dict[str, any]:
+        with open(f'{self._folder(server_id)}/config.json', 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def save_config(self, server_id : int, config : dict[str, any]) -> None:
+        # Written next to the config then renamed, so a crash mid-write never leaves a truncated config.
+        temp_path : str = f'{self._folder(server_id)}/config.json.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(config, file, separators=(',', ':'), ensure_ascii=False)
+        os.replace(temp_path, f'{self._folder(server_id)}/config.json')
+
+    def _journal_path(self, server_id : int) -> str:
+        return f'{self._folder(server_id)}/temp_voice_channels.txt'
+
+    def load_temp_channels(self, server_id : int) -> set[int]:
+        channels : set[int] = set()
+        lines : int = 0
+        if os.path.exists(self._journal_path(server_id)):
+            with open(self._journal_path(server_id), 'r', encoding='utf-8') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    lines += 1
+                    if line.startswith('-'):
+                        channels.discard(int(line[1:]))
+                    else:
+                        channels.add(int(line.lstrip('+')))
+        self._journal_lines[server_id] = lines
+        self._live_channels[server_id] = set(channels)
+        return channels
+
+    def _append(self, server_id : int, line : str) -> None:
+        with open(self._journal_path(server_id), 'a', encoding='utf-8') as file:
+            file.write(f'{line}\n')
+        self._journal_lines[server_id] += 1
+        if self._journal_lines[server_id] > len(self._live_channels[server_id]) + settings.TEMP_VOICE_JOURNAL_SLACK:
+            self.replace_temp_channels(server_id, self._live_channels[server_id])
+
+    def add_temp_channel(self, server_id : int, channel_id : int) -> None:
+        if server_id not in self._live_channels:
+            self.load_temp_channels(server_id)
+        self._live_channels[server_id].add(channel_id)
+        self._append(server_id, f'+{channel_id}')
+
+    def remove_temp_channel(self, server_id : int, channel_id : int) -> None:
+        if server_id not in self._live_channels:
+            self.load_temp_channels(server_id)
+        self._live_channels[server_id].discard(channel_id)
+        self._append(server_id, f'-{channel_id}')
+
+    def replace_temp_channels(self, server_id : int, channel_ids : set[int]) -> None:
+        """Compacts the journal of a server down to the given live channels."""
+        temp_path : str = f'{self._journal_path(server_id)}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.writelines(f'+{channel_id}\n' for channel_id in channel_ids)
+        os.replace(temp_path, self._journal_path(server_id))
+        self._journal_lines[server_id] = len(channel_ids)
+        self._live_channels[server_id] = set(channel_ids)
+
+    def save_welcome_background(self, server_id : int, data : bytes) -> None:
+        with open(f'{self._folder(server_id)}/welcome_background.jpg', 'wb') as file:
+            file.write(data)
+
+    def load_welcome_background(self, server_id : int) -> bytes | None:
+        path : str | None = self.welcome_background_path(server_id)
+        if path is None:
+            return None
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def welcome_background_path(self, server_id : int) -> str | None:
+        path : str = f'{self._folder(server_id)}/welcome_background.jpg'
+        return path if os.path.exists(path) else None
+
+
+class SqliteBackend(StorageBackend):
+    """Every server in one SQLite database, in WAL mode.
+
+    Role reacts, youtube subscriptions, temporary voice channels and help
+    channels get their own indexed tables, the rest of the config is kept
+    as JSON. Welcome backgrounds are stored as blobs and extracted to
+    cache_path when a file is needed.
+
+    The connection can be used from any thread, e.g. by the config store's
+    write-behind, one at a time. Several processes sharing the database
+    must serialize their writes, as SQLite has a single writer.
+    """
+
+    SCHEMA : str = """
+        CREATE TABLE IF NOT EXISTS servers (
+            server_id INTEGER PRIMARY KEY,
+            config TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS role_reacts (
+            server_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            emoji TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            PRIMARY KEY (server_id, message_id, emoji)
+        );
+        CREATE TABLE IF NOT EXISTS youtube_subscriptions (
+            server_id INTEGER NOT NULL,
+            youtube_channel_id TEXT NOT NULL,
+            last_video_id TEXT,
+            PRIMARY KEY (server_id, youtube_channel_id)
+        );
+        CREATE INDEX IF NOT EXISTS youtube_subscriptions_channel ON youtube_subscriptions (youtube_channel_id);
+        CREATE TABLE IF NOT EXISTS temp_voice_channels (
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            PRIMARY KEY (server_id, channel_id)
+        );
+        CREATE TABLE IF NOT EXISTS help_channels (
+            server_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            PRIMARY KEY (server_id, channel_id)
+        );
+        CREATE TABLE IF NOT EXISTS welcome_backgrounds (
+            server_id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL
+        );
+    """
+    SERVER_TABLES : tuple[str, ...] = ("servers", "role_reacts", "youtube_subscriptions", "temp_voice_channels", "help_channels", "welcome_backgrounds")
+
+    def __init__(self, path : str = settings.SQLITE_PATH, cache_path : str = settings.STORAGE_CACHE_PATH):
+        self.path : str = path
+        self.cache_path : str = cache_path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection : sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        # The connection is shared by the threads of asyncio.to_thread()
+        self._lock : threading.Lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+
+    def server_ids(self) -> list[int]:
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT server_id FROM servers")]
+
+    def has_server(self, server_id : int) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM servers WHERE server_id = ?", (server_id,)).fetchone() is not None
+
+    def create_server(self, server_id : int, config : dict[str, any]) -> None:
+        self.save_config(server_id, config)
+
+    def delete_server(self, server_id : int) -> None:
+        with self._lock, self._connection:
+            for table in self.SERVER_TABLES:
+                self._connection.execute(f"DELETE FROM {table} WHERE server_id = ?", (server_id,))
+        path : str = f'{self.cache_path}/{server_id}_welcome_background.jpg'
+        if os.path.exists(path):
+            os.remove(path)
+
+    def load_config(self, server_id : int) -> dict[str, any]:
+        with self._lock:
+            row : tuple[str] | None = self._connection.execute("SELECT config FROM servers WHERE server_id = ?", (server_id,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"No config stored for server {server_id}")
+            config : dict[str, any] = json.loads(row[0])
+
+            config["role_react"] = {}
+            for message_id, emoji, role_id in self._connection.execute("SELECT message_id, emoji, role_id FROM role_reacts WHERE server_id = ?", (server_id,)):
+                config["role_react"].setdefault(str(message_id), {})[emoji] = str(role_id)
+            config["youtube_survey"]["youtube_channels_id"] = {
+                youtube_channel_id: last_video_id
+                for youtube_channel_id, last_video_id in self._connection.execute("SELECT youtube_channel_id, last_video_id FROM youtube_subscriptions WHERE server_id = ?", (server_id,))
+            }
+            config["help_system"]["channels_id"] = {
+                str(channel_id): str(role_id)
+                for channel_id, role_id in self._connection.execute("SELECT channel_id, role_id FROM help_channels WHERE server_id = ?", (server_id,))
+            }
+        return config
+
+    def save_config(self, server_id : int, config : dict[str, any]) -> None:
+        rest : dict[str, any] = {key: value for key, value in config.items() if key != "role_react"}
+        rest["youtube_survey"] = {key: value for key, value in config["youtube_survey"].items() if key != "youtube_channels_id"}
+        rest["help_system"] = {key: value for key, value in config["help_system"].items() if key != "channels_id"}
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO servers (server_id, config) VALUES (?, ?)", (server_id, json.dumps(rest, separators=(',', ':'))))
+            self._connection.execute("DELETE FROM role_reacts WHERE server_id = ?", (server_id,))
+            self._connection.executemany(
+                "INSERT INTO role_reacts (server_id, message_id, emoji, role_id) VALUES (?, ?, ?, ?)",
+                [(server_id, int(message_id), emoji, int(role_id)) for message_id, emojis in config["role_react"].items() for emoji, role_id in emojis.items()]
+            )
+            self._connection.execute("DELETE FROM youtube_subscriptions WHERE server_id = ?", (server_id,))
+            self._connection.executemany(
+                "INSERT INTO youtube_subscriptions (server_id, youtube_channel_id, last_video_id) VALUES (?, ?, ?)",
+                [(server_id, youtube_channel_id, last_video_id) for youtube_channel_id, last_video_id in config["youtube_survey"]["youtube_channels_id"].items()]
+            )
+            self._connection.execute("DELETE FROM help_channels WHERE server_id = ?", (server_id,))
+            self._connection.executemany(
+                "INSERT INTO help_channels (server_id, channel_id, role_id) VALUES (?, ?, ?)",
+                [(server_id, int(channel_id), int(role_id)) for channel_id, role_id in config["help_system"]["channels_id"].items()]
+            )
+
+    def load_temp_channels(self, server_id : int) -> set[int]:
+        with self._lock:
+            return {row[0] for row in self._connection.execute("SELECT channel_id FROM temp_voice_channels WHERE server_id = ?", (server_id,))}
+
+    def add_temp_channel(self, server_id : int, channel_id : int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR IGNORE INTO temp_voice_channels (server_id, channel_id) VALUES (?, ?)", (server_id, channel_id))
+
+    def remove_temp_channel(self, server_id : int, channel_id : int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM temp_voice_channels WHERE server_id = ? AND channel_id = ?", (server_id, channel_id))
+
+    def replace_temp_channels(self, server_id : int, channel_ids : set[int]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM temp_voice_channels WHERE server_id = ?", (server_id,))
+            self._connection.executemany("INSERT INTO temp_voice_channels (server_id, channel_id) VALUES (?, ?)", [(server_id, channel_id) for channel_id in channel_ids])
+
+    def save_welcome_background(self, server_id : int, data : bytes) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO welcome_backgrounds (server_id, data) VALUES (?, ?)", (server_id, data))
+        path : str = f'{self.cache_path}/{server_id}_welcome_background.jpg'
+        if os.path.exists(path):
+            os.remove(path)
+
+    def load_welcome_background(self, server_id : int) -> bytes | None:
+        with self._lock:
+            row : tuple[bytes] | None = self._connection.execute("SELECT data FROM welcome_backgrounds WHERE server_id = ?", (server_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def welcome_background_path(self, server_id : int) -> str | None:
+        path : str = f'{self.cache_path}/{server_id}_welcome_background.jpg'
+        if not os.path.exists(path):
+            data : bytes | None = self.load_welcome_background(server_id)
+            if data is None:
+                return None
+            os.makedirs(self.cache_path, exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(data)
+        return path
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def create_backend(name : str = settings.STORAGE_BACKEND) -> StorageBackend:
+    """Creates the storage backend named in the settings.
+
+    Args:
+        name (str): "json" or "sqlite".
+    """
+    if name == "json":
+        return JsonTreeBackend()
+    if name == "sqlite":
+        return SqliteBackend()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+def migrate(source : StorageBackend, destination : StorageBackend) -> int:
+    """Copies every server from a backend to another.
+
+    Args:
+        source (StorageBackend): Backend to read from.
+        destination (StorageBackend): Backend to write to.
+
+    Returns:
+        int: Number of servers migrated.
+    """
+    server_ids : list[int] = source.server_ids()
+    for server_id in server_ids:
+        destination.create_server(server_id, source.load_config(server_id))
+        destination.replace_temp_channels(server_id, source.load_temp_channels(server_id))
+        background : bytes | None = source.load_welcome_background(server_id)
+        if background is not None:
+            destination.save_welcome_background(server_id, background)
+    return len(server_ids)
+
+
+_storage : StorageBackend | None = None
+
+
+def get_storage() -> StorageBackend:
+    """Gets the bot's storage backend, built on first use so that importing this module creates no files."""
+    global _storage
+    if _storage is None:
+        _storage = create_backend()
+    return _storage
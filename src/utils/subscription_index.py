@@ -0,0 +1,89 @@
+from utils.config_store import config_store
+from utils.sharding import ShardMap, shard_map
+
+
+class SubscriptionIndex:
+    """Global index from each watched youtube channel to the servers watching it.
+
+    Lets every feed be fetched once per cycle and fanned out to all its
+    subscribers, instead of once per server.
+    The index is partitioned by shard, only the local shards are loaded, so
+    the youtube survey only watches and announces for the local servers.
+    """
+
+    def __init__(self, shards : ShardMap = shard_map):
+        self.shards : ShardMap = shards
+        self._servers : dict[int, dict[str, set[int]]] = {}
+
+    def build(self) -> None:
+        """Rebuilds the index from the config of every server of the local shards."""
+        self._servers.clear()
+        for server_id in self.shards.local(config_store.server_ids()):
+            self.load_server(server_id)
+
+    def load_shard(self, shard_id : int) -> None:
+        """(Re)loads the youtube channels watched by every server of a shard, e.g. when it gets ready.
+
+        Args:
+            shard_id (int): Shard's ID.
+        """
+        self.remove_shard(shard_id)
+        for server_id in self.shards.partition(config_store.server_ids()).get(shard_id, []):
+            self.load_server(server_id)
+
+    def remove_shard(self, shard_id : int) -> None:
+        self._servers.pop(shard_id, None)
+
+    def load_server(self, server_id : int) -> None:
+        """Indexes every youtube channel watched by a server.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        self.remove_server(server_id)
+        for ytb_channel_id in config_store.get(server_id)["youtube_survey"]["youtube_channels_id"]:
+            self.add(server_id, ytb_channel_id)
+
+    def add(self, server_id : int, ytb_channel_id : str) -> None:
+        self._servers.setdefault(self.shards.shard_of(server_id), {}).setdefault(ytb_channel_id, set()).add(int(server_id))
+
+    def remove(self, server_id : int, ytb_channel_id : str) -> None:
+        shard_servers : dict[str, set[int]] = self._servers.get(self.shards.shard_of(server_id), {})
+        servers : set[int] | None = shard_servers.get(ytb_channel_id)
+        if servers is not None:
+            servers.discard(int(server_id))
+            if not servers:
+                del shard_servers[ytb_channel_id]
+
+    def remove_server(self, server_id : int) -> None:
+        shard_servers : dict[str, set[int]] = self._servers.get(self.shards.shard_of(server_id), {})
+        for ytb_channel_id in [ytb_channel_id for ytb_channel_id, servers in shard_servers.items() if int(server_id) in servers]:
+            self.remove(server_id, ytb_channel_id)
+
+    def channels(self) -> set[str]:
+        """Gets the IDs of every youtube channel watched by a server of the local shards."""
+        channels : set[str] = set()
+        for shard_servers in self._servers.values():
+            channels.update(shard_servers)
+        return channels
+
+    def subscribers(self, ytb_channel_id : str) -> list[tuple[int, int | None, str | None]]:
+        """Gets the servers of the local shards watching a youtube channel.
+
+        Args:
+            ytb_channel_id (str): Youtube channel's ID.
+
+        Returns:
+            list[tuple[int, int | None, str | None]]: Server's ID, ID of the discord channel where
+            videos are announced and ID of the last video announced, for each subscriber.
+        """
+        subscribers : list[tuple[int, int | None, str | None]] = []
+        for shard_servers in self._servers.values():
+            for server_id in shard_servers.get(ytb_channel_id, ()):
+                youtube_survey : dict[str, any] = config_store.get(server_id)["youtube_survey"]
+                discord_channel_id : int | None = int(youtube_survey["channel_id"]) if youtube_survey["channel_id"] else None
+                subscribers.append((server_id, discord_channel_id, youtube_survey["youtube_channels_id"].get(ytb_channel_id)))
+        return subscribers
+
+
+subscription_index : SubscriptionIndex = SubscriptionIndex()
@@ -0,0 +1,98 @@
+import discord
+
+from utils.config_store import config_store
+from utils.storage import StorageBackend, get_storage
+
+
+class TempVoiceRegistry:
+    """In-memory registry of the temporary voice channels and join-to-create hubs of each server.
+
+    Live temporary channels are persisted through the storage backend, see
+    JsonTreeBackend for the append-only journal of the historical layout.
+    """
+
+    def __init__(self, backend : StorageBackend | None = None):
+        self._backend : StorageBackend | None = backend
+        self._channels : dict[int, set[int]] = {}
+        self._hubs : dict[int, set[int]] = {}
+
+    @property
+    def backend(self) -> StorageBackend:
+        """Storage backend, the bot's one unless another was given."""
+        if self._backend is None:
+            self._backend = get_storage()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend : StorageBackend) -> None:
+        self._backend = backend
+
+    def _load(self, server_id : int) -> set[int]:
+        channels : set[int] | None = self._channels.get(server_id)
+        if channels is None:
+            channels = self._channels[server_id] = self.backend.load_temp_channels(server_id)
+        return channels
+
+    def contains(self, server_id : int, channel_id : int) -> bool:
+        """Checks whether a channel is a temporary voice channel."""
+        return channel_id in self._load(server_id)
+
+    def add(self, server_id : int, channel_id : int) -> None:
+        self._load(server_id).add(channel_id)
+        self.backend.add_temp_channel(server_id, channel_id)
+
+    def remove(self, server_id : int, channel_id : int) -> None:
+        channels : set[int] = self._load(server_id)
+        if channel_id in channels:
+            channels.discard(channel_id)
+            self.backend.remove_temp_channel(server_id, channel_id)
+
+    def is_hub(self, server_id : int, channel_id : int) -> bool:
+        """Checks whether a channel is a join-to-create hub."""
+        hubs : set[int] | None = self._hubs.get(server_id)
+        if hubs is None:
+            hubs = self.load_hubs(server_id)
+        return channel_id in hubs
+
+    def load_hubs(self, server_id : int) -> set[int]:
+        """(Re)loads the join-to-create hubs of a server from its config.
+
+        Args:
+            server_id (int): Server's ID.
+        """
+        hubs : set[int] = {int(channel_id) for channel_id in config_store.get(server_id)["join_to_create_channel_system"]["join_to_create_channels_id"]}
+        self._hubs[server_id] = hubs
+        return hubs
+
+    def forget(self, server_id : int) -> None:
+        """Forgets everything about a server, e.g. when the bot leaves it."""
+        self._channels.pop(server_id, None)
+        self._hubs.pop(server_id, None)
+
+    async def reconcile(self, guild : discord.Guild, keep : set[int] = frozenset()) -> None:
+        """Deletes the empty temporary channels left over while the bot was offline and drops stale IDs.
+
+        Args:
+            guild (discord.Guild): The server to reconcile.
+            keep (set[int], optional): Channels kept even if empty, e.g. the spares of the warm pools.
+        """
+        channels : set[int] = self._load(guild.id)
+        for channel_id in list(channels):
+            channel : discord.abc.GuildChannel | None = guild.get_channel(channel_id)
+            if channel is None:
+                channels.discard(channel_id)
+            elif channel_id in keep:
+                continue
+            elif isinstance(channel, discord.VoiceChannel) and len(channel.members) == 0:
+                try:
+                    await channel.delete()
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as error:
+                    print(f"Failed to delete orphaned voice channel {channel_id} on {guild.name} ({guild.id}): {error}")
+                    continue
+                channels.discard(channel_id)
+        self.backend.replace_temp_channels(guild.id, channels)
+
+
+temp_voice_registry : TempVoiceRegistry = TempVoiceRegistry()
@@ -2,4 +2,6 @@
 
 # API Keys
 TYR_BOT_TOKEN = "YOUR_BOT_TOKEN"
-YOUTUBE_API_KEY = "YOUR_YOUTUBE_API_KEY"
\ No newline at end of file
+YOUTUBE_API_KEY = "YOUR_YOUTUBE_API_KEY"
+# Random string of your own, WebSub stays disabled while it is empty
+WEBSUB_SECRET = ""
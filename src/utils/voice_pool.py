@@ -0,0 +1,108 @@
+import asyncio
+
+import discord
+
+from utils import settings
+from utils.config_store import config_store
+from utils.temp_voice_registry import temp_voice_registry
+
+
+class VoiceChannelPool:
+    """Pools of hidden spare voice channels, pre-created for each join-to-create hub.
+
+    A member joining a hub gets a spare renamed and opened to them in one
+    request, then is moved in, instead of waiting for a channel creation.
+    Pools are refilled in the background. Their size is set per hub in
+    the "warm_pool_sizes" of the server's join-to-create config, 0 disables it.
+    """
+
+    def __init__(self):
+        self._spares : dict[int, list[int]] = {}
+        self._refills : dict[int, asyncio.Task] = {}
+        self.hits : dict[int, int] = {}
+        self.misses : dict[int, int] = {}
+
+    def size(self, server_id : int, hub_id : int) -> int:
+        """Gets the configured pool size of a hub."""
+        return int(config_store.get(server_id)["join_to_create_channel_system"].get("warm_pool_sizes", {}).get(str(hub_id), 0))
+
+    async def take(self, member : discord.Member, hub : discord.VoiceChannel, name : str, member_overwrite : discord.PermissionOverwrite) -> discord.VoiceChannel | None:
+        """Gives a spare channel of a hub to a member.
+
+        Args:
+            member (discord.Member): The member who joined the hub.
+            hub (discord.VoiceChannel): The join-to-create hub.
+            name (str): Name of the member's channel.
+            member_overwrite (discord.PermissionOverwrite): Permissions of the member in their channel.
+
+        Returns:
+            discord.VoiceChannel | None: The channel, None if the pool is empty.
+        """
+        if self.size(member.guild.id, hub.id) <= 0:
+            return None
+        spares : list[int] = self._spares.setdefault(hub.id, [])
+        channel : discord.VoiceChannel | None = None
+        while spares and channel is None:
+            channel = member.guild.get_channel(spares.pop())
+
+        self.refill(hub)
+        if channel is None:
+            self.misses[hub.id] = self.misses.get(hub.id, 0) + 1
+            return None
+        self.hits[hub.id] = self.hits.get(hub.id, 0) + 1
+
+        overwrites : dict = dict(hub.category.overwrites) if hub.category else {}
+        overwrites[member] = member_overwrite
+        await channel.edit(name=name, overwrites=overwrites)
+        return channel
+
+    def spare_ids(self) -> set[int]:
+        """Gets the IDs of every spare channel ready, which must not be deleted as empty temporary channels."""
+        return {channel_id for spares in self._spares.values() for channel_id in spares}
+
+    def refill(self, hub : discord.VoiceChannel) -> None:
+        """Refills the pool of a hub in the background."""
+        task : asyncio.Task | None = self._refills.get(hub.id)
+        if task is None or task.done():
+            self._refills[hub.id] = asyncio.create_task(self._refill(hub))
+
+    async def _refill(self, hub : discord.VoiceChannel) -> None:
+        guild : discord.Guild = hub.guild
+        spares : list[int] = self._spares.setdefault(hub.id, [])
+        overwrites : dict = dict(hub.category.overwrites) if hub.category else {}
+        overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=False)
+        overwrites[guild.me] = discord.PermissionOverwrite(view_channel=True, connect=True, manage_channels=True)
+        while len(spares) < self.size(guild.id, hub.id):
+            try:
+                channel : discord.VoiceChannel = await guild.create_voice_channel(name=settings.VOICE_POOL_SPARE_NAME, category=hub.category, overwrites=overwrites)
+            except discord.HTTPException as error:
+                print(f"Failed to create a spare voice channel on {guild.name} ({guild.id}): {error}")
+                return
+            temp_voice_registry.add(guild.id, channel.id)
+            spares.append(channel.id)
+
+    async def drain(self, guild : discord.Guild, hub_id : int) -> None:
+        """Deletes the spare channels of a hub, e.g. when it is no longer a join-to-create channel."""
+        task : asyncio.Task | None = self._refills.pop(hub_id, None)
+        if task is not None:
+            task.cancel()
+        for channel_id in self._spares.pop(hub_id, []):
+            channel : discord.abc.GuildChannel | None = guild.get_channel(channel_id)
+            if channel is not None:
+                try:
+                    await channel.delete()
+                except discord.HTTPException:
+                    continue
+            temp_voice_registry.remove(guild.id, channel_id)
+
+    def stats(self, hub_id : int | None = None) -> dict[str, int]:
+        """Gets the spare channels ready, hits and misses, of a hub or of all of them."""
+        hub_ids : list[int] = [hub_id] if hub_id is not None else list(self._spares)
+        return {
+            "spares": sum(len(self._spares.get(hub, [])) for hub in hub_ids),
+            "hits": sum(self.hits.get(hub, 0) for hub in hub_ids),
+            "misses": sum(self.misses.get(hub, 0) for hub in hub_ids),
+        }
+
+
+voice_pool : VoiceChannelPool = VoiceChannelPool()
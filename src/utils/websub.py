@@ -0,0 +1,194 @@
+import asyncio
+import calendar
+import hashlib
+import hmac
+import time
+import urllib.parse
+from collections.abc import Awaitable, Callable
+
+import aiohttp
+import feedparser
+from aiohttp import web
+
+from utils import settings
+
+
+class WebSubReceiver:
+    """Receives youtube's push notifications through a WebSub hub.
+
+    Runs a small HTTP endpoint, subscribes every watched channel to the hub,
+    answers the hub's verification challenges and forwards the pushed Atom
+    feeds to on_feeds. A channel is only considered pushed while its lease
+    is valid, the other ones must keep being polled. Notifications not signed
+    with the subscriptions' secret are dropped, so a secret is required.
+
+    The hub also pushes the edits of older videos. Only entries published
+    after the newest video seen for their channel are forwarded. The polled
+    feeds are passed to observe(), so the channels polled since a restart,
+    until their lease is verified, aren't rolled back by a pushed edit either.
+
+    Raises:
+        ValueError: The secret is empty.
+    """
+
+    def __init__(
+        self,
+        on_feeds : Callable[[aiohttp.ClientSession, dict[str, feedparser.FeedParserDict]], Awaitable[None]],
+        secret : str,
+        callback_url : str = settings.WEBSUB_CALLBACK_URL,
+        hub_url : str = settings.WEBSUB_HUB_URL,
+        topic_template : str = settings.WEBSUB_TOPIC_TEMPLATE,
+        lease_seconds : int = settings.WEBSUB_LEASE_SECONDS
+    ):
+        if not secret:
+            raise ValueError("WebSub needs a secret, without it anyone could push fake videos to the receiver")
+        self.on_feeds : Callable[[aiohttp.ClientSession, dict[str, feedparser.FeedParserDict]], Awaitable[None]] = on_feeds
+        self.callback_url : str = callback_url
+        self.secret : str = secret
+        self.hub_url : str = hub_url
+        self.topic_template : str = topic_template
+        self.lease_seconds : int = lease_seconds
+        self._leases : dict[str, float] = {}
+        self._wanted : set[str] = set()
+        self._newest : dict[str, float] = {}
+        self._session : aiohttp.ClientSession | None = None
+        self._runner : web.AppRunner | None = None
+        self.notifications : int = 0
+        self.rejected_notifications : int = 0
+        self.ignored_entries : int = 0
+
+    def topic(self, channel_id : str) -> str:
+        return self.topic_template.format_map({"channel_id": channel_id})
+
+    def _channel_id(self, topic : str) -> str | None:
+        channel_ids : list[str] = urllib.parse.parse_qs(urllib.parse.urlparse(topic).query).get("channel_id", [])
+        return channel_ids[0] if channel_ids else None
+
+    def is_active(self, channel_id : str) -> bool:
+        """Checks whether a channel is currently pushed by the hub.
+
+        Args:
+            channel_id (str): Youtube channel's ID.
+        """
+        return self._leases.get(channel_id, 0.0) > time.time()
+
+    def observe(self, feeds : dict[str, feedparser.FeedParserDict]) -> None:
+        """Remembers the publication time of the newest video of each feed, e.g. the polled ones.
+
+        Args:
+            feeds (dict[str, feedparser.FeedParserDict]): Feeds by youtube channel's ID.
+        """
+        for channel_id, feed in feeds.items():
+            for entry in feed.entries:
+                if entry.get("published_parsed"):
+                    self._newest[channel_id] = max(self._newest.get(channel_id, 0.0), calendar.timegm(entry.published_parsed))
+
+    def app(self) -> web.Application:
+        """Builds the aiohttp application of the endpoint."""
+        app : web.Application = web.Application()
+        app.router.add_get("/websub", self.handle_verification)
+        app.router.add_post("/websub", self.handle_notification)
+        return app
+
+    async def start(self, host : str = settings.WEBSUB_HOST, port : int = settings.WEBSUB_PORT) -> None:
+        """Starts the endpoint."""
+        self._session = aiohttp.ClientSession()
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self) -> None:
+        """Stops the endpoint."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+        if self._session is not None:
+            await self._session.close()
+
+    async def handle_verification(self, request : web.Request) -> web.Response:
+        """Answers the hub's challenge confirming a (un)subscription."""
+        mode : str = request.query.get("hub.mode", "")
+        channel_id : str | None = self._channel_id(request.query.get("hub.topic", ""))
+        if channel_id is None or "hub.challenge" not in request.query:
+            return web.Response(status=400)
+
+        if mode == "subscribe" and channel_id in self._wanted:
+            self._leases[channel_id] = time.time() + int(request.query.get("hub.lease_seconds", self.lease_seconds))
+        elif mode == "unsubscribe" and channel_id not in self._wanted:
+            self._leases.pop(channel_id, None)
+        else:
+            return web.Response(status=404)
+        return web.Response(text=request.query["hub.challenge"])
+
+    async def handle_notification(self, request : web.Request) -> web.Response:
+        """Forwards a pushed Atom feed to on_feeds."""
+        body : bytes = await request.read()
+        signature : str = request.headers.get("X-Hub-Signature", "")
+        expected : str = "sha1=" + hmac.new(self.secret.encode(), body, hashlib.sha1).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            self.rejected_notifications += 1
+            # The hub must not retry a notification with a wrong signature.
+            return web.Response(status=202)
+
+        feed : feedparser.FeedParserDict = await asyncio.to_thread(feedparser.parse, body)
+        oldest : float = time.time() - settings.WEBSUB_MAX_ENTRY_AGE
+        feeds : dict[str, feedparser.FeedParserDict] = {}
+        for entry in feed.entries:
+            channel_id : str | None = entry.get("yt_channelid")
+            if channel_id not in self._wanted or not entry.get("published_parsed"):
+                continue
+            published : float = calendar.timegm(entry.published_parsed)
+            # Edits of old videos are pushed too, only uploads newer than the channel's newest video are announced.
+            if published < oldest or published <= self._newest.get(channel_id, 0.0):
+                self.ignored_entries += 1
+                continue
+            self._newest[channel_id] = published
+            feeds[channel_id] = feedparser.FeedParserDict(feed=feed.feed, entries=[entry])
+
+        self.notifications += 1
+        if feeds:
+            try:
+                await self.on_feeds(self._session, feeds)
+            except Exception as error:
+                print(f"Error while announcing pushed videos: {error}")
+        return web.Response(status=204)
+
+    async def _request(self, channel_id : str, mode : str) -> bool:
+        data : dict[str, str] = {
+            "hub.callback": self.callback_url,
+            "hub.topic": self.topic(channel_id),
+            "hub.mode": mode,
+            "hub.verify": "async",
+            "hub.lease_seconds": str(self.lease_seconds),
+            "hub.secret": self.secret,
+        }
+        try:
+            async with self._session.post(self.hub_url, data=data, timeout=aiohttp.ClientTimeout(total=settings.RSS_FETCH_TIMEOUT)) as response:
+                return response.status in (202, 204)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            print(f"Error while sending a WebSub {mode} request for {channel_id}: {error}")
+            return False
+
+    async def sync(self, channel_ids : set[str]) -> None:
+        """Subscribes new channels, renews leases about to lapse and unsubscribes unwatched channels.
+
+        Args:
+            channel_ids (set[str]): Youtube channels' IDs currently watched.
+        """
+        removed : set[str] = self._wanted - channel_ids
+        self._wanted = set(channel_ids)
+        renew_before : float = time.time() + settings.WEBSUB_RENEW_MARGIN
+        to_subscribe : list[str] = [channel_id for channel_id in channel_ids if self._leases.get(channel_id, 0.0) < renew_before]
+        await asyncio.gather(
+            *(self._request(channel_id, "subscribe") for channel_id in to_subscribe),
+            *(self._request(channel_id, "unsubscribe") for channel_id in removed)
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Gets the number of pushed channels and notifications received."""
+        return {
+            "watched": len(self._wanted),
+            "active_leases": sum(self.is_active(channel_id) for channel_id in self._wanted),
+            "notifications": self.notifications,
+            "rejected_notifications": self.rejected_notifications,
+            "ignored_entries": self.ignored_entries,
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+import discord
+
+from utils import settings
+
+
+class WelcomePipeline:
+    """Sends welcome cards, switching to grouped cards during join raids.
+
+    While a server gets more than `threshold` joins within `rate_window`
+    seconds, joining members are gathered and welcomed with one group card
+    every `batch_window` seconds instead of one card each.
+    """
+
+    def __init__(
+        self,
+        send_single : Callable[[discord.Member], Awaitable[None]],
+        send_batch : Callable[[discord.Guild, list[discord.Member]], Awaitable[None]],
+        threshold : int = settings.WELCOME_RAID_THRESHOLD,
+        rate_window : float = settings.WELCOME_RAID_WINDOW,
+        batch_window : float = settings.WELCOME_BATCH_WINDOW
+    ):
+        self.send_single : Callable[[discord.Member], Awaitable[None]] = send_single
+        self.send_batch : Callable[[discord.Guild, list[discord.Member]], Awaitable[None]] = send_batch
+        self.threshold : int = threshold
+        self.rate_window : float = rate_window
+        self.batch_window : float = batch_window
+        self._joins : dict[int, deque[float]] = {}
+        self._batches : dict[int, list[discord.Member]] = {}
+        self._flush_tasks : dict[int, asyncio.Task] = {}
+        self.switches_to_batch : int = 0
+        self.switches_to_single : int = 0
+        self.single_cards : int = 0
+        self.batch_cards : int = 0
+        self.batched_members : int = 0
+        self.skipped : int = 0
+        self.errors : int = 0
+
+    def _join_rate(self, server_id : int, now : float) -> int:
+        joins : deque[float] = self._joins.setdefault(server_id, deque())
+        while joins and joins[0] < now - self.rate_window:
+            joins.popleft()
+        return len(joins)
+
+    def is_batching(self, server_id : int) -> bool:
+        return server_id in self._batches
+
+    async def handle_join(self, member : discord.Member) -> None:
+        """Welcomes a member, alone or in the next group card.
+
+        Args:
+            member (discord.Member): The member who joined.
+        """
+        server_id : int = member.guild.id
+        if member.guild.system_channel is None:
+            # Nowhere to send the card, don't render it
+            self.skipped += 1
+            return
+        now : float = time.monotonic()
+        self._joins.setdefault(server_id, deque()).append(now)
+
+        if not self.is_batching(server_id) and self._join_rate(server_id, now) > self.threshold:
+            self._batches[server_id] = []
+            self.switches_to_batch += 1
+            print(f"Join raid detected on {member.guild.name} ({server_id}), welcome cards are now grouped.")
+
+        if self.is_batching(server_id):
+            self._batches[server_id].append(member)
+            if server_id not in self._flush_tasks:
+                self._flush_tasks[server_id] = asyncio.create_task(self._flush_later(member.guild))
+            return
+
+        self.single_cards += 1
+        await self.send_single(member)
+
+    async def _flush_later(self, guild : discord.Guild) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.batch_window)
+                members : list[discord.Member] = self._batches[guild.id]
+                self._batches[guild.id] = []
+                if members and guild.system_channel is None:
+                    self.skipped += len(members)
+                elif members:
+                    self.batch_cards += 1
+                    self.batched_members += len(members)
+                    try:
+                        await self.send_batch(guild, members)
+                    except Exception:
+                        # One failed card mustn't end the batching of the server, which would stay in batch mode
+                        self.errors += 1
+                        print(f"Failed to send a group welcome card on {guild.name} ({guild.id}):")
+                        traceback.print_exc()
+
+                if self._join_rate(guild.id, time.monotonic()) <= self.threshold and not self._batches[guild.id]:
+                    self.switches_to_single += 1
+                    print(f"Join raid over on {guild.name} ({guild.id}), welcome cards are sent one by one again.")
+                    return
+        finally:
+            # Whatever ends the task, the server goes back to single cards
+            self._batches.pop(guild.id, None)
+            self._flush_tasks.pop(guild.id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Gets the mode switches and cards sent counters."""
+        return {
+            "batching_servers": len(self._batches),
+            "switches_to_batch": self.switches_to_batch,
+            "switches_to_single": self.switches_to_single,
+            "single_cards": self.single_cards,
+            "batch_cards": self.batch_cards,
+            "batched_members": self.batched_members,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
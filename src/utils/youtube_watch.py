@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import json
+import os
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from utils import settings
+
+if TYPE_CHECKING:
+    import feedparser
+
+
+class FeedState:
+    """Polling state of a youtube channel's feed."""
+
+    def __init__(self, channel_id : str):
+        self.channel_id : str = channel_id
+        self.etag : str | None = None
+        self.last_modified : str | None = None
+        self.last_status : int | None = None
+        self.latest_video_id : str | None = None
+        self.last_upload_at : float | None = None
+        self.upload_gap : float | None = None
+        self.interval : float = settings.FEED_MIN_INTERVAL
+        self.next_due : float = 0.0
+
+async def fetch_feed(session : aiohttp.ClientSession, channel_id : str, semaphore : asyncio.Semaphore, url_template : str = settings.RSS_URL_TEMPLATE, state : FeedState | None = None) -> feedparser.FeedParserDict | None:
+    """Downloads and parses the RSS feed of a youtube channel.
+
+    The download uses the given session, the parsing runs in a thread so the event loop isn't blocked.
+    With a state, the request is conditional and an unchanged feed only costs a 304.
+
+    Args:
+        session (aiohttp.ClientSession): Session used for the download.
+        channel_id (str): Youtube channel's ID.
+        semaphore (asyncio.Semaphore): Bounds the number of concurrent downloads.
+        url_template (str, optional): Template of the feed's URL.
+        state (FeedState, optional): Polling state of the feed, its validators are used and updated.
+
+    Returns:
+        feedparser.FeedParserDict | None: The parsed feed, None if it couldn't be downloaded or didn't change.
+    """
+    headers : dict[str, str] = {}
+    if state is not None:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+    async with semaphore:
+        try:
+            async with session.get(url_template.format_map({"channel_id": channel_id}), headers=headers, timeout=aiohttp.ClientTimeout(total=settings.RSS_FETCH_TIMEOUT)) as response:
+                if state is not None:
+                    state.last_status = response.status
+                if response.status != 200:
+                    return None
+                if state is not None:
+                    state.etag = response.headers.get("ETag")
+                    state.last_modified = response.headers.get("Last-Modified")
+                data : bytes = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if state is not None:
+                state.last_status = None
+            return None
+    return await asyncio.to_thread(parse_feed, data)
+
+def parse_feed(data : bytes) -> feedparser.FeedParserDict:
+    """Parses a downloaded feed. feedparser is only imported by the first parse, which runs out of the event loop."""
+    import feedparser
+    return feedparser.parse(data)
+
+async def fetch_feeds(session : aiohttp.ClientSession, channel_ids : list[str], concurrency : int = settings.RSS_FETCH_CONCURRENCY, url_template : str = settings.RSS_URL_TEMPLATE, states : dict[str, FeedState] | None = None) -> dict[str, feedparser.FeedParserDict | None]:
+    """Downloads and parses the RSS feeds of several youtube channels concurrently.
+
+    Args:
+        session (aiohttp.ClientSession): Session used for the downloads.
+        channel_ids (list[str]): Youtube channels' IDs.
+        concurrency (int, optional): Maximum number of concurrent downloads.
+        url_template (str, optional): Template of the feeds' URL.
+        states (dict[str, FeedState], optional): Polling states of the feeds, for conditional requests.
+
+    Returns:
+        dict[str, feedparser.FeedParserDict | None]: The parsed feed of each channel, None for the failed or unchanged ones.
+    """
+    semaphore : asyncio.Semaphore = asyncio.Semaphore(concurrency)
+    states = states or {}
+    feeds = await asyncio.gather(*(fetch_feed(session, channel_id, semaphore, url_template, states.get(channel_id)) for channel_id in channel_ids))
+    return dict(zip(channel_ids, feeds))
+
+def latest_video_id(feed : feedparser.FeedParserDict | None) -> str | None:
+    """Gets the ID of the latest video of a feed, None if the feed is empty or missing."""
+    if not feed or not feed.entries:
+        return None
+    return feed.entries[0].link.split("v=")[-1]
+
+
+class FeedScheduler:
+    """Polls youtube feeds, each at an interval adapted to its upload frequency.
+
+    Feeds wait in a priority queue ordered by due time. A feed's interval
+    shrinks towards a fraction of its observed gap between uploads and grows
+    while nothing changes, between FEED_MIN_INTERVAL and FEED_MAX_INTERVAL.
+    A global budget caps the requests per minute and every interval gets a
+    random jitter so polls don't fire all at once.
+    """
+
+    def __init__(self, requests_per_minute : int = settings.FEED_REQUESTS_PER_MINUTE, url_template : str = settings.RSS_URL_TEMPLATE):
+        self.requests_per_minute : int = requests_per_minute
+        self.url_template : str = url_template
+        self.states : dict[str, FeedState] = {}
+        self._queue : list[tuple[float, str]] = []
+        self._tokens : float = float(requests_per_minute)
+        self._refilled_at : float = time.monotonic()
+        self._task : asyncio.Task | None = None
+        self.requests_sent : int = 0
+        self.not_modified : int = 0
+
+    def sync(self, channel_ids : set[str]) -> None:
+        """Starts polling new channels and forgets the ones no longer watched.
+
+        Args:
+            channel_ids (set[str]): Youtube channels' IDs currently watched.
+        """
+        for channel_id in channel_ids - self.states.keys():
+            state : FeedState = FeedState(channel_id)
+            state.next_due = time.monotonic()
+            self.states[channel_id] = state
+            heapq.heappush(self._queue, (state.next_due, channel_id))
+        for channel_id in self.states.keys() - channel_ids:
+            del self.states[channel_id]
+
+    def _refill(self, now : float) -> None:
+        self._tokens = min(float(self.requests_per_minute), self._tokens + (now - self._refilled_at) * self.requests_per_minute / 60)
+        self._refilled_at = now
+
+    def pop_due(self, now : float) -> list[str]:
+        """Pops the feeds due for a poll, within the request budget.
+
+        Args:
+            now (float): Current time, from time.monotonic().
+        """
+        self._refill(now)
+        due : list[str] = []
+        while self._queue and self._queue[0][0] <= now and self._tokens >= 1:
+            due_at, channel_id = heapq.heappop(self._queue)
+            state : FeedState | None = self.states.get(channel_id)
+            if state is None or state.next_due != due_at:
+                continue
+            self._tokens -= 1
+            due.append(channel_id)
+        return due
+
+    def reschedule(self, channel_id : str, feed : feedparser.FeedParserDict | None, now : float) -> None:
+        """Adapts the interval of a feed after a poll and queues its next one.
+
+        Args:
+            channel_id (str): Youtube channel's ID.
+            feed (feedparser.FeedParserDict | None): The parsed feed, None if unchanged or failed.
+            now (float): Current time, from time.monotonic().
+        """
+        state : FeedState | None = self.states.get(channel_id)
+        if state is None:
+            return
+        video_id : str | None = latest_video_id(feed)
+        if video_id is not None and video_id != state.latest_video_id:
+            if state.latest_video_id is not None and state.last_upload_at is not None:
+                gap : float = now - state.last_upload_at
+                state.upload_gap = gap if state.upload_gap is None else 0.7 * state.upload_gap + 0.3 * gap
+            state.latest_video_id = video_id
+            state.last_upload_at = now
+            target : float = state.upload_gap / 6 if state.upload_gap is not None else settings.FEED_MIN_INTERVAL
+            state.interval = min(max(target, settings.FEED_MIN_INTERVAL), settings.FEED_MAX_INTERVAL)
+        else:
+            state.interval = min(state.interval * 1.2, settings.FEED_MAX_INTERVAL)
+
+        jitter : float = random.uniform(-settings.FEED_JITTER, settings.FEED_JITTER) * state.interval
+        state.next_due = now + state.interval + jitter
+        heapq.heappush(self._queue, (state.next_due, channel_id))
+
+    async def run(self, get_channel_ids : Callable[[], set[str]], on_feeds : Callable[[aiohttp.ClientSession, dict[str, feedparser.FeedParserDict]], Awaitable[None]]) -> None:
+        """Polls the feeds forever.
+
+        Args:
+            get_channel_ids (Callable[[], set[str]]): Gives the youtube channels' IDs currently watched.
+            on_feeds (Callable): Called with the session and the feeds downloaded in full during a tick.
+        """
+        async with aiohttp.ClientSession() as session:
+            while True:
+                self.sync(get_channel_ids())
+                due : list[str] = self.pop_due(time.monotonic())
+                if due:
+                    feeds : dict[str, feedparser.FeedParserDict | None] = await fetch_feeds(session, due, url_template=self.url_template, states=self.states)
+                    now : float = time.monotonic()
+                    self.requests_sent += len(due)
+                    for channel_id, feed in feeds.items():
+                        state : FeedState | None = self.states.get(channel_id)
+                        if state is not None and state.last_status == 304:
+                            self.not_modified += 1
+                        self.reschedule(channel_id, feed, now)
+                    updated : dict[str, feedparser.FeedParserDict] = {channel_id: feed for channel_id, feed in feeds.items() if feed is not None}
+                    if updated:
+                        try:
+                            await on_feeds(session, updated)
+                        except Exception as error:
+                            print(f"Error while announcing new videos: {error}")
+
+                next_due : float = self._queue[0][0] - time.monotonic() if self._queue else settings.FEED_SCHEDULER_TICK
+                await asyncio.sleep(min(max(next_due, 1.0), settings.FEED_SCHEDULER_TICK))
+
+    def start(self, get_channel_ids : Callable[[], set[str]], on_feeds : Callable[[aiohttp.ClientSession, dict[str, feedparser.FeedParserDict]], Awaitable[None]]) -> None:
+        """Starts run() in a task, unless it is already running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(get_channel_ids, on_feeds))
+
+    def stop(self) -> None:
+        """Stops polling. The feeds' states are kept, so polling can resume where it left off."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict[str, float]:
+        """Gets the number of feeds, requests sent and 304 responses."""
+        return {
+            "feeds": len(self.states),
+            "requests_sent": self.requests_sent,
+            "not_modified": self.not_modified,
+            "budget_left": self._tokens,
+        }
+
+
+class ChannelNameCache:
+    """Persistent cache of youtube channels' names, with a TTL.
+
+    Missing names are resolved together, with one channels.list request
+    per 50 channels, so a polling cycle costs a few Data API units at most.
+    """
+
+    MAX_IDS_PER_REQUEST : int = 50
+
+    def __init__(self, path : str = settings.CHANNEL_NAMES_PATH, ttl : float = settings.CHANNEL_NAME_TTL, api_url : str = settings.YOUTUBE_API_URL):
+        self.path : str = path
+        # Held while saving, when the file is shared by several processes.
+        self.lock : Callable[[], contextlib.AbstractAsyncContextManager] = contextlib.nullcontext
+        self.ttl : float = ttl
+        self.api_url : str = api_url
+        self.api_requests : int = 0
+        self._names : dict[str, tuple[str, float]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self._names = {channel_id: (name, expires_at) for channel_id, (name, expires_at) in json.load(file).items()}
+
+    def get(self, channel_id : str) -> str | None:
+        """Gets the cached name of a channel, None if missing or expired."""
+        entry : tuple[str, float] | None = self._names.get(channel_id)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def remember(self, channel_id : str, name : str) -> None:
+        """Caches the name of a channel, e.g. the title of its RSS feed."""
+        self._names[channel_id] = (name, time.time() + self.ttl)
+
+    async def save(self) -> None:
+        """Persists the cache, merged with the names saved meanwhile by other processes."""
+        async with self.lock():
+            await asyncio.to_thread(self._merge_and_write)
+
+    def _merge_and_write(self) -> None:
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for channel_id, (name, expires_at) in json.load(file).items():
+                    if expires_at > self._names.get(channel_id, ("", 0.0))[1]:
+                        self._names[channel_id] = (name, expires_at)
+        temp_path : str = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(dict(self._names), file)
+        os.replace(temp_path, self.path)
+
+    async def resolve(self, session : aiohttp.ClientSession, channel_ids : set[str], api_key : str) -> dict[str, str | None]:
+        """Gets the names of several channels, requesting the missing ones from the youtube Data API.
+
+        Args:
+            session (aiohttp.ClientSession): Session used for the requests.
+            channel_ids (set[str]): Youtube channels' IDs.
+            api_key (str): Youtube Data API key.
+
+        Returns:
+            dict[str, str | None]: Name of each channel, None if it couldn't be resolved.
+        """
+        missing : list[str] = [channel_id for channel_id in channel_ids if self.get(channel_id) is None]
+        for start in range(0, len(missing), self.MAX_IDS_PER_REQUEST):
+            chunk : list[str] = missing[start:start + self.MAX_IDS_PER_REQUEST]
+            self.api_requests += 1
+            try:
+                async with session.get(f"{self.api_url}/channels", params={"part": "snippet", "id": ",".join(chunk), "key": api_key}, timeout=aiohttp.ClientTimeout(total=settings.RSS_FETCH_TIMEOUT)) as response:
+                    if response.status != 200:
+                        print(f"Youtube API answered {response.status} while resolving channels' names.")
+                        continue
+                    data : dict[str, any] = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                print(f"Error while resolving youtube channels' names: {error}")
+                continue
+            for item in data.get("items", []):
+                self.remember(item["id"], item["snippet"]["title"])
+        if missing:
+            await self.save()
+        return {channel_id: self.get(channel_id) for channel_id in channel_ids}
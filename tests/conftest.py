@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT : str = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+# The bot's paths, e.g. data/templates, are relative to the repository's root.
+os.chdir(ROOT)
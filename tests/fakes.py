@@ -0,0 +1,214 @@
+"""Lightweight stand-ins for the discord and aiohttp objects used by the bot's handlers.
+
+Every REST call the handlers make goes through a FakeHTTP, which counts
+it instead of reaching Discord, so the tests run offline.
+"""
+import asyncio
+import io
+import itertools
+from collections import Counter
+
+from PIL import Image
+
+_ids : itertools.count = itertools.count(900000000000000000)
+
+
+def new_id() -> int:
+    return next(_ids)
+
+
+class FakeHTTP:
+    """Counts the REST calls made through the fakes, optionally waiting like a real request."""
+
+    def __init__(self, latency : float = 0.0):
+        self.latency : float = latency
+        self.calls : Counter = Counter()
+
+    async def request(self, route : str) -> None:
+        self.calls[route] += 1
+        await asyncio.sleep(self.latency)
+
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self) -> None:
+        self.calls.clear()
+
+
+class FakeAsset:
+    """discord.Asset serving a generated PNG."""
+
+    _png : bytes | None = None
+
+    def __init__(self, http : FakeHTTP, key : str):
+        self.http : FakeHTTP = http
+        self.key : str = key
+
+    def with_format(self, _ : str) -> "FakeAsset":
+        return self
+
+    def with_size(self, _ : int) -> "FakeAsset":
+        return self
+
+    async def read(self) -> bytes:
+        await self.http.request("GET avatar")
+        if FakeAsset._png is None:
+            data : io.BytesIO = io.BytesIO()
+            Image.new("RGB", (256, 256), (88, 101, 242)).save(data, format="PNG")
+            FakeAsset._png = data.getvalue()
+        return FakeAsset._png
+
+
+class FakeRole:
+    def __init__(self, role_id : int, default : bool = False):
+        self.id : int = role_id
+        self._default : bool = default
+
+    def is_default(self) -> bool:
+        return self._default
+
+
+class FakeUser:
+    def __init__(self, user_id : int):
+        self.id : int = user_id
+
+
+class FakeTextChannel:
+    def __init__(self, http : FakeHTTP, guild : "FakeGuild", channel_id : int | None = None):
+        self.http : FakeHTTP = http
+        self.guild : FakeGuild = guild
+        self.id : int = channel_id or new_id()
+        self.mention : str = f"<#{self.id}>"
+        self.sent : int = 0
+
+    async def send(self, content : str | None = None, **_) -> None:
+        await self.http.request("POST message")
+        self.sent += 1
+
+
+class FakeCategory:
+    def __init__(self):
+        self.id : int = new_id()
+        self.overwrites : dict = {}
+
+
+class FakeVoiceChannel:
+    def __init__(self, http : FakeHTTP, guild : "FakeGuild", name : str, category : FakeCategory | None = None):
+        self.http : FakeHTTP = http
+        self.guild : FakeGuild = guild
+        self.id : int = new_id()
+        self.name : str = name
+        self.category : FakeCategory | None = category
+        self.members : list[FakeMember] = []
+
+    async def edit(self, **_) -> None:
+        await self.http.request("PATCH channel")
+
+    async def delete(self) -> None:
+        await self.http.request("DELETE channel")
+        self.guild.channels.pop(self.id, None)
+
+
+class FakeMember:
+    def __init__(self, http : FakeHTTP, guild : "FakeGuild", member_id : int | None = None):
+        self.http : FakeHTTP = http
+        self.guild : FakeGuild = guild
+        self.id : int = member_id or new_id()
+        self.name : str = f"member{self.id % 10000}"
+        self.mention : str = f"<@{self.id}>"
+        self.roles : list[FakeRole] = [guild.default_role]
+        self.display_avatar : FakeAsset = FakeAsset(http, f"avatar{self.id}")
+        self.voice_channel : FakeVoiceChannel | None = None
+
+    async def add_roles(self, *roles) -> None:
+        await self.http.request("PUT member role")
+        self.roles += [FakeRole(role.id) for role in roles]
+
+    async def remove_roles(self, *roles) -> None:
+        await self.http.request("DELETE member role")
+        removed : set[int] = {role.id for role in roles}
+        self.roles = [role for role in self.roles if role.id not in removed]
+
+    async def edit(self, roles : list = (), **_) -> None:
+        await self.http.request("PATCH member")
+        self.roles = [self.guild.default_role] + [FakeRole(role.id) for role in roles]
+
+    async def move_to(self, channel : FakeVoiceChannel) -> None:
+        await self.http.request("PATCH member")
+        channel.members.append(self)
+        self.voice_channel = channel
+
+
+class FakeGuild:
+    def __init__(self, http : FakeHTTP, guild_id : int, members_count : int = 5):
+        self.http : FakeHTTP = http
+        self.id : int = guild_id
+        self.name : str = f"Guild {guild_id}"
+        self.default_role : FakeRole = FakeRole(guild_id, default=True)
+        self.channels : dict[int, object] = {}
+        self.system_channel : FakeTextChannel = self.add_channel(FakeTextChannel(http, self))
+        self.members : dict[int, FakeMember] = {}
+        for _ in range(members_count):
+            member : FakeMember = FakeMember(http, self)
+            self.members[member.id] = member
+        self.me : FakeMember = FakeMember(http, self)
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id : int):
+        return self.channels.get(channel_id)
+
+    def get_member(self, member_id : int) -> FakeMember | None:
+        return self.members.get(member_id)
+
+    async def fetch_member(self, member_id : int) -> FakeMember:
+        await self.http.request("GET member")
+        return self.members[member_id]
+
+    async def create_voice_channel(self, name : str, category : FakeCategory | None = None, **_) -> FakeVoiceChannel:
+        await self.http.request("POST channel")
+        return self.add_channel(FakeVoiceChannel(self.http, self, name, category))
+
+
+class FakeRawReactionActionEvent:
+    """discord.RawReactionActionEvent, the emoji being its string form."""
+
+    def __init__(self, guild_id : int, message_id : int, user_id : int, emoji : str, member : FakeMember | None = None):
+        self.guild_id : int = guild_id
+        self.message_id : int = message_id
+        self.user_id : int = user_id
+        self.emoji : str = emoji
+        self.member : FakeMember | None = member
+
+
+class FakeVoiceState:
+    def __init__(self, channel : FakeVoiceChannel | None = None):
+        self.channel : FakeVoiceChannel | None = channel
+
+
+class FakeResponse:
+    def __init__(self, status : int = 200, data : dict | None = None):
+        self.status : int = status
+        self._data : dict = data or {"items": []}
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        return None
+
+    async def json(self) -> dict:
+        return self._data
+
+
+class FakeSession:
+    """aiohttp.ClientSession answering every request with an empty 200."""
+
+    def __init__(self, http : FakeHTTP):
+        self.http : FakeHTTP = http
+
+    def get(self, url : str, **_) -> FakeResponse:
+        self.http.calls[f"GET {url}"] += 1
+        return FakeResponse()
@@ -0,0 +1,89 @@
+"""Youtube channels' names resolution against a local fake Data API, see benchmarks/channel_names_benchmark.py."""
+import asyncio
+import socket
+
+import aiohttp
+from aiohttp import web
+
+from utils.youtube_watch import ChannelNameCache
+
+CHANNELS_COUNT : int = 300
+HOST : str = '127.0.0.1'
+
+
+class FakeDataAPI:
+    """channels.list endpoint recording the number of IDs of each request."""
+
+    def __init__(self, status : int = 200):
+        self.status : int = status
+        self.requests : list[int] = []
+        with socket.socket() as sock:
+            sock.bind((HOST, 0))
+            self.port : int = sock.getsockname()[1]
+        self.url : str = f'http://{HOST}:{self.port}/youtube/v3'
+
+    async def channels(self, request : web.Request) -> web.Response:
+        ids : list[str] = request.query['id'].split(',')
+        self.requests.append(len(ids))
+        if self.status != 200:
+            return web.Response(status=self.status)
+        return web.json_response({"items": [{"id": channel_id, "snippet": {"title": f"Channel {channel_id}"}} for channel_id in ids]})
+
+
+def resolve(api : FakeDataAPI, caches : list[ChannelNameCache], channel_ids : set[str]) -> list[dict[str, str | None]]:
+    """Resolves the channels with each cache in turn, against the fake API."""
+    async def run() -> list[dict[str, str | None]]:
+        app : web.Application = web.Application()
+        app.router.add_get('/youtube/v3/channels', api.channels)
+        runner : web.AppRunner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, HOST, api.port).start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                return [await cache.resolve(session, channel_ids, "FAKE_KEY") for cache in caches]
+        finally:
+            await runner.cleanup()
+    return asyncio.run(run())
+
+
+def test_missing_names_are_requested_in_batches_then_cached(tmp_path):
+    api : FakeDataAPI = FakeDataAPI()
+    cache : ChannelNameCache = ChannelNameCache(str(tmp_path / "youtube_channels.json"), api_url=api.url)
+    channel_ids : set[str] = {f"UC{i:022d}" for i in range(CHANNELS_COUNT)}
+
+    cold, warm = resolve(api, [cache, cache], channel_ids)
+    assert api.requests == [ChannelNameCache.MAX_IDS_PER_REQUEST] * (CHANNELS_COUNT // ChannelNameCache.MAX_IDS_PER_REQUEST)
+    assert cold == warm == {channel_id: f"Channel {channel_id}" for channel_id in channel_ids}
+
+
+def test_names_survive_a_restart(tmp_path):
+    api : FakeDataAPI = FakeDataAPI()
+    channel_ids : set[str] = {f"UC{i:022d}" for i in range(10)}
+    resolve(api, [ChannelNameCache(str(tmp_path / "youtube_channels.json"), api_url=api.url)], channel_ids)
+    api.requests.clear()
+
+    reloaded : ChannelNameCache = ChannelNameCache(str(tmp_path / "youtube_channels.json"), api_url=api.url)
+    assert resolve(api, [reloaded], channel_ids)[0] == {channel_id: f"Channel {channel_id}" for channel_id in channel_ids}
+    assert api.requests == []
+
+
+def test_expired_names_are_requested_again(tmp_path):
+    api : FakeDataAPI = FakeDataAPI()
+    cache : ChannelNameCache = ChannelNameCache(str(tmp_path / "youtube_channels.json"), ttl=-1, api_url=api.url)
+    resolve(api, [cache, cache], {"UC-a", "UC-b"})
+    assert api.requests == [2, 2]
+
+
+def test_names_from_the_feeds_cost_no_request(tmp_path):
+    api : FakeDataAPI = FakeDataAPI()
+    cache : ChannelNameCache = ChannelNameCache(str(tmp_path / "youtube_channels.json"), api_url=api.url)
+    cache.remember("UC-a", "Channel A")
+    assert resolve(api, [cache], {"UC-a"}) == [{"UC-a": "Channel A"}]
+    assert api.requests == []
+
+
+def test_api_errors_leave_the_names_unresolved(tmp_path):
+    api : FakeDataAPI = FakeDataAPI(status=403)
+    cache : ChannelNameCache = ChannelNameCache(str(tmp_path / "youtube_channels.json"), api_url=api.url)
+    assert resolve(api, [cache], {"UC-a", "UC-b"}) == [{"UC-a": None, "UC-b": None}]
+    assert api.requests == [2]
@@ -0,0 +1,159 @@
+"""Coordination of the cluster's workers on one machine, see benchmarks/cluster_simulation.py for the multiprocess run."""
+import asyncio
+import threading
+import time
+
+import feedparser
+import pytest
+
+from launch_cluster import shard_ranges
+from utils.cluster import ClusterCoordinator
+
+LEASE : float = 0.3
+
+
+def new_workers(tmp_path, count : int, lease : float = LEASE) -> list[ClusterCoordinator]:
+    return [ClusterCoordinator(worker_id, str(tmp_path / "cluster.db"), lease=lease) for worker_id in range(count)]
+
+
+def feeds(*links : str) -> dict[str, feedparser.FeedParserDict]:
+    return {
+        f"UC{index}": feedparser.FeedParserDict(feed=feedparser.FeedParserDict(), entries=[feedparser.FeedParserDict(link=link, author="")])
+        for index, link in enumerate(links)
+    }
+
+
+def test_every_shard_is_run_by_one_worker(tmp_path):
+    workers : list[ClusterCoordinator] = new_workers(tmp_path, 4)
+    for coordinator, shard_ids in zip(workers, shard_ranges(16, 4)):
+        coordinator.register(16, shard_ids)
+
+    owners : dict[int, list[int]] = {}
+    for worker_id, (shard_count, shard_ids) in workers[0].workers().items():
+        assert shard_count == 16
+        for shard_id in shard_ids:
+            owners.setdefault(shard_id, []).append(worker_id)
+    assert owners == {shard_id: [shard_id // 4] for shard_id in range(16)}
+
+    workers[3].leave()
+    assert set(workers[0].workers()) == {0, 1, 2}
+
+
+def test_guilds_are_routed_to_the_live_worker_running_their_shard(tmp_path):
+    workers : list[ClusterCoordinator] = new_workers(tmp_path, 4)
+    for coordinator, shard_ids in zip(workers, shard_ranges(16, 4)):
+        coordinator.register(16, shard_ids)
+
+    for guild_id in range(1 << 22, 65 << 22, 1 << 22):
+        assert workers[0].route(guild_id) == ((guild_id >> 22) % 16) // 4
+
+    # Worker 2 dies: it stops heartbeating while the others keep going
+    time.sleep(LEASE * 1.5)
+    for coordinator in workers[:2] + workers[3:]:
+        coordinator.heartbeat()
+    assert workers[0].route(8 << 22) is None
+    assert workers[0].route(9 << 22) is None
+    assert workers[0].route(3 << 22) == 0
+    assert workers[0].route(13 << 22) == 3
+
+
+def test_lock_is_exclusive_across_workers(tmp_path):
+    workers : list[ClusterCoordinator] = new_workers(tmp_path, 4, lease=5.0)
+    counter_path = tmp_path / "counter.txt"
+    counter_path.write_text("0")
+
+    def increment(coordinator : ClusterCoordinator) -> None:
+        for _ in range(20):
+            with coordinator.locked("counter"):
+                value : int = int(counter_path.read_text())
+                time.sleep(0.001)
+                counter_path.write_text(str(value + 1))
+
+    threads : list[threading.Thread] = [threading.Thread(target=increment, args=(coordinator,)) for coordinator in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter_path.read_text() == "80"
+
+
+def test_awaiting_a_lock_does_not_block_the_event_loop(tmp_path):
+    holder, waiter = new_workers(tmp_path, 2, lease=5.0)
+    assert holder.acquire("youtube_channels")
+
+    async def run() -> int:
+        ticks : int = 0
+
+        async def release_later() -> None:
+            await asyncio.sleep(0.2)
+            holder.release("youtube_channels")
+        release : asyncio.Task = asyncio.create_task(release_later())
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+        ticker : asyncio.Task = asyncio.create_task(tick())
+
+        async with waiter.alocked("youtube_channels"):
+            assert release.done()
+            assert not holder.acquire("youtube_channels")
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
+    assert holder.acquire("youtube_channels")
+
+
+def test_awaiting_a_lock_times_out(tmp_path):
+    holder, waiter = new_workers(tmp_path, 2, lease=5.0)
+    assert holder.acquire("youtube_channels")
+
+    async def run() -> None:
+        async with waiter.alocked("youtube_channels", timeout=0.1):
+            pass
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+def test_a_single_worker_takes_over_the_lead(tmp_path):
+    workers : list[ClusterCoordinator] = new_workers(tmp_path, 3)
+    leaders : list[int] = [coordinator.worker_id for coordinator in workers if coordinator.is_leader("youtube_poller")]
+    assert leaders == [0]
+
+    # The leader dies: it stops renewing its lease, the others keep competing
+    successors : set[int] = set()
+    deadline : float = time.monotonic() + 3 * LEASE
+    while time.monotonic() < deadline:
+        successors |= {coordinator.worker_id for coordinator in workers[1:] if coordinator.is_leader("youtube_poller")}
+        time.sleep(LEASE / 10)
+    assert len(successors) == 1
+
+
+def test_relayed_feeds_are_consumed_once_by_every_worker(tmp_path):
+    workers : list[ClusterCoordinator] = new_workers(tmp_path, 3)
+    workers[0].publish_feeds(feeds("https://www.youtube.com/watch?v=a", "https://www.youtube.com/watch?v=b"))
+    late : ClusterCoordinator = ClusterCoordinator(3, str(tmp_path / "cluster.db"), lease=LEASE)
+
+    for coordinator in workers:
+        consumed : dict[str, feedparser.FeedParserDict] = coordinator.consume_feeds()
+        assert {ytb_channel_id: feed.entries[0].link for ytb_channel_id, feed in consumed.items()} == {
+            "UC0": "https://www.youtube.com/watch?v=a", "UC1": "https://www.youtube.com/watch?v=b"
+        }
+        assert coordinator.consume_feeds() == {}
+    # Only the feeds relayed after a worker started are for it
+    assert late.consume_feeds() == {}
+
+
+def test_watched_channels_of_the_live_workers(tmp_path):
+    workers : list[ClusterCoordinator] = new_workers(tmp_path, 2)
+    for coordinator in workers:
+        coordinator.register(2, [coordinator.worker_id])
+    workers[0].publish_watched({"UC-a", "UC-shared"})
+    workers[1].publish_watched({"UC-b", "UC-shared"})
+    assert workers[0].watched() == {"UC-a", "UC-b", "UC-shared"}
+
+    workers[1].leave()
+    assert workers[0].watched() == {"UC-a", "UC-shared"}
@@ -0,0 +1,165 @@
+import asyncio
+import contextlib
+import json
+import threading
+
+from utils import settings
+from utils.config_store import ConfigStore
+from utils.storage import JsonTreeBackend, SqliteBackend
+
+
+class FailingBackend(JsonTreeBackend):
+    """Fails to write the configs of the servers in `failing`."""
+
+    def __init__(self, servers_path : str):
+        super().__init__(servers_path)
+        self.failing : set[int] = set()
+        self.writes : list[int] = []
+        self.threads : list[threading.Thread] = []
+
+    def save_config(self, server_id : int, config : dict[str, any]) -> None:
+        if server_id in self.failing:
+            raise OSError("disk full")
+        super().save_config(server_id, config)
+        self.writes.append(server_id)
+        self.threads.append(threading.current_thread())
+
+
+def new_store(tmp_path, debounce : float = 0.05) -> tuple[ConfigStore, FailingBackend]:
+    backend : FailingBackend = FailingBackend(str(tmp_path / "servers"))
+    store : ConfigStore = ConfigStore(backend, debounce=debounce)
+    for server_id in (1, 2, 3):
+        store.create(server_id)
+    backend.writes.clear()
+    backend.threads.clear()
+    return store, backend
+
+
+def test_created_servers_get_the_template(tmp_path):
+    store, _ = new_store(tmp_path)
+    with open(settings.CONFIG_TEMPLATE_PATH, 'r', encoding='utf-8') as file:
+        template : dict[str, any] = json.load(file)
+
+    assert sorted(store.server_ids()) == [1, 2, 3]
+    assert store.has(2) and not store.has(4)
+    assert store.get(2) == template
+
+
+def test_configs_are_read_once(tmp_path):
+    store, backend = new_store(tmp_path)
+    config : dict[str, any] = store.get(1)
+    config["language"] = "fr"
+
+    assert store.get("1") is config
+    assert backend.load_config(1)["language"] != "fr"
+    store.save(1)
+    assert ConfigStore(JsonTreeBackend(str(tmp_path / "servers"))).get(1)["language"] == "fr"
+
+
+def test_delete_forgets_the_server(tmp_path):
+    store, _ = new_store(tmp_path)
+    store.get(3)
+    store.delete(3)
+
+    assert not store.has(3)
+    assert sorted(store.server_ids()) == [1, 2]
+
+
+def test_saves_within_the_debounce_window_are_written_once(tmp_path):
+    store, backend = new_store(tmp_path)
+
+    async def run() -> None:
+        for language in ("fr", "en", "fr"):
+            store.get(1)["language"] = language
+            store.save(1)
+        store.save(2)
+        assert backend.writes == []
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert sorted(backend.writes) == [1, 2]
+    assert backend.load_config(1)["language"] == "fr"
+    assert store.stats()["writes_saved"] == 2
+
+
+def test_flush_writes_right_away(tmp_path):
+    store, backend = new_store(tmp_path, debounce=60.0)
+
+    async def run() -> None:
+        store.get(3)["language"] = "fr"
+        store.save(3)
+        store.flush()
+
+    asyncio.run(run())
+    assert backend.writes == [3]
+    assert backend.load_config(3)["language"] == "fr"
+    assert store.stats()["dirty"] == 0
+
+
+def test_save_outside_an_event_loop_writes_right_away(tmp_path):
+    store, backend = new_store(tmp_path)
+    store.save(2)
+    assert backend.writes == [2]
+
+
+def test_failed_write_stays_dirty_and_others_are_written(tmp_path):
+    store, backend = new_store(tmp_path, debounce=0.05)
+    backend.failing = {2}
+
+    async def run() -> None:
+        for server_id in (1, 2, 3):
+            store.save(server_id)
+        store.flush()
+        assert sorted(backend.writes) == [1, 3]
+        assert store.stats()["dirty"] == 1
+        # Written by the retry once the disk is back
+        backend.failing.clear()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert sorted(backend.writes) == [1, 2, 3]
+    assert store.stats()["dirty"] == 0
+    assert store.stats()["write_errors"] == 1
+
+
+def test_writes_behind_run_off_the_event_loop_under_the_lock(tmp_path):
+    store, backend = new_store(tmp_path)
+    held : list[bool] = []
+
+    @contextlib.asynccontextmanager
+    async def lock():
+        held.append(True)
+        yield
+        held.append(False)
+    store.lock = lock
+
+    async def run() -> None:
+        store.get(1)["language"] = "fr"
+        store.save(1)
+        await asyncio.sleep(0.02)
+        # Mutations made while the write-behind is pending are written too
+        store.get(1)["language"] = "en"
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert backend.writes == [1]
+    assert backend.threads[0] is not threading.main_thread()
+    assert held == [True, False]
+    assert backend.load_config(1)["language"] == "en"
+    assert store.stats()["dirty"] == 0
+
+
+def test_sqlite_storage_is_written_behind_from_a_thread(tmp_path):
+    backend : SqliteBackend = SqliteBackend(str(tmp_path / "fulgobot.db"), str(tmp_path / "cache"))
+    store : ConfigStore = ConfigStore(backend, debounce=0.01)
+    store.create(1)
+
+    async def run() -> None:
+        store.get(1)["role_react"]["42"] = {"👍": "7"}
+        store.save(1)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert store.stats()["write_errors"] == 0
+    assert backend.load_config(1)["role_react"] == {"42": {"👍": "7"}}
+    backend.close()
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from tests.fakes import FakeGuild, FakeHTTP, FakeMember, FakeTextChannel
+from utils.help_tickets import HelpTicketIndex
+
+
+class FakeHelpCategory:
+    def __init__(self, text_channels : list[FakeTextChannel]):
+        self.text_channels : list[FakeTextChannel] = text_channels
+
+
+def ticket_creator(guild : FakeGuild, member : FakeMember, created : list[FakeTextChannel]):
+    async def create() -> FakeTextChannel:
+        await asyncio.sleep(0.01)
+        channel : FakeTextChannel = guild.add_channel(FakeTextChannel(guild.http, guild))
+        channel.topic = f"Help ticket of {member.mention}"
+        created.append(channel)
+        return channel
+    return create
+
+
+def test_concurrent_opens_create_a_single_ticket():
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    member : FakeMember = next(iter(guild.members.values()))
+    index : HelpTicketIndex = HelpTicketIndex()
+    created : list[FakeTextChannel] = []
+
+    async def run() -> list[tuple[FakeTextChannel, bool]]:
+        return await asyncio.gather(*(index.open(guild, member, ticket_creator(guild, member, created)) for _ in range(5)))
+
+    results : list[tuple[FakeTextChannel, bool]] = asyncio.run(run())
+    assert len(created) == 1
+    assert all(channel is created[0] for channel, _ in results)
+    assert sorted(was_created for _, was_created in results) == [False] * 4 + [True]
+    assert index.get(guild, member.id) is created[0]
+    assert index.stats()["opened"] == 1
+    assert index.stats()["reused"] == 4
+
+
+def test_failed_creation_can_be_retried():
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    member : FakeMember = next(iter(guild.members.values()))
+    index : HelpTicketIndex = HelpTicketIndex()
+    created : list[FakeTextChannel] = []
+
+    async def fail() -> FakeTextChannel:
+        raise RuntimeError("missing permissions")
+
+    async def run() -> tuple[FakeTextChannel, bool]:
+        with pytest.raises(RuntimeError):
+            await index.open(guild, member, fail)
+        return await index.open(guild, member, ticket_creator(guild, member, created))
+
+    assert asyncio.run(run()) == (created[0], True)
+
+
+def test_index_is_rebuilt_from_the_topics():
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    members : list[FakeMember] = list(guild.members.values())
+    tickets : list[FakeTextChannel] = []
+    for member, mention in zip(members, (members[0].mention, f"<@!{members[1].id}>")):
+        channel : FakeTextChannel = guild.add_channel(FakeTextChannel(guild.http, guild))
+        channel.topic = f"Help ticket of {mention}"
+        tickets.append(channel)
+    untracked : FakeTextChannel = guild.add_channel(FakeTextChannel(guild.http, guild))
+    untracked.topic = None
+    index : HelpTicketIndex = HelpTicketIndex()
+    index.load_guild(guild, FakeHelpCategory(tickets + [untracked]))
+
+    assert index.get(guild, members[0].id) is tickets[0]
+    assert index.get(guild, members[1].id) is tickets[1]
+    assert index.get(guild, members[2].id) is None
+    assert index.stats()["open"] == 2
+
+
+def test_deleted_tickets_are_forgotten():
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    members : list[FakeMember] = list(guild.members.values())
+    created : list[FakeTextChannel] = []
+    index : HelpTicketIndex = HelpTicketIndex()
+
+    async def run() -> None:
+        for member in members[:3]:
+            await index.open(guild, member, ticket_creator(guild, member, created))
+
+    asyncio.run(run())
+    index.remove_channel(guild.id, created[0].id)
+    # Deleted while the bot was offline
+    del guild.channels[created[1].id]
+
+    assert index.get(guild, members[0].id) is None
+    assert index.get(guild, members[1].id) is None
+    assert index.get(guild, members[2].id) is created[2]
+    index.forget(guild.id)
+    assert index.stats()["open"] == 0
+
+
+class FakeInteraction:
+    """Modal submission recording its answers, in order."""
+
+    def __init__(self, guild : FakeGuild, user : FakeMember, calls : list[str]):
+        self.guild : FakeGuild = guild
+        self.user : FakeMember = user
+        self.channel_id : int = guild.system_channel.id
+        self.calls : list[str] = calls
+        self.response : FakeInteraction = self
+        self.followup : FakeInteraction = self
+
+    async def defer(self, ephemeral : bool = False) -> None:
+        self.calls.append("defer")
+
+    async def send(self, content : str, ephemeral : bool = False) -> None:
+        self.calls.append("followup")
+
+    async def send_message(self, content : str, ephemeral : bool = False) -> None:
+        self.calls.append("response")
+
+
+def test_modal_is_deferred_before_the_ticket_is_created(monkeypatch):
+    import utils.discord_helpers
+    from utils.config_store import config_store
+    from utils.outbound import OutboundDispatcher
+
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    member : FakeMember = next(iter(guild.members.values()))
+    calls : list[str] = []
+    config : dict[str, any] = {"language": "en", "help_system": {"help_category_id": None, "channels_id": {}, "help_channel_name_template": "help-{member}"}}
+    monkeypatch.setattr(config_store, "get", lambda server_id: config)
+    monkeypatch.setattr(utils.discord_helpers, "help_ticket_index", HelpTicketIndex())
+
+    async def create_text_channel(**_) -> FakeTextChannel:
+        calls.append("create")
+        return guild.add_channel(FakeTextChannel(guild.http, guild))
+    guild.create_text_channel = create_text_channel
+
+    async def run() -> None:
+        monkeypatch.setattr(utils.discord_helpers, "outbound", OutboundDispatcher())
+        for _ in range(2):
+            await utils.discord_helpers.open_help_ticket(FakeInteraction(guild, member, calls), "help")
+
+    asyncio.run(run())
+    assert calls == ["defer", "create", "followup", "defer", "followup"]
+    assert guild.http.calls["POST message"] == 1
@@ -0,0 +1,275 @@
+"""Hot paths of the bot's extensions against simulated guilds, offline.
+
+Drives the real handlers with the fakes of fakes.py at 10, 1k and 10k guilds:
+get_associated_role_for_emoji, on_raw_reaction_add, on_voice_state_update,
+check_new_videos and generate_welcome_card. Each case checks what the handler
+did, and their latencies are written as JSON to HOT_PATHS_REPORT
+(benchmarks/results/hot_paths.json by default) to compare runs.
+"""
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import time
+
+import feedparser
+import pytest
+
+from tests.fakes import FakeCategory, FakeGuild, FakeHTTP, FakeRawReactionActionEvent, FakeSession, FakeTextChannel, FakeUser, FakeVoiceChannel, FakeVoiceState, new_id
+
+GUILD_COUNTS : tuple[int, ...] = (10, 1000, 10000)
+EMOJIS : tuple[str, ...] = ("👍", "🎮", "🎨")
+YOUTUBE_CHANNELS_COUNT : int = 500
+SUBSCRIPTIONS_PER_GUILD : int = 3
+LOOKUPS_COUNT : int = 100000
+REACTIONS_COUNT : int = 5000
+VOICE_JOINS_COUNT : int = 2000
+FEED_ROUNDS : int = 5
+WELCOME_CARDS_COUNT : int = 30
+BACKGROUND_PATH : str = "data/assets/new_member_background.jpg"
+REPORT_PATH : str = os.environ.get("HOT_PATHS_REPORT", "benchmarks/results/hot_paths.json")
+
+
+def summarize(latencies : list[float], http : FakeHTTP | None = None) -> dict[str, float]:
+    """Gets the mean and percentiles of latencies in microseconds, and the REST calls per operation."""
+    latencies = sorted(latencies)
+    result : dict[str, float] = {
+        "operations": len(latencies),
+        "mean_us": statistics.fmean(latencies) * 1e6,
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+    }
+    if http is not None:
+        result["rest_calls_per_operation"] = http.total() / len(latencies)
+    return result
+
+
+class World:
+    """Simulated guilds, each with role reacts, a join-to-create hub and youtube subscriptions."""
+
+    def __init__(self, main, guilds_count : int, servers_path : str):
+        from utils.config_store import config_store
+        from utils.role_react_index import role_react_index
+        from utils.storage import JsonTreeBackend
+        from utils.subscription_index import subscription_index
+        from utils.temp_voice_registry import temp_voice_registry
+
+        backend : JsonTreeBackend = JsonTreeBackend(servers_path)
+        config_store.backend = backend
+        config_store._configs.clear()
+        config_store._server_ids = None
+        temp_voice_registry.backend = backend
+        temp_voice_registry._channels.clear()
+        temp_voice_registry._hubs.clear()
+
+        self.http : FakeHTTP = FakeHTTP()
+        self.guilds : dict[int, FakeGuild] = {}
+        self.reactions : dict[tuple[int, int, str], int] = {}
+        self.hubs : dict[int, FakeVoiceChannel] = {}
+        self.ytb_channel_ids : list[str] = [f"UC{i:022d}" for i in range(YOUTUBE_CHANNELS_COUNT)]
+        for _ in range(guilds_count):
+            guild : FakeGuild = FakeGuild(self.http, new_id())
+            self.guilds[guild.id] = guild
+            config_store.create(guild.id)
+            config : dict[str, any] = config_store.get(guild.id)
+            config["welcome_system"]["active"] = True
+
+            message_id : int = new_id()
+            roles : dict[str, int] = {emoji: new_id() for emoji in EMOJIS}
+            config["role_react"][str(message_id)] = {emoji: str(role_id) for emoji, role_id in roles.items()}
+            self.reactions |= {(guild.id, message_id, emoji): role_id for emoji, role_id in roles.items()}
+
+            hub : FakeVoiceChannel = guild.add_channel(FakeVoiceChannel(self.http, guild, "Join to create", FakeCategory()))
+            config["join_to_create_channel_system"]["join_to_create_channels_id"].append(str(hub.id))
+            self.hubs[guild.id] = hub
+
+            announcements : FakeTextChannel = guild.add_channel(FakeTextChannel(self.http, guild))
+            config["youtube_survey"]["channel_id"] = str(announcements.id)
+            for ytb_channel_id in random.sample(self.ytb_channel_ids, SUBSCRIPTIONS_PER_GUILD):
+                config["youtube_survey"]["youtube_channels_id"][ytb_channel_id] = None
+
+        self.guild_ids : list[int] = list(self.guilds)
+        role_react_index.build()
+        subscription_index.build()
+        main.tyrBot.get_guild = self.guilds.get
+        main.tyrBot._connection.user = FakeUser(new_id())
+
+    def random_member(self):
+        guild : FakeGuild = self.guilds[random.choice(self.guild_ids)]
+        return random.choice(list(guild.members.values()))
+
+
+@pytest.fixture(scope="module")
+def loop():
+    # One loop for the whole module, the bot's singletons are bound to the loop they first ran on.
+    loop : asyncio.AbstractEventLoop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def main(loop, tmp_path_factory):
+    async def load():
+        import main
+        main.load_extensions()
+        return main
+
+    main = loop.run_until_complete(load())
+    main.tyrBot.get_cog("Youtube").channel_names.path = str(tmp_path_factory.mktemp("youtube") / "youtube_channels.json")
+    yield main
+    for extension in list(main.tyrBot.extensions):
+        main.tyrBot.unload_extension(extension)
+
+
+@pytest.fixture(scope="module")
+def report():
+    results : dict[str, dict[str, dict[str, float]]] = {}
+    yield results
+    os.makedirs(os.path.dirname(REPORT_PATH) or '.', exist_ok=True)
+    with open(REPORT_PATH, 'w', encoding='utf-8') as file:
+        json.dump({"python": platform.python_version(), "timestamp": time.time(), "results": results}, file, indent=4)
+
+
+@pytest.fixture(scope="module", params=GUILD_COUNTS, ids=lambda guilds_count: f"{guilds_count}_guilds")
+def world(request, main, tmp_path_factory) -> World:
+    random.seed(request.param)
+    return World(main, request.param, str(tmp_path_factory.mktemp(f"servers-{request.param}")))
+
+
+def test_get_associated_role_for_emoji(world : World, report : dict):
+    import utils.server_management
+
+    reactions : list[tuple[int, int, str]] = list(world.reactions)
+    # Looked up in bulk, a single lookup being too short to time alone.
+    misses : list[tuple[int, int, str]] = [(guild_id, new_id(), "👍") for guild_id, _, _ in random.sample(reactions, min(len(reactions), 1000))]
+    lookups : list[tuple[int, int, str]] = [random.choice(misses) if random.random() < 0.1 else random.choice(reactions) for _ in range(LOOKUPS_COUNT)]
+    start : float = time.perf_counter()
+    roles : list[int | None] = [utils.server_management.get_associated_role_for_emoji(*lookup) for lookup in lookups]
+    elapsed : float = time.perf_counter() - start
+    report.setdefault(str(len(world.guilds)), {})["get_associated_role_for_emoji"] = {"operations": LOOKUPS_COUNT, "mean_us": elapsed / LOOKUPS_COUNT * 1e6}
+
+    assert roles == [world.reactions.get(lookup) for lookup in lookups]
+
+
+def test_on_raw_reaction_add(main, loop, world : World, report : dict):
+    role_react = main.tyrBot.get_cog("RoleReact")
+    role_react.role_queue.coalesce_delay = 0.0
+    errors : int = role_react.role_queue.errors
+    world.http.reset()
+
+    async def run() -> list[float]:
+        latencies : list[float] = []
+        for _ in range(REACTIONS_COUNT):
+            server_id, message_id, emoji = random.choice(list(world.reactions))
+            member = random.choice(list(world.guilds[server_id].members.values()))
+            # The gateway only sometimes attaches the member to the payload.
+            payload : FakeRawReactionActionEvent = FakeRawReactionActionEvent(server_id, message_id, member.id, emoji, member if random.random() < 0.5 else None)
+            start : float = time.perf_counter()
+            await role_react.on_raw_reaction_add(payload)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.gather(*list(role_react.role_queue._tasks))
+            assert world.reactions[server_id, message_id, emoji] in {role.id for role in member.roles}
+        return latencies
+
+    latencies : list[float] = loop.run_until_complete(run())
+    report.setdefault(str(len(world.guilds)), {})["on_raw_reaction_add"] = summarize(latencies, world.http) | {"role_queue": role_react.role_queue.stats()}
+
+    assert role_react.role_queue.errors == errors
+    # The members are cached, so the roles are given without fetching them.
+    assert world.http.calls["GET member"] == 0
+    assert world.http.total() <= REACTIONS_COUNT
+
+
+def test_reactions_in_dms_are_ignored(main, loop):
+    role_react = main.tyrBot.get_cog("RoleReact")
+    pending : int = role_react.role_queue.stats()["pending_members"]
+    payload : FakeRawReactionActionEvent = FakeRawReactionActionEvent(None, new_id(), new_id(), "👍")
+
+    loop.run_until_complete(role_react.on_raw_reaction_add(payload))
+    loop.run_until_complete(role_react.on_raw_reaction_remove(payload))
+    assert role_react.role_queue.stats()["pending_members"] == pending
+
+
+def test_on_voice_state_update(main, loop, world : World, report : dict):
+    from utils.temp_voice_registry import temp_voice_registry
+
+    join_to_create = main.tyrBot.get_cog("JoinToCreate")
+    world.http.reset()
+
+    async def run() -> list[float]:
+        latencies : list[float] = []
+        for _ in range(VOICE_JOINS_COUNT):
+            member = world.random_member()
+            hub : FakeVoiceChannel = world.hubs[member.guild.id]
+            start : float = time.perf_counter()
+            await join_to_create.on_voice_state_update(member, FakeVoiceState(None), FakeVoiceState(hub))
+            latencies.append(time.perf_counter() - start)
+
+            channel : FakeVoiceChannel = member.voice_channel
+            assert channel is not hub and temp_voice_registry.contains(member.guild.id, channel.id)
+            channel.members.remove(member)
+            start = time.perf_counter()
+            await join_to_create.on_voice_state_update(member, FakeVoiceState(channel), FakeVoiceState(None))
+            latencies.append(time.perf_counter() - start)
+            assert member.guild.get_channel(channel.id) is None
+            assert not temp_voice_registry.contains(member.guild.id, channel.id)
+        return latencies
+
+    latencies : list[float] = loop.run_until_complete(run())
+    report.setdefault(str(len(world.guilds)), {})["on_voice_state_update"] = summarize(latencies, world.http)
+
+    assert world.http.calls["PATCH member"] == VOICE_JOINS_COUNT
+    assert world.http.calls["DELETE channel"] == VOICE_JOINS_COUNT
+
+
+def test_check_new_videos(main, loop, world : World, report : dict):
+    from utils.config_store import config_store
+    from utils.outbound import outbound
+
+    youtube = main.tyrBot.get_cog("Youtube")
+    # The fake channels have no rate limit, only the dispatcher's own cost is measured.
+    outbound.channel_period = 1e-6
+    session : FakeSession = FakeSession(world.http)
+    world.http.reset()
+    latencies : list[float] = []
+    for round_index in range(FEED_ROUNDS):
+        feeds : dict[str, feedparser.FeedParserDict] = {
+            ytb_channel_id: feedparser.FeedParserDict(feed=feedparser.FeedParserDict(), entries=[feedparser.FeedParserDict(
+                link=f"https://www.youtube.com/watch?v={ytb_channel_id}-{round_index}", author=f"Channel {ytb_channel_id}"
+            )])
+            for ytb_channel_id in world.ytb_channel_ids
+        }
+        start : float = time.perf_counter()
+        loop.run_until_complete(youtube.check_new_videos(session, feeds))
+        latencies.append(time.perf_counter() - start)
+    flush_start : float = time.perf_counter()
+    config_store.flush()
+    report.setdefault(str(len(world.guilds)), {})["check_new_videos"] = summarize(latencies) | {
+        "announcements_per_round": world.http.calls["POST message"] / FEED_ROUNDS,
+        "config_flush_us": (time.perf_counter() - flush_start) * 1e6,
+    }
+
+    # Every subscription gets each round's video once, and remembers it.
+    assert world.http.calls["POST message"] == len(world.guilds) * SUBSCRIPTIONS_PER_GUILD * FEED_ROUNDS
+    for guild_id in world.guild_ids:
+        for ytb_channel_id, last_video_id in config_store.get(guild_id)["youtube_survey"]["youtube_channels_id"].items():
+            assert last_video_id == f"{ytb_channel_id}-{FEED_ROUNDS - 1}"
+
+
+def test_generate_welcome_card(loop, world : World, report : dict):
+    import utils.image_utils
+
+    world.http.reset()
+    latencies : list[float] = []
+    for _ in range(WELCOME_CARDS_COUNT):
+        member = world.random_member()
+        start : float = time.perf_counter()
+        card = loop.run_until_complete(utils.image_utils.generate_welcome_card(member, BACKGROUND_PATH))
+        latencies.append(time.perf_counter() - start)
+        assert card.getvalue()[:8] == b"\x89PNG\r\n\x1a\n"
+    report.setdefault(str(len(world.guilds)), {})["generate_welcome_card"] = summarize(latencies, world.http)
+
+    # At most one avatar download per card, the cache serving the members seen before.
+    assert world.http.calls["GET avatar"] <= WELCOME_CARDS_COUNT
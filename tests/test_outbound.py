@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.outbound import OutboundDispatcher, Priority
+
+
+class RecordingChannel:
+    """Channel recording the messages sent through it, in the order of a shared log."""
+
+    def __init__(self, channel_id : int, log : list[tuple[int, str, float]], error : Exception | None = None):
+        self.id : int = channel_id
+        self.log : list[tuple[int, str, float]] = log
+        self.error : Exception | None = error
+
+    async def send(self, content : str | None = None, **_) -> str:
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        self.log.append((self.id, content, time.monotonic()))
+        return content
+
+
+def test_interactive_messages_are_sent_first():
+    log : list[tuple[int, str, float]] = []
+
+    async def run() -> None:
+        dispatcher : OutboundDispatcher = OutboundDispatcher(concurrency=1, class_concurrency=(1, 1, 1))
+        await asyncio.gather(
+            *(dispatcher.send(RecordingChannel(channel_id, log), Priority.BACKGROUND, content="announcement") for channel_id in range(3)),
+            dispatcher.send(RecordingChannel(3, log), Priority.WELCOME, content="welcome"),
+            dispatcher.send(RecordingChannel(4, log), Priority.INTERACTIVE, content="reply")
+        )
+
+    asyncio.run(run())
+    assert [content for _, content, _ in log] == ["reply", "welcome", "announcement", "announcement", "announcement"]
+
+
+def test_rate_limited_channel_does_not_hold_back_the_others():
+    log : list[tuple[int, str, float]] = []
+
+    async def run() -> float:
+        dispatcher : OutboundDispatcher = OutboundDispatcher(channel_burst=2, channel_period=0.2)
+        busy : RecordingChannel = RecordingChannel(1, log)
+        start : float = time.monotonic()
+        await asyncio.gather(
+            *(dispatcher.send(busy, Priority.BACKGROUND, content=f"busy{index}") for index in range(4)),
+            dispatcher.send(RecordingChannel(2, log), Priority.BACKGROUND, content="other")
+        )
+        return start
+
+    start : float = asyncio.run(run())
+    contents : list[str] = [content for _, content, _ in log]
+    assert contents.index("other") < contents.index("busy2")
+    sent_at : dict[str, float] = {content: at - start for _, content, at in log}
+    # Two messages are allowed at once, then one every 0.1 second
+    assert sent_at["busy2"] >= 0.09
+    assert sent_at["busy3"] >= 0.19
+
+
+def test_failed_send_is_raised_to_its_caller_only():
+    log : list[tuple[int, str, float]] = []
+
+    async def run() -> OutboundDispatcher:
+        dispatcher : OutboundDispatcher = OutboundDispatcher()
+        results : list = await asyncio.gather(
+            dispatcher.send(RecordingChannel(1, log, ValueError("forbidden")), Priority.WELCOME, content="card"),
+            dispatcher.send(RecordingChannel(2, log), Priority.WELCOME, content="card"),
+            return_exceptions=True
+        )
+        assert isinstance(results[0], ValueError)
+        assert results[1] == "card"
+        return dispatcher
+
+    stats : dict[str, float] = asyncio.run(run()).stats()
+    assert stats["welcome_sent"] == 1
+    assert stats["welcome_failed"] == 1
+    assert stats["welcome_depth"] == 0
+    assert stats["welcome_in_flight"] == 0
+
+
+@pytest.mark.parametrize("messages_count", [1, 50])
+def test_every_message_is_sent_once(messages_count : int):
+    log : list[tuple[int, str, float]] = []
+
+    async def run() -> None:
+        dispatcher : OutboundDispatcher = OutboundDispatcher(channel_period=1e-6)
+        channels : list[RecordingChannel] = [RecordingChannel(channel_id, log) for channel_id in range(5)]
+        await asyncio.gather(*(
+            dispatcher.send(channels[index % len(channels)], Priority(index % len(Priority)), content=str(index))
+            for index in range(messages_count)
+        ))
+
+    asyncio.run(run())
+    assert sorted(int(content) for _, content, _ in log) == list(range(messages_count))
+
+
+def test_missing_channel_is_refused():
+    async def run() -> None:
+        await OutboundDispatcher().send(None, Priority.WELCOME, content="card")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
@@ -0,0 +1,88 @@
+import asyncio
+
+import discord
+
+from tests.fakes import FakeGuild, FakeHTTP, FakeMember, FakeRole
+from utils.role_queue import RoleAssignmentQueue
+
+
+class FakeResponse:
+    status : int = 403
+    reason : str = "Forbidden"
+
+
+def member_role_ids(member : FakeMember) -> set[int]:
+    return {role.id for role in member.roles if not role.is_default()}
+
+
+def run_queue(queue : RoleAssignmentQueue, changes : list[tuple[FakeMember, int, bool]]) -> None:
+    async def run() -> None:
+        for member, role_id, add in changes:
+            queue.enqueue(member, role_id, add)
+        await asyncio.gather(*list(queue._tasks))
+    asyncio.run(run())
+
+
+def test_changes_of_a_member_are_applied_in_one_request():
+    http : FakeHTTP = FakeHTTP()
+    member : FakeMember = next(iter(FakeGuild(http, 1).members.values()))
+    queue : RoleAssignmentQueue = RoleAssignmentQueue(coalesce_delay=0.01)
+    run_queue(queue, [(member, 10, True), (member, 11, True), (member, 12, True)])
+
+    assert member_role_ids(member) == {10, 11, 12}
+    assert http.calls == {"PATCH member": 1}
+    assert queue.stats()["requests_sent"] == 1
+
+
+def test_single_change_uses_the_role_endpoint():
+    http : FakeHTTP = FakeHTTP()
+    member : FakeMember = next(iter(FakeGuild(http, 1).members.values()))
+    queue : RoleAssignmentQueue = RoleAssignmentQueue(coalesce_delay=0.01)
+    run_queue(queue, [(member, 10, True)])
+    run_queue(queue, [(member, 10, False)])
+
+    assert member_role_ids(member) == set()
+    assert http.calls == {"PUT member role": 1, "DELETE member role": 1}
+
+
+def test_add_then_remove_costs_no_request():
+    http : FakeHTTP = FakeHTTP()
+    member : FakeMember = next(iter(FakeGuild(http, 1).members.values()))
+    queue : RoleAssignmentQueue = RoleAssignmentQueue(coalesce_delay=0.01)
+    run_queue(queue, [(member, 10, True), (member, 10, False)])
+
+    assert http.total() == 0
+    assert queue.stats()["edits_cancelled"] == 1
+
+
+def test_roles_are_computed_from_the_gateway_member():
+    http : FakeHTTP = FakeHTTP()
+    guild : FakeGuild = FakeGuild(http, 1)
+    member : FakeMember = next(iter(guild.members.values()))
+    # The reaction carries a copy of the member, then someone else gives it a role
+    stale : FakeMember = FakeMember(http, guild, member.id)
+    member.roles.append(FakeRole(20))
+    queue : RoleAssignmentQueue = RoleAssignmentQueue(coalesce_delay=0.01)
+    run_queue(queue, [(stale, 10, True), (stale, 11, True)])
+
+    assert member_role_ids(member) == {10, 11, 20}
+
+
+def test_failed_request_is_reported_to_the_guild():
+    http : FakeHTTP = FakeHTTP()
+    guild : FakeGuild = FakeGuild(http, 1)
+    member : FakeMember = next(iter(guild.members.values()))
+
+    async def add_roles(*_) -> None:
+        raise discord.Forbidden(FakeResponse(), "Missing Permissions")
+    member.add_roles = add_roles
+    reported : list[FakeGuild] = []
+
+    async def on_error(guild : FakeGuild) -> None:
+        reported.append(guild)
+    queue : RoleAssignmentQueue = RoleAssignmentQueue(on_error, coalesce_delay=0.01)
+    run_queue(queue, [(member, 10, True)])
+
+    assert reported == [guild]
+    assert queue.stats()["errors"] == 1
+    assert queue.stats()["pending_members"] == 0
@@ -0,0 +1,126 @@
+"""Several shards simulated in one process, see benchmarks/shard_simulation.py."""
+import random
+import time
+
+import pytest
+
+from utils.config_store import config_store
+from utils.role_react_index import RoleReactIndex
+from utils.sharding import ShardMap
+from utils.storage import JsonTreeBackend
+from utils.subscription_index import SubscriptionIndex
+
+DISCORD_EPOCH_MS : int = 1420070400000
+EMOJIS : tuple[str, ...] = ("👍", "🎮", "🎨")
+YOUTUBE_CHANNELS_COUNT : int = 50
+SUBSCRIPTIONS_PER_GUILD : int = 2
+GUILDS_COUNT : int = 300
+EVENTS_COUNT : int = 5000
+
+
+def snowflake() -> int:
+    """Generates a guild ID shaped like Discord's, whose timestamp bits decide its shard."""
+    timestamp : int = random.randrange(0, int(time.time() * 1000) - DISCORD_EPOCH_MS)
+    return (timestamp << 22) | random.randrange(1 << 22)
+
+
+class FakeEventSource:
+    """Stand-in for the bot's dispatch, so the events can be counted per shard like on the gateway."""
+
+    def __init__(self):
+        self.dispatched : int = 0
+        self._connection : FakeEventSource = self
+
+    def dispatch(self, event_name : str, *args) -> None:
+        self.dispatched += 1
+
+
+class FakePayload:
+    def __init__(self, guild_id : int, message_id : int, emoji : str):
+        self.guild_id : int = guild_id
+        self.message_id : int = message_id
+        self.emoji : str = emoji
+
+
+@pytest.fixture
+def guilds(tmp_path, monkeypatch) -> tuple[dict[tuple[int, int, str], int], int]:
+    """Guilds with role reacts and youtube subscriptions, in the config store. Gives their reactions and subscriptions count."""
+    random.seed(GUILDS_COUNT)
+    monkeypatch.setattr(config_store, "_backend", JsonTreeBackend(str(tmp_path)))
+    monkeypatch.setattr(config_store, "_configs", {})
+    monkeypatch.setattr(config_store, "_server_ids", None)
+
+    ytb_channel_ids : list[str] = [f"UC{i:022d}" for i in range(YOUTUBE_CHANNELS_COUNT)]
+    reactions : dict[tuple[int, int, str], int] = {}
+    for _ in range(GUILDS_COUNT):
+        guild_id : int = snowflake()
+        config_store.create(guild_id)
+        config : dict[str, any] = config_store.get(guild_id)
+        message_id : int = snowflake()
+        roles : dict[str, int] = {emoji: snowflake() for emoji in EMOJIS}
+        config["role_react"][str(message_id)] = {emoji: str(role_id) for emoji, role_id in roles.items()}
+        reactions |= {(guild_id, message_id, emoji): role_id for emoji, role_id in roles.items()}
+        config["youtube_survey"]["channel_id"] = str(snowflake())
+        for ytb_channel_id in random.sample(ytb_channel_ids, SUBSCRIPTIONS_PER_GUILD):
+            config["youtube_survey"]["youtube_channels_id"][ytb_channel_id] = None
+    return reactions, GUILDS_COUNT * SUBSCRIPTIONS_PER_GUILD
+
+
+def load_shards(shard_count : int) -> list[tuple[ShardMap, RoleReactIndex, SubscriptionIndex, FakeEventSource]]:
+    """Loads the indexes of each shard, as a process running only that shard would."""
+    shards : list[tuple[ShardMap, RoleReactIndex, SubscriptionIndex, FakeEventSource]] = []
+    for shard_id in range(shard_count):
+        shard : ShardMap = ShardMap(shard_count, [shard_id])
+        role_react_index : RoleReactIndex = RoleReactIndex(shard)
+        subscription_index : SubscriptionIndex = SubscriptionIndex(shard)
+        role_react_index.load_shard(shard_id)
+        subscription_index.load_shard(shard_id)
+        source : FakeEventSource = FakeEventSource()
+        shard.count_events(source)
+        shards.append((shard, role_react_index, subscription_index, source))
+    return shards
+
+
+@pytest.mark.parametrize("shard_count", [1, 4, 7])
+def test_every_guild_is_served_by_its_shard_only(guilds, shard_count : int):
+    reactions, _ = guilds
+    shards = load_shards(shard_count)
+    # Discord sends each guild's events to the shard owning it only.
+    routing : ShardMap = ShardMap(shard_count)
+    served : list[int] = [0] * shard_count
+    for _ in range(EVENTS_COUNT):
+        (guild_id, message_id, emoji), role_id = random.choice(list(reactions.items()))
+        shard_id : int = routing.shard_of(guild_id)
+        shard, role_react_index, _, source = shards[shard_id]
+        source.dispatch("raw_reaction_add", FakePayload(guild_id, message_id, emoji))
+        assert role_react_index.get(guild_id, message_id, emoji) == role_id
+        assert all(other[1].get(guild_id, message_id, emoji) is None for other in shards if other[0] is not shard)
+        served[shard_id] += 1
+
+    for shard_id, (shard, _, _, _) in enumerate(shards):
+        assert shard.events.get(shard_id, 0) == served[shard_id]
+        assert shard.stats()[f"shard_{shard_id}_events"] == served[shard_id]
+
+
+@pytest.mark.parametrize("shard_count", [1, 4, 7])
+def test_every_subscription_is_announced_by_one_shard(guilds, shard_count : int):
+    _, subscriptions = guilds
+    shards = load_shards(shard_count)
+    announcements : int = 0
+    for shard, _, subscription_index, _ in shards:
+        for ytb_channel_id in subscription_index.channels():
+            subscribers : list[tuple[int, int | None, str | None]] = subscription_index.subscribers(ytb_channel_id)
+            assert all(shard.is_local(server_id) for server_id, _, _ in subscribers)
+            announcements += len(subscribers)
+    assert announcements == subscriptions
+
+
+def test_shards_partition_the_guilds(guilds):
+    shard : ShardMap = ShardMap(4, [1, 3])
+    server_ids : list[int] = config_store.server_ids()
+    partition : dict[int, list[int]] = shard.partition(server_ids)
+
+    assert set(partition) == {1, 3}
+    assert sorted(guild_id for shard_guilds in partition.values() for guild_id in shard_guilds) == sorted(shard.local(server_ids))
+    assert all(shard.shard_of(guild_id) == shard_id for shard_id, shard_guilds in partition.items() for guild_id in shard_guilds)
+    assert len(shard.local(server_ids)) + len(ShardMap(4, [0, 2]).local(server_ids)) == len(server_ids)
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from utils import settings
+from utils.storage import JsonTreeBackend, SqliteBackend, StorageBackend, migrate
+
+
+def journal_lines(backend : JsonTreeBackend, server_id : int) -> list[str]:
+    with open(backend._journal_path(server_id), 'r', encoding='utf-8') as file:
+        return file.read().splitlines()
+
+
+def test_journal_replays_additions_and_removals(tmp_path):
+    backend : JsonTreeBackend = JsonTreeBackend(str(tmp_path))
+    backend.create_server(1, {"language": "en"})
+    for channel_id in (10, 11, 12):
+        backend.add_temp_channel(1, channel_id)
+    backend.remove_temp_channel(1, 11)
+
+    assert journal_lines(backend, 1) == ["+10", "+11", "+12", "-11"]
+    assert JsonTreeBackend(str(tmp_path)).load_temp_channels(1) == {10, 12}
+
+
+def test_journal_is_compacted_once_it_outgrows_the_live_channels(tmp_path):
+    backend : JsonTreeBackend = JsonTreeBackend(str(tmp_path))
+    backend.create_server(1, {"language": "en"})
+    backend.add_temp_channel(1, 1000)
+    for channel_id in range(settings.TEMP_VOICE_JOURNAL_SLACK):
+        backend.add_temp_channel(1, channel_id)
+        backend.remove_temp_channel(1, channel_id)
+
+    lines : list[str] = journal_lines(backend, 1)
+    assert len(lines) <= 1 + settings.TEMP_VOICE_JOURNAL_SLACK
+    assert "+1000" in lines
+    assert JsonTreeBackend(str(tmp_path)).load_temp_channels(1) == {1000}
+
+
+def test_config_write_replaces_the_whole_file(tmp_path):
+    backend : JsonTreeBackend = JsonTreeBackend(str(tmp_path))
+    backend.create_server(1, {"language": "en", "role_react": {"1": {"👍": "2"}}})
+    backend.save_config(1, {"language": "fr"})
+
+    assert JsonTreeBackend(str(tmp_path)).load_config(1) == {"language": "fr"}
+    assert not (tmp_path / "1" / "config.json.tmp").exists()
+
+
+@pytest.mark.parametrize("backend_type", [JsonTreeBackend, SqliteBackend])
+def test_migrate_copies_every_server(tmp_path, backend_type):
+    source : JsonTreeBackend = JsonTreeBackend(str(tmp_path / "servers"))
+    with open(settings.CONFIG_TEMPLATE_PATH, 'r', encoding='utf-8') as file:
+        config : dict[str, any] = json.load(file)
+    config["language"] = "fr"
+    source.create_server(1, config)
+    source.add_temp_channel(1, 10)
+    source.save_welcome_background(1, b"jpeg")
+
+    destination : StorageBackend = JsonTreeBackend(str(tmp_path / "copy")) if backend_type is JsonTreeBackend else SqliteBackend(str(tmp_path / "bot.db"), str(tmp_path / "cache"))
+    try:
+        assert migrate(source, destination) == 1
+        assert destination.load_config(1) == config
+        assert destination.load_temp_channels(1) == {10}
+        assert destination.load_welcome_background(1) == b"jpeg"
+    finally:
+        destination.close()
+
+
+def test_storage_is_built_on_first_use(tmp_path, monkeypatch):
+    from utils import storage
+    from utils.config_store import ConfigStore
+
+    built : list[StorageBackend] = []
+
+    def create_backend() -> StorageBackend:
+        built.append(JsonTreeBackend(str(tmp_path)))
+        return built[-1]
+    monkeypatch.setattr(storage, "_storage", None)
+    monkeypatch.setattr(storage, "create_backend", create_backend)
+    store : ConfigStore = ConfigStore()
+
+    assert built == []
+    assert store.backend is storage.get_storage() is built[0]
+    assert len(built) == 1
+
+
+def test_incomplete_backend_fails_when_instantiated():
+    class ConfigOnlyBackend(StorageBackend):
+        def load_config(self, server_id : int) -> dict[str, any]:
+            return {}
+
+    with pytest.raises(TypeError):
+        ConfigOnlyBackend()
@@ -0,0 +1,61 @@
+import asyncio
+
+import discord
+import pytest
+
+import cogs.voice
+from tests.fakes import FakeGuild, FakeHTTP, FakeVoiceChannel
+from utils.config_store import config_store
+from utils.storage import JsonTreeBackend
+from utils.temp_voice_registry import TempVoiceRegistry
+
+
+@pytest.fixture
+def guild(monkeypatch) -> FakeGuild:
+    # reconcile() only deletes voice channels
+    monkeypatch.setattr(discord, "VoiceChannel", FakeVoiceChannel)
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    guild.shard_id = 0
+    return guild
+
+
+def new_registry(tmp_path, guild : FakeGuild, channels : list[FakeVoiceChannel]) -> TempVoiceRegistry:
+    backend : JsonTreeBackend = JsonTreeBackend(str(tmp_path))
+    backend.create_server(guild.id, {})
+    registry : TempVoiceRegistry = TempVoiceRegistry(backend)
+    for channel in channels:
+        registry.add(guild.id, channel.id)
+    return registry
+
+
+def test_reconcile_deletes_the_empty_leftovers_only(tmp_path, guild : FakeGuild):
+    empty, occupied, spare = (guild.add_channel(FakeVoiceChannel(guild.http, guild, name)) for name in ("empty", "occupied", "spare"))
+    occupied.members.append(next(iter(guild.members.values())))
+    deleted : FakeVoiceChannel = FakeVoiceChannel(guild.http, guild, "deleted")
+    registry : TempVoiceRegistry = new_registry(tmp_path, guild, [empty, occupied, spare, deleted])
+
+    asyncio.run(registry.reconcile(guild, keep={spare.id}))
+
+    assert set(guild.channels) == {guild.system_channel.id, occupied.id, spare.id}
+    assert guild.http.calls == {"DELETE channel": 1}
+    assert JsonTreeBackend(str(tmp_path)).load_temp_channels(guild.id) == {occupied.id, spare.id}
+
+
+def test_shard_is_only_reconciled_on_its_first_ready(tmp_path, guild : FakeGuild, monkeypatch):
+    class FakeBot:
+        guilds : list[FakeGuild] = [guild]
+
+    registry : TempVoiceRegistry = new_registry(tmp_path, guild, [])
+    monkeypatch.setattr(cogs.voice, "temp_voice_registry", registry)
+    monkeypatch.setattr(config_store, "has", lambda server_id: True)
+    monkeypatch.setattr(config_store, "get", lambda server_id: {"join_to_create_channel_system": {}})
+    join_to_create : cogs.voice.JoinToCreate = cogs.voice.JoinToCreate(FakeBot())
+
+    asyncio.run(join_to_create.on_shard_loaded(0))
+    # Created while the shard was up, then the shard reconnects
+    channel : FakeVoiceChannel = guild.add_channel(FakeVoiceChannel(guild.http, guild, "temporary"))
+    registry.add(guild.id, channel.id)
+    asyncio.run(join_to_create.on_shard_loaded(0))
+
+    assert guild.get_channel(channel.id) is channel
+    assert registry.contains(guild.id, channel.id)
@@ -0,0 +1,180 @@
+"""WebSub receiver against a local stand-in hub, see benchmarks/websub_local_hub.py."""
+import asyncio
+import hashlib
+import hmac
+import socket
+import time
+import uuid
+
+import aiohttp
+import feedparser
+import pytest
+from aiohttp import web
+
+from utils.websub import WebSubReceiver
+
+HOST : str = '127.0.0.1'
+SECRET : str = 'local-secret'
+CHANNELS_COUNT : int = 20
+
+ENTRY_TEMPLATE : str = """<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+ <title>YouTube video feed</title>
+ <entry>
+  <yt:videoId>{video_id}</yt:videoId>
+  <yt:channelId>{channel_id}</yt:channelId>
+  <title>New video</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  <author><name>Channel {channel_id}</name></author>
+  <published>{published}</published>
+ </entry>
+</feed>"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def entry(channel_id : str, published : float | None = None, video_id : str | None = None) -> bytes:
+    return ENTRY_TEMPLATE.format(
+        video_id=video_id or f"video-{channel_id}", channel_id=channel_id,
+        published=time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(published or time.time()))
+    ).encode()
+
+
+def sign(body : bytes, secret : str = SECRET) -> str:
+    return "sha1=" + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+
+
+class StandInHub:
+    """Accepts subscriptions, verifies them with a challenge on the callback, then pushes a signed entry."""
+
+    def __init__(self):
+        self.verified : list[str] = []
+        self.secrets : set[str] = set()
+        self.port : int = free_port()
+        self._runner : web.AppRunner | None = None
+        self._session : aiohttp.ClientSession | None = None
+        self._tasks : set[asyncio.Task] = set()
+
+    async def verify_and_push(self, callback : str, topic : str, channel_id : str, secret : str) -> None:
+        challenge : str = uuid.uuid4().hex
+        async with self._session.get(callback, params={"hub.mode": "subscribe", "hub.topic": topic, "hub.challenge": challenge, "hub.lease_seconds": "3600"}) as response:
+            if response.status != 200 or await response.text() != challenge:
+                return
+        self.verified.append(channel_id)
+        body : bytes = entry(channel_id)
+        await self._session.post(callback, data=body, headers={"Content-Type": "application/atom+xml", "X-Hub-Signature": sign(body, secret)})
+
+    async def subscribe(self, request : web.Request) -> web.Response:
+        form = await request.post()
+        self.secrets.add(form.get("hub.secret", ""))
+        task : asyncio.Task = asyncio.create_task(self.verify_and_push(form["hub.callback"], form["hub.topic"], form["hub.topic"].split("channel_id=")[-1], form.get("hub.secret", "")))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response(status=202)
+
+    async def start(self) -> None:
+        self._session = aiohttp.ClientSession()
+        app : web.Application = web.Application()
+        app.router.add_post('/subscribe', self.subscribe)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, HOST, self.port).start()
+
+    async def stop(self) -> None:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._runner.cleanup()
+        await self._session.close()
+
+
+def run_with_receiver(scenario) -> dict[str, str]:
+    """Runs a scenario with a started hub and receiver, returns the links received by on_feeds."""
+    received : dict[str, str] = {}
+
+    async def on_feeds(_ : aiohttp.ClientSession, feeds : dict) -> None:
+        for channel_id, feed in feeds.items():
+            received[channel_id] = feed.entries[0].link
+
+    async def run() -> None:
+        hub : StandInHub = StandInHub()
+        await hub.start()
+        port : int = free_port()
+        receiver : WebSubReceiver = WebSubReceiver(on_feeds, SECRET, callback_url=f'http://{HOST}:{port}/websub', hub_url=f'http://{HOST}:{hub.port}/subscribe')
+        await receiver.start(HOST, port)
+        try:
+            await scenario(hub, receiver, received)
+        finally:
+            await receiver.stop()
+            await hub.stop()
+
+    asyncio.run(run())
+    return received
+
+
+def test_receiver_refuses_an_empty_secret():
+    async def on_feeds(*_) -> None:
+        pass
+
+    with pytest.raises(ValueError):
+        WebSubReceiver(on_feeds, "")
+
+
+def test_subscribed_channels_are_pushed():
+    channel_ids : set[str] = {f"UC{i:022d}" for i in range(CHANNELS_COUNT)}
+
+    async def scenario(hub : StandInHub, receiver : WebSubReceiver, received : dict[str, str]) -> None:
+        await receiver.sync(channel_ids)
+        deadline : float = time.monotonic() + 10
+        while len(received) < CHANNELS_COUNT and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert hub.secrets == {SECRET}
+        assert sorted(hub.verified) == sorted(channel_ids)
+        assert all(receiver.is_active(channel_id) for channel_id in channel_ids)
+        assert receiver.stats()["rejected_notifications"] == 0
+
+    received : dict[str, str] = run_with_receiver(scenario)
+    assert received == {channel_id: f"https://www.youtube.com/watch?v=video-{channel_id}" for channel_id in channel_ids}
+
+
+def test_unsigned_and_old_notifications_are_not_announced():
+    channel_id : str = f"UC{0:022d}"
+
+    async def scenario(hub : StandInHub, receiver : WebSubReceiver, received : dict[str, str]) -> None:
+        # Wanted, but not subscribed to the hub, so that it pushes nothing itself
+        receiver._wanted = {channel_id}
+        body : bytes = entry(channel_id)
+        old : bytes = entry(channel_id, published=time.time() - 7 * 24 * 60 * 60)
+        async with aiohttp.ClientSession() as session:
+            for data, signature in ((body, ""), (body, sign(body, "forged")), (old, sign(old))):
+                async with session.post(receiver.callback_url, data=data, headers={"X-Hub-Signature": signature}) as response:
+                    assert response.status in (202, 204)
+        assert receiver.stats()["rejected_notifications"] == 2
+
+    assert run_with_receiver(scenario) == {}
+
+
+def test_pushed_edits_of_older_videos_are_not_announced():
+    channel_id, polled_channel_id = f"UC{0:022d}", f"UC{1:022d}"
+
+    async def scenario(hub : StandInHub, receiver : WebSubReceiver, received : dict[str, str]) -> None:
+        receiver._wanted = {channel_id, polled_channel_id}
+        now : float = time.time()
+        # Polled before its lease was verified
+        receiver.observe({polled_channel_id: feedparser.parse(entry(polled_channel_id, published=now - 60, video_id="polled"))})
+        async with aiohttp.ClientSession() as session:
+            for video_id, published in (("older", now - 60 * 60), ("newer", now - 60)):
+                body : bytes = entry(channel_id, published=published, video_id=video_id)
+                async with session.post(receiver.callback_url, data=body, headers={"X-Hub-Signature": sign(body)}):
+                    assert received[channel_id] == f"https://www.youtube.com/watch?v={video_id}"
+            received.clear()
+            # Edits of videos still under a day old
+            for edited_channel_id, video_id, published in ((channel_id, "older", now - 60 * 60), (channel_id, "newer", now - 60), (polled_channel_id, "edited", now - 2 * 60 * 60)):
+                body : bytes = entry(edited_channel_id, published=published, video_id=video_id)
+                async with session.post(receiver.callback_url, data=body, headers={"X-Hub-Signature": sign(body)}):
+                    pass
+        assert receiver.stats()["ignored_entries"] == 3
+
+    assert run_with_receiver(scenario) == {}
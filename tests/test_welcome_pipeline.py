@@ -0,0 +1,98 @@
+import asyncio
+
+from tests.fakes import FakeGuild, FakeHTTP, FakeMember
+from utils.welcome_pipeline import WelcomePipeline
+
+
+class Cards:
+    """Records the cards sent by a pipeline, optionally failing the group ones."""
+
+    def __init__(self, fail_batches : int = 0):
+        self.single : list[FakeMember] = []
+        self.batches : list[list[FakeMember]] = []
+        self.fail_batches : int = fail_batches
+
+    async def send_single(self, member : FakeMember) -> None:
+        self.single.append(member)
+
+    async def send_batch(self, guild : FakeGuild, members : list[FakeMember]) -> None:
+        if self.fail_batches:
+            self.fail_batches -= 1
+            raise RuntimeError("render failed")
+        self.batches.append(members)
+
+
+def new_pipeline(cards : Cards) -> WelcomePipeline:
+    return WelcomePipeline(cards.send_single, cards.send_batch, threshold=3, rate_window=0.2, batch_window=0.05)
+
+
+def test_quiet_joins_get_a_card_each():
+    cards : Cards = Cards()
+    pipeline : WelcomePipeline = new_pipeline(cards)
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    members : list[FakeMember] = [FakeMember(guild.http, guild) for _ in range(3)]
+
+    async def run() -> None:
+        for member in members:
+            await pipeline.handle_join(member)
+
+    asyncio.run(run())
+    assert cards.single == members
+    assert not pipeline.is_batching(guild.id)
+
+
+def test_join_raid_is_welcomed_with_group_cards_then_single_cards_again():
+    cards : Cards = Cards()
+    pipeline : WelcomePipeline = new_pipeline(cards)
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    raid : list[FakeMember] = [FakeMember(guild.http, guild) for _ in range(10)]
+    late : FakeMember = FakeMember(guild.http, guild)
+
+    async def run() -> None:
+        for member in raid:
+            await pipeline.handle_join(member)
+        assert pipeline.is_batching(guild.id)
+        # The raid is over once the join rate is back under the threshold
+        await asyncio.sleep(0.4)
+        await pipeline.handle_join(late)
+
+    asyncio.run(run())
+    assert cards.single == raid[:3] + [late]
+    assert [member for batch in cards.batches for member in batch] == raid[3:]
+    assert pipeline.stats()["switches_to_batch"] == 1
+    assert pipeline.stats()["switches_to_single"] == 1
+    assert pipeline.stats()["batching_servers"] == 0
+
+
+def test_failed_group_card_does_not_leave_the_server_batching():
+    cards : Cards = Cards(fail_batches=1)
+    pipeline : WelcomePipeline = new_pipeline(cards)
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    raid : list[FakeMember] = [FakeMember(guild.http, guild) for _ in range(10)]
+    late : FakeMember = FakeMember(guild.http, guild)
+
+    async def run() -> None:
+        for member in raid:
+            await pipeline.handle_join(member)
+        await asyncio.sleep(0.4)
+        await pipeline.handle_join(late)
+
+    asyncio.run(run())
+    assert pipeline.stats()["errors"] == 1
+    assert not pipeline.is_batching(guild.id)
+    assert cards.single[-1] is late
+
+
+def test_server_without_system_channel_is_skipped():
+    cards : Cards = Cards()
+    pipeline : WelcomePipeline = new_pipeline(cards)
+    guild : FakeGuild = FakeGuild(FakeHTTP(), 1)
+    guild.system_channel = None
+
+    async def run() -> None:
+        for member in guild.members.values():
+            await pipeline.handle_join(member)
+
+    asyncio.run(run())
+    assert cards.single == [] and cards.batches == []
+    assert pipeline.stats()["skipped"] == len(guild.members)
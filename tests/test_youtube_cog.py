@@ -0,0 +1,85 @@
+import asyncio
+
+import feedparser
+import pytest
+
+import cogs.youtube
+from tests.fakes import FakeGuild, FakeHTTP, FakeTextChannel
+from utils.config_store import config_store
+from utils.sharding import ShardMap
+from utils.storage import JsonTreeBackend
+from utils.subscription_index import SubscriptionIndex
+
+YTB_CHANNEL_ID : str = f"UC{0:022d}"
+
+
+class FakeBot:
+    def __init__(self, guilds : list[FakeGuild]):
+        self.guilds : dict[int, FakeGuild] = {guild.id: guild for guild in guilds}
+
+    def get_guild(self, guild_id : int) -> FakeGuild | None:
+        return self.guilds.get(guild_id)
+
+
+class Announcements:
+    """Stand-in outbound dispatcher, running `during_send` while the announcements are sent."""
+
+    def __init__(self, during_send):
+        self.during_send = during_send
+        self.sent : list[int] = []
+
+    async def send(self, channel : FakeTextChannel, priority, **_) -> None:
+        await asyncio.sleep(0)
+        self.during_send()
+        self.sent.append(channel.guild.id)
+
+
+@pytest.fixture
+def guilds(tmp_path, monkeypatch) -> list[FakeGuild]:
+    """Servers watching the same youtube channel, in a config store and subscription index of their own."""
+    monkeypatch.setattr(config_store, "_backend", JsonTreeBackend(str(tmp_path)))
+    monkeypatch.setattr(config_store, "_configs", {})
+    monkeypatch.setattr(config_store, "_server_ids", None)
+    index : SubscriptionIndex = SubscriptionIndex(ShardMap(1))
+    monkeypatch.setattr(cogs.youtube, "subscription_index", index)
+
+    http : FakeHTTP = FakeHTTP()
+    guilds : list[FakeGuild] = [FakeGuild(http, guild_id) for guild_id in (1, 2, 3)]
+    for guild in guilds:
+        config_store.create(guild.id)
+        announcements : FakeTextChannel = guild.add_channel(FakeTextChannel(http, guild))
+        config_store.get(guild.id)["youtube_survey"]["channel_id"] = str(announcements.id)
+        config_store.get(guild.id)["youtube_survey"]["youtube_channels_id"][YTB_CHANNEL_ID] = None
+        index.add(guild.id, YTB_CHANNEL_ID)
+    return guilds
+
+
+def announce(guilds : list[FakeGuild], announcements : Announcements, monkeypatch) -> None:
+    monkeypatch.setattr(cogs.youtube, "outbound", announcements)
+    youtube : cogs.youtube.Youtube = cogs.youtube.Youtube(FakeBot(guilds))
+    feed : feedparser.FeedParserDict = feedparser.FeedParserDict(feed=feedparser.FeedParserDict(), entries=[feedparser.FeedParserDict(
+        link="https://www.youtube.com/watch?v=new", author="Channel"
+    )])
+    asyncio.run(youtube.announce_new_videos(None, {YTB_CHANNEL_ID: feed}))
+
+
+def test_new_video_is_remembered_by_each_server(guilds : list[FakeGuild], monkeypatch):
+    announcements : Announcements = Announcements(lambda: None)
+    announce(guilds, announcements, monkeypatch)
+
+    assert sorted(announcements.sent) == [1, 2, 3]
+    assert all(config_store.get(guild.id)["youtube_survey"]["youtube_channels_id"][YTB_CHANNEL_ID] == "new" for guild in guilds)
+
+
+def test_subscriptions_removed_during_the_announcements_stay_removed(guilds : list[FakeGuild], monkeypatch):
+    def remove() -> None:
+        # /remove_ytb on one server, and the bot leaving another one
+        config_store.get(1)["youtube_survey"]["youtube_channels_id"].pop(YTB_CHANNEL_ID, None)
+        if config_store.has(2):
+            config_store.delete(2)
+
+    announce(guilds, Announcements(remove), monkeypatch)
+
+    assert YTB_CHANNEL_ID not in config_store.get(1)["youtube_survey"]["youtube_channels_id"]
+    assert not config_store.has(2)
+    assert config_store.get(3)["youtube_survey"]["youtube_channels_id"][YTB_CHANNEL_ID] == "new"
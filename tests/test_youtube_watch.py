@@ -0,0 +1,77 @@
+import feedparser
+
+from utils import settings
+from utils.youtube_watch import FeedScheduler, latest_video_id
+
+
+def feed(video_id : str | None) -> feedparser.FeedParserDict:
+    entries : list = [feedparser.FeedParserDict(link=f"https://www.youtube.com/watch?v={video_id}")] if video_id else []
+    return feedparser.FeedParserDict(feed=feedparser.FeedParserDict(), entries=entries)
+
+
+def test_latest_video_id():
+    assert latest_video_id(feed("abc")) == "abc"
+    assert latest_video_id(feed(None)) is None
+    assert latest_video_id(None) is None
+
+
+def test_new_channels_are_due_at_once_and_unwatched_ones_forgotten():
+    scheduler : FeedScheduler = FeedScheduler()
+    scheduler.sync({"a", "b"})
+    now : float = max(state.next_due for state in scheduler.states.values())
+    assert sorted(scheduler.pop_due(now)) == ["a", "b"]
+
+    scheduler.sync({"a"})
+    assert set(scheduler.states) == {"a"}
+
+
+def test_polls_stay_within_the_request_budget():
+    scheduler : FeedScheduler = FeedScheduler(requests_per_minute=10)
+    scheduler.sync({f"channel{i}" for i in range(25)})
+    now : float = max(state.next_due for state in scheduler.states.values())
+
+    assert len(scheduler.pop_due(now)) == 10
+    assert scheduler.pop_due(now) == []
+    # A minute later the budget is full again
+    assert len(scheduler.pop_due(now + 60)) == 10
+
+
+def test_interval_grows_while_nothing_changes():
+    scheduler : FeedScheduler = FeedScheduler()
+    scheduler.sync({"a"})
+    state = scheduler.states["a"]
+    now : float = state.next_due
+    scheduler.reschedule("a", feed("v1"), now)
+    interval : float = state.interval
+
+    for _ in range(50):
+        scheduler.reschedule("a", None, now)
+        assert state.interval >= interval
+        interval = state.interval
+    assert state.interval == settings.FEED_MAX_INTERVAL
+    assert abs(state.next_due - now - state.interval) <= settings.FEED_JITTER * state.interval
+
+
+def test_interval_follows_the_upload_frequency():
+    scheduler : FeedScheduler = FeedScheduler()
+    scheduler.sync({"a"})
+    state = scheduler.states["a"]
+    now : float = 0.0
+    gap : float = 12 * 60 * 60
+    for index in range(5):
+        scheduler.reschedule("a", feed(f"v{index}"), now)
+        now += gap
+
+    assert state.upload_gap == gap
+    assert state.interval == min(max(gap / 6, settings.FEED_MIN_INTERVAL), settings.FEED_MAX_INTERVAL)
+
+
+def test_rescheduled_feed_is_only_polled_at_its_new_due_time():
+    scheduler : FeedScheduler = FeedScheduler()
+    scheduler.sync({"a"})
+    now : float = scheduler.states["a"].next_due
+    assert scheduler.pop_due(now) == ["a"]
+    scheduler.reschedule("a", feed("v1"), now)
+
+    assert scheduler.pop_due(now + 1) == []
+    assert scheduler.pop_due(scheduler.states["a"].next_due) == ["a"]